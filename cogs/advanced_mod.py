@@ -2,16 +2,67 @@ import discord
 from discord.ext import commands
 from datetime import datetime
 import asyncio
+import time
+from typing import Optional
+from config import BOT_CONFIG
+from utils.lockdown import edit_channels, restore_channels
+from utils.logging import get_logger
+from utils.permissions import LEVEL_NAMES, PermissionLevel, has_permissions_or_level, permission_cache
+
+logger = get_logger(__name__)
+
+MASS_ROLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mass_role_jobs (
+    guild_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER,
+    author_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    filter_role_id INTEGER,
+    after_id INTEGER NOT NULL DEFAULT 0,
+    changed INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+MASS_ROLE_FIELDS = ('guild_id', 'channel_id', 'message_id', 'author_id', 'role_id', 'action',
+                    'filter_role_id', 'after_id', 'changed', 'skipped', 'failed')
+
+MASS_ROLE_BATCH = 50  # Members handled between checkpoints
+MASS_ROLE_STATUS_INTERVAL = 5  # Seconds between progress edits
+
+UNLOCK_RETRY_SECONDS = 300  # Wait before retrying channels a timed unlock couldn't restore
 
 class AdvancedModerationCog(commands.Cog):
     """Advanced moderation features for Kitten Mod"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.locked_channels = set()
+        self.lockdowns = bot.lockdowns  # Saved overwrites of locked channels, shared with raid mode
+        self.role_jobs = {}  # guild_id -> running mass role job (mirrors the mass_role_jobs table)
+        self.role_tasks = {}  # guild_id -> worker task
+        
+        # Timed lockdowns are lifted by the shared expiry loop, even after a restart
+        self.bot.expiries.register('unlock', self._expire_lockdown)
+    
+    async def cog_load(self):
+        """Resume mass role jobs that were interrupted by a restart"""
+        await self.bot.database.executescript(MASS_ROLE_SCHEMA)
+        rows = await self.bot.database.fetchall(f"SELECT {', '.join(MASS_ROLE_FIELDS)} FROM mass_role_jobs")
+        for row in rows:
+            job = dict(zip(MASS_ROLE_FIELDS, row))
+            self.role_jobs[job['guild_id']] = job
+            self.role_tasks[job['guild_id']] = asyncio.create_task(self._run_role_job(job))
+    
+    def cog_unload(self):
+        """Stop mass role workers (their checkpoints are kept)"""
+        for task in self.role_tasks.values():
+            task.cancel()
     
     @commands.command(name='slowmode')
-    @commands.has_permissions(manage_channels=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_channels=True)
     async def set_slowmode(self, ctx, seconds: int):
         """Set channel slowmode with cute kitten messages"""
         
@@ -75,12 +126,12 @@ class AdvancedModerationCog(commands.Cog):
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
     
-    @commands.command(name='lockdown')
-    @commands.has_permissions(manage_channels=True)
+    @commands.group(name='lockdown', invoke_without_command=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_channels=True)
     async def lockdown_channel(self, ctx, duration: int = 0):
         """Lock down a channel temporarily (duration in minutes, 0 = permanent)"""
         
-        if ctx.channel.id in self.locked_channels:
+        if ctx.channel.id in self.lockdowns:
             embed = discord.Embed(
                 title="🐱 Already Locked Down",
                 description="Meow! This channel is already locked down! Use `!unlock` to open it back up! 🔒",
@@ -90,68 +141,48 @@ class AdvancedModerationCog(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        try:
-            # Get @everyone role
-            everyone_role = ctx.guild.default_role
-            
-            # Remove send message permissions
-            await ctx.channel.set_permissions(
-                everyone_role,
-                send_messages=False,
-                reason=f"Lockdown by {ctx.author} via Kitten Mod"
-            )
-            
-            self.locked_channels.add(ctx.channel.id)
-            
-            if duration > 0:
-                embed = discord.Embed(
-                    title="🔒 Channel Locked Down!",
-                    description=f"Meow! I've temporarily locked this channel for {duration} minute{'s' if duration != 1 else ''}. Only moderators can send messages now! 🐾🔒",
-                    color=discord.Color.from_rgb(255, 192, 203),
-                    timestamp=datetime.now()
-                )
-                
-                # Schedule unlock
-                asyncio.create_task(self._auto_unlock(ctx.channel, duration))
-            else:
-                embed = discord.Embed(
-                    title="🔒 Channel Locked Down!",
-                    description="Meow! I've locked this channel until a moderator uses `!unlock`. Only moderators can send messages now! 🐾🔒",
-                    color=discord.Color.from_rgb(255, 192, 203),
-                    timestamp=datetime.now()
-                )
-            
-            embed.add_field(
-                name="👮 Locked by:",
-                value=f"{ctx.author.mention}",
-                inline=True
-            )
-            
-            if duration > 0:
-                embed.add_field(
-                    name="⏰ Duration:",
-                    value=f"{duration} minute{'s' if duration != 1 else ''}",
-                    inline=True
-                )
-            
-            # Cute kitten thumbnail would go here
-            await ctx.send(embed=embed)
-            
-        except discord.Forbidden:
+        locked = await self._lock(ctx, [ctx.channel], ctx.channel.id, duration)
+        if not locked:
+            await self._send_no_permission(ctx)
+            return
+        
+        if duration > 0:
+            description = f"Meow! I've temporarily locked this channel for {duration} minute{'s' if duration != 1 else ''}. Only moderators can send messages now! 🐾🔒"
+        else:
+            description = "Meow! I've locked this channel until a moderator uses `!unlock`. Only moderators can send messages now! 🐾🔒"
+        
+        await ctx.send(embed=self._lockdown_embed(ctx, description, duration))
+    
+    @lockdown_channel.command(name='server')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_channels=True)
+    async def lockdown_server(self, ctx, duration: int = 0):
+        """Lock down every text channel in the server (duration in minutes, 0 = permanent)"""
+        await self._lock_many(ctx, ctx.guild.text_channels, ctx.guild.id, duration, "the whole server", "!unlock server")
+    
+    @lockdown_channel.command(name='category')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_channels=True)
+    async def lockdown_category(self, ctx, category: Optional[discord.CategoryChannel] = None, duration: int = 0):
+        """Lock down every text channel in a category (defaults to this channel's category)"""
+        category = category or ctx.channel.category
+        if category is None:
             embed = discord.Embed(
-                title="🐱 Kitty Can't Help",
-                description="Meow! I don't have permission to manage this channel! 🥺",
+                title="🐱 No Category Here",
+                description="Meow! This channel isn't in a category! Tell me which one, like `!lockdown category General`! 🐾",
                 color=discord.Color.from_rgb(255, 182, 193)
             )
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
+            return
+        
+        await self._lock_many(ctx, category.text_channels, category.id, duration, f"**{category.name}**", f"!unlock category {category.name}")
     
-    @commands.command(name='unlock')
-    @commands.has_permissions(manage_channels=True)
+    @commands.group(name='unlock', invoke_without_command=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_channels=True)
     async def unlock_channel(self, ctx):
         """Unlock a previously locked channel"""
         
-        if ctx.channel.id not in self.locked_channels:
+        snapshot = self.lockdowns.snapshots.get(ctx.channel.id)
+        if snapshot is None:
             embed = discord.Embed(
                 title="🐱 Not Locked Down",
                 description="Meow! This channel isn't locked down! Everyone can already chat freely! 🐾💕",
@@ -161,59 +192,208 @@ class AdvancedModerationCog(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        try:
-            # Get @everyone role
-            everyone_role = ctx.guild.default_role
-            
-            # Restore send message permissions
-            await ctx.channel.set_permissions(
+        restored, _ = await self._restore(ctx.guild, [snapshot], f"Unlocked by {ctx.author} via Kitten Mod")
+        if not restored:
+            await self._send_no_permission(ctx)
+            return
+        
+        if snapshot['scope_id'] == ctx.channel.id:
+            await self.bot.expiries.remove('unlock', ctx.guild.id, ctx.channel.id)
+        
+        embed = discord.Embed(
+            title="🔓 Channel Unlocked!",
+            description="Meow! The channel is open again! Everyone can chat freely now! Welcome back! 🐾✨",
+            color=discord.Color.from_rgb(144, 238, 144),
+            timestamp=datetime.now()
+        )
+        
+        embed.add_field(
+            name="👮 Unlocked by:",
+            value=f"{ctx.author.mention}",
+            inline=True
+        )
+        
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    @unlock_channel.command(name='server')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_channels=True)
+    async def unlock_server(self, ctx):
+        """Lift a server-wide lockdown"""
+        await self._unlock_many(ctx, ctx.guild.id, "the whole server")
+    
+    @unlock_channel.command(name='category')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_channels=True)
+    async def unlock_category(self, ctx, *, category: Optional[discord.CategoryChannel] = None):
+        """Lift a category lockdown (defaults to this channel's category)"""
+        category = category or ctx.channel.category
+        if category is None:
+            embed = discord.Embed(
+                title="🐱 No Category Here",
+                description="Meow! This channel isn't in a category! Tell me which one, like `!unlock category General`! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
+        
+        await self._unlock_many(ctx, category.id, f"**{category.name}**")
+    
+    async def _lock(self, ctx, channels, scope_id, duration):
+        """Snapshot and lock channels; returns the channels that were locked"""
+        everyone_role = ctx.guild.default_role
+        channels = [channel for channel in channels if channel.id not in self.lockdowns]
+        
+        # Save the current overwrites first so an unlock can always put them back
+        await self.lockdowns.save(channels, everyone_role, scope_id)
+        
+        async def lock(channel):
+            overwrite = channel.overwrites_for(everyone_role)
+            overwrite.send_messages = False
+            await channel.set_permissions(
                 everyone_role,
-                send_messages=None,  # Reset to default
-                reason=f"Unlocked by {ctx.author} via Kitten Mod"
+                overwrite=overwrite,
+                reason=f"Lockdown by {ctx.author} via Kitten Mod"
             )
-            
-            self.locked_channels.discard(ctx.channel.id)
-            
+        
+        locked = await edit_channels(channels, lock)
+        locked_ids = {channel.id for channel in locked}
+        await self.lockdowns.discard(channel.id for channel in channels if channel.id not in locked_ids)
+        
+        if locked and duration > 0:
+            # Schedule unlock
+            await self.bot.expiries.add('unlock', ctx.guild.id, scope_id, time.time() + duration * 60)
+        
+        return locked
+    
+    async def _restore(self, guild, snapshots, reason):
+        """Put back the saved overwrites; returns (restored, failed) counts"""
+        return await restore_channels(guild, self.lockdowns, snapshots, reason)
+    
+    async def _lock_many(self, ctx, channels, scope_id, duration, where, unlock_command):
+        """Lock a server or category and report it"""
+        if self.lockdowns.for_scope(scope_id):
             embed = discord.Embed(
-                title="🔓 Channel Unlocked!",
-                description="Meow! The channel is open again! Everyone can chat freely now! Welcome back! 🐾✨",
-                color=discord.Color.from_rgb(144, 238, 144),
-                timestamp=datetime.now()
-            )
-            
-            embed.add_field(
-                name="👮 Unlocked by:",
-                value=f"{ctx.author.mention}",
-                inline=True
+                title="🐱 Already Locked Down",
+                description=f"Meow! {where} is already locked down! Use `{unlock_command}` to open it back up! 🔒",
+                color=discord.Color.from_rgb(255, 182, 193)
             )
-            
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
-            
-        except discord.Forbidden:
+            return
+        
+        locked = await self._lock(ctx, channels, scope_id, duration)
+        if not locked:
+            await self._send_no_permission(ctx)
+            return
+        
+        if duration > 0:
+            description = f"Meow! I've locked {len(locked)} channel{'s' if len(locked) != 1 else ''} in {where} for {duration} minute{'s' if duration != 1 else ''}. Only moderators can send messages now! 🐾🔒"
+        else:
+            description = f"Meow! I've locked {len(locked)} channel{'s' if len(locked) != 1 else ''} in {where} until a moderator uses `{unlock_command}`. Only moderators can send messages now! 🐾🔒"
+        
+        embed = self._lockdown_embed(ctx, description, duration)
+        skipped = len(channels) - len(locked)
+        if skipped:
+            embed.add_field(
+                name="🐾 Skipped:",
+                value=f"{skipped} channel{'s' if skipped != 1 else ''} (already locked or no permission)",
+                inline=False
+            )
+        await ctx.send(embed=embed)
+    
+    async def _unlock_many(self, ctx, scope_id, where):
+        """Lift a server or category lockdown and report it"""
+        snapshots = self.lockdowns.for_scope(scope_id)
+        if not snapshots:
             embed = discord.Embed(
-                title="🐱 Kitty Can't Help",
-                description="Meow! I don't have permission to manage this channel! 🥺",
+                title="🐱 Not Locked Down",
+                description=f"Meow! {where} isn't locked down! Everyone can already chat freely! 🐾💕",
                 color=discord.Color.from_rgb(255, 182, 193)
             )
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
+            return
+        
+        restored, failed = await self._restore(ctx.guild, snapshots, f"Unlocked by {ctx.author} via Kitten Mod")
+        if not failed:
+            await self.bot.expiries.remove('unlock', ctx.guild.id, scope_id)
+        
+        embed = discord.Embed(
+            title="🔓 Unlocked!",
+            description=f"Meow! {where} is open again! I put {restored} channel{'s' if restored != 1 else ''} back exactly how they were! 🐾✨",
+            color=discord.Color.from_rgb(144, 238, 144),
+            timestamp=datetime.now()
+        )
+        embed.add_field(
+            name="👮 Unlocked by:",
+            value=f"{ctx.author.mention}",
+            inline=True
+        )
+        if failed:
+            embed.add_field(
+                name="😿 Still locked:",
+                value=f"{failed} channel{'s' if failed != 1 else ''} I couldn't edit. Run the command again once I have permission!",
+                inline=False
+            )
+        
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    def _lockdown_embed(self, ctx, description, duration):
+        embed = discord.Embed(
+            title="🔒 Channel Locked Down!",
+            description=description,
+            color=discord.Color.from_rgb(255, 192, 203),
+            timestamp=datetime.now()
+        )
+        
+        embed.add_field(
+            name="👮 Locked by:",
+            value=f"{ctx.author.mention}",
+            inline=True
+        )
+        
+        if duration > 0:
+            embed.add_field(
+                name="⏰ Duration:",
+                value=f"{duration} minute{'s' if duration != 1 else ''}",
+                inline=True
+            )
+        
+        # Cute kitten thumbnail would go here
+        return embed
+    
+    async def _send_no_permission(self, ctx):
+        embed = discord.Embed(
+            title="🐱 Kitty Can't Help",
+            description="Meow! I don't have permission to manage this channel! 🥺",
+            color=discord.Color.from_rgb(255, 182, 193)
+        )
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
     
-    async def _auto_unlock(self, channel, duration_minutes):
-        """Automatically unlock channel after duration"""
-        await asyncio.sleep(duration_minutes * 60)  # Convert to seconds
+    async def _expire_lockdown(self, guild_id, scope_id, data):
+        """Automatically unlock a channel, category or server once its lockdown runs out"""
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return
+        
+        snapshots = self.lockdowns.for_scope(scope_id)
+        if not snapshots:
+            return
+        
+        restored, failed = await self._restore(guild, snapshots, "Auto-unlock via Kitten Mod")
+        if failed:
+            # The firing expiry is deleted after this handler; schedule another try for the rest
+            await self.bot.expiries.add('unlock', guild_id, scope_id, time.time() + UNLOCK_RETRY_SECONDS)
         
-        if channel.id in self.locked_channels:
+        # Announce where the lockdown was started (the channel itself, or the server's system channel)
+        channel = guild.get_channel(scope_id)
+        if not isinstance(channel, discord.TextChannel):
+            channel = guild.system_channel
+        if restored and channel is not None:
             try:
-                everyone_role = channel.guild.default_role
-                await channel.set_permissions(
-                    everyone_role,
-                    send_messages=None,
-                    reason="Auto-unlock via Kitten Mod"
-                )
-                
-                self.locked_channels.discard(channel.id)
-                
                 embed = discord.Embed(
                     title="🔓 Auto-Unlock!",
                     description="Meow! The lockdown time is over! Everyone can chat again! 🐾⏰",
@@ -224,10 +404,10 @@ class AdvancedModerationCog(commands.Cog):
                 
                 await channel.send(embed=embed)
             except discord.Forbidden:
-                pass  # Can't send message or manage channel
+                pass  # Can't send message
     
     @commands.command(name='nickname')
-    @commands.has_permissions(manage_nicknames=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_nicknames=True)
     async def change_nickname(self, ctx, member: discord.Member, *, new_nickname: str = None):
         """Change someone's nickname with kitten flair"""
         
@@ -280,43 +460,13 @@ class AdvancedModerationCog(commands.Cog):
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
     
-    @commands.command(name='role')
-    @commands.has_permissions(manage_roles=True)
+    @commands.group(name='role', invoke_without_command=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_roles=True)
     async def manage_role(self, ctx, member: discord.Member, *, role_name: str):
         """Add or remove roles with cute kitten messages"""
         
-        # Find the role
-        role = discord.utils.get(ctx.guild.roles, name=role_name)
-        if not role:
-            embed = discord.Embed(
-                title="🐱 Role Not Found",
-                description=f"Meow! I can't find a role called '{role_name}'. Make sure you spelled it correctly! 🐾",
-                color=discord.Color.from_rgb(255, 182, 193)
-            )
-            # Cute kitten thumbnail would go here
-            await ctx.send(embed=embed)
-            return
-        
-        # Check if bot can manage this role
-        if role >= ctx.guild.me.top_role:
-            embed = discord.Embed(
-                title="🐱 Role Too High",
-                description="Meow! That role is higher than mine! I can't manage roles above my position! 🐾",
-                color=discord.Color.from_rgb(255, 182, 193)
-            )
-            # Cute kitten thumbnail would go here
-            await ctx.send(embed=embed)
-            return
-        
-        # Check if author can manage this role
-        if role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
-            embed = discord.Embed(
-                title="🐱 Can't Manage That Role",
-                description="Meow! You can't manage a role that's higher than or equal to your highest role! 🐾",
-                color=discord.Color.from_rgb(255, 182, 193)
-            )
-            # Cute kitten thumbnail would go here
-            await ctx.send(embed=embed)
+        role = await self._find_role(ctx, role_name)
+        if role is None or not await self._can_manage_role(ctx, role):
             return
         
         try:
@@ -356,5 +506,326 @@ class AdvancedModerationCog(commands.Cog):
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
 
+    @commands.group(name='rolelevel', invoke_without_command=True, extras={'permission_level': PermissionLevel.ADMIN})
+    @commands.has_permissions(administrator=True)
+    async def role_levels(self, ctx):
+        """Show which roles count as moderators or admins for Kitten Mod"""
+        config = self.bot.guild_configs.get(ctx.guild.id)
+        lines = [
+            f"<@&{role_id}> → **{'Admin' if level >= PermissionLevel.ADMIN else 'Moderator' if level >= PermissionLevel.MODERATOR else 'Member'}**"
+            for role_id, level in sorted(config.role_levels.items(), key=lambda item: item[1], reverse=True)
+            if ctx.guild.get_role(role_id)
+        ]
+        
+        embed = discord.Embed(
+            title="🐱 Role Levels",
+            description="\n".join(lines) if lines else "Meow! No roles are mapped yet, so I only look at Discord permissions! Try `!rolelevel set moderator Helpers` 🐾",
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    @role_levels.command(name='set')
+    @commands.has_permissions(administrator=True)
+    async def set_role_level(self, ctx, level: str, *, role_name: str):
+        """Make a role count as a permission level (member, moderator or admin)"""
+        level_value = LEVEL_NAMES.get(level.lower())
+        if level_value is None:
+            embed = discord.Embed(
+                title="🐱 Unknown Level",
+                description="Meow! Levels I know are `member`, `moderator` and `admin`! Example: `!rolelevel set moderator Helpers` 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
+        
+        role = await self._find_role(ctx, role_name)
+        if role is None:
+            return
+        
+        config = self.bot.guild_configs.get(ctx.guild.id)
+        if level_value == PermissionLevel.MEMBER:
+            config.role_levels.pop(role.id, None)
+        else:
+            config.role_levels[role.id] = level_value
+        self.bot.guild_configs.mark_dirty(ctx.guild.id)
+        permission_cache.set_role_levels(ctx.guild.id, config.role_levels)
+        
+        embed = discord.Embed(
+            title="🐱 Role Level Saved!",
+            description=f"Meow! Members with {role.mention} now count as **{level.lower()}** for my commands and filters! 🏷️✨",
+            color=discord.Color.from_rgb(144, 238, 144)
+        )
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    @role_levels.command(name='remove')
+    @commands.has_permissions(administrator=True)
+    async def remove_role_level(self, ctx, *, role_name: str):
+        """Stop a role from granting a permission level"""
+        await self.set_role_level(ctx, 'member', role_name=role_name)
+    
+    @manage_role.command(name='all')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_roles=True)
+    async def mass_role_all(self, ctx, action: str, *, role_name: str):
+        """Add or remove a role for every human member (!role all add Member)"""
+        await self._start_role_job(ctx, action, role_name, None)
+    
+    @manage_role.command(name='with')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_roles=True)
+    async def mass_role_with(self, ctx, filter_role_name: str, action: str, *, role_name: str):
+        """Add or remove a role for everyone with another role (!role with Verified add Member; quote names with spaces)"""
+        filter_role = await self._find_role(ctx, filter_role_name)
+        if filter_role is None:
+            return
+        await self._start_role_job(ctx, action, role_name, filter_role)
+    
+    @manage_role.command(name='cancel')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_roles=True)
+    async def mass_role_cancel(self, ctx):
+        """Stop the running mass role job"""
+        job = self.role_jobs.get(ctx.guild.id)
+        if job is None:
+            embed = discord.Embed(
+                title="🐱 Nothing to Stop",
+                description="Meow! I'm not changing roles for lots of members right now! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
+        
+        self.role_tasks[ctx.guild.id].cancel()
+        await self._finish_role_job(job, cancelled=True)
+        
+        embed = discord.Embed(
+            title="🐱 Role Job Stopped",
+            description=f"Meow! I stopped after changing {job['changed']} members! 🐾",
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    async def _find_role(self, ctx, role_name):
+        """Look up a role by name, asking which one was meant if several match"""
+        roles = self.bot.role_index.find(ctx.guild, role_name)
+        if not roles:
+            embed = discord.Embed(
+                title="🐱 Role Not Found",
+                description=f"Meow! I can't find a role called '{role_name}'. Make sure you spelled it correctly! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return None
+        
+        return await self.bot.role_index.choose(ctx, roles)
+    
+    async def _can_manage_role(self, ctx, role):
+        """Check the role is below both the bot and the author"""
+        # Check if bot can manage this role
+        if role >= ctx.guild.me.top_role:
+            embed = discord.Embed(
+                title="🐱 Role Too High",
+                description="Meow! That role is higher than mine! I can't manage roles above my position! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return False
+        
+        # Check if author can manage this role
+        if role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+            embed = discord.Embed(
+                title="🐱 Can't Manage That Role",
+                description="Meow! You can't manage a role that's higher than or equal to your highest role! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return False
+        
+        return True
+    
+    async def _start_role_job(self, ctx, action, role_name, filter_role):
+        """Check a mass role request and start its background job"""
+        action = action.lower()
+        if action not in ('add', 'remove'):
+            embed = discord.Embed(
+                title="🐱 Add or Remove?",
+                description="Meow! Tell me whether to `add` or `remove` the role, like `!role all add Member`! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
+        
+        if ctx.guild.id in self.role_jobs:
+            embed = discord.Embed(
+                title="🐱 Already Busy",
+                description="Meow! I'm already changing roles for lots of members here! Wait for it to finish or use `!role cancel`! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
+        
+        role = await self._find_role(ctx, role_name)
+        if role is None or not await self._can_manage_role(ctx, role):
+            return
+        
+        job = {
+            'guild_id': ctx.guild.id,
+            'channel_id': ctx.channel.id,
+            'message_id': None,
+            'author_id': ctx.author.id,
+            'role_id': role.id,
+            'action': action,
+            'filter_role_id': filter_role.id if filter_role else None,
+            'after_id': 0,  # Members are handled in ID order; everything up to here is done
+            'changed': 0,
+            'skipped': 0,
+            'failed': 0
+        }
+        
+        status = await ctx.send(embed=self._role_job_embed(job, ctx.guild))
+        job['message_id'] = status.id
+        
+        await self.bot.database.execute(
+            f"INSERT OR REPLACE INTO mass_role_jobs ({', '.join(MASS_ROLE_FIELDS)}) VALUES ({', '.join('?' * len(MASS_ROLE_FIELDS))})",
+            tuple(job[field] for field in MASS_ROLE_FIELDS)
+        )
+        self.role_jobs[ctx.guild.id] = job
+        self.role_tasks[ctx.guild.id] = asyncio.create_task(self._run_role_job(job))
+    
+    async def _run_role_job(self, job):
+        """Work through the member list in ID order, checkpointing after every batch"""
+        await self.bot.wait_until_ready()
+        
+        guild = self.bot.get_guild(job['guild_id'])
+        role = guild.get_role(job['role_id']) if guild else None
+        if role is None:
+            await self._finish_role_job(job, cancelled=True)
+            return
+        
+        adding = job['action'] == 'add'
+        reason = f"Mass role {job['action']} requested by user {job['author_id']} via Kitten Mod"
+        semaphore = asyncio.Semaphore(BOT_CONFIG['mass_role_workers'])
+        last_status = time.monotonic()
+        
+        async def update(member):
+            async with semaphore:
+                try:
+                    if adding:
+                        await member.add_roles(role, reason=reason)
+                    else:
+                        await member.remove_roles(role, reason=reason)
+                    job['changed'] += 1
+                except discord.NotFound:
+                    job['skipped'] += 1  # Left the server
+                except discord.HTTPException:
+                    job['failed'] += 1
+                # Pace each worker so a big job doesn't starve everything else of rate limit
+                await asyncio.sleep(BOT_CONFIG['mass_role_interval'])
+        
+        try:
+            batch = []
+            async for member in self._members_after(guild, job['after_id']):
+                if member.bot or (job['filter_role_id'] and not member.get_role(job['filter_role_id'])):
+                    continue
+                if (member.get_role(role.id) is not None) == adding:
+                    job['skipped'] += 1  # Already how we want them
+                else:
+                    batch.append(member)
+                
+                if len(batch) >= MASS_ROLE_BATCH:
+                    await asyncio.gather(*(update(m) for m in batch))
+                    batch = []
+                    await self._checkpoint_role_job(job, member.id)
+                    
+                    if time.monotonic() - last_status >= MASS_ROLE_STATUS_INTERVAL:
+                        last_status = time.monotonic()
+                        await self._edit_role_job_status(job, guild)
+            
+            await asyncio.gather(*(update(m) for m in batch))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Keep the checkpoint so the job resumes after a restart (or !role cancel drops it)
+            logger.error(f"Mass role job in guild {job['guild_id']} failed: {e}")
+            await self._edit_role_job_status(job, guild, crashed=True)
+            return
+        
+        await self._finish_role_job(job)
+    
+    async def _members_after(self, guild, after_id):
+        """Stream members with IDs above after_id in ID order"""
+        if guild.chunked:
+            for member in sorted((m for m in guild.members if m.id > after_id), key=lambda m: m.id):
+                yield member
+        else:
+            async for member in guild.fetch_members(limit=None, after=discord.Object(id=after_id)):
+                yield member
+    
+    async def _checkpoint_role_job(self, job, after_id):
+        job['after_id'] = after_id
+        await self.bot.database.execute(
+            "UPDATE mass_role_jobs SET after_id = ?, changed = ?, skipped = ?, failed = ? WHERE guild_id = ?",
+            (after_id, job['changed'], job['skipped'], job['failed'], job['guild_id'])
+        )
+    
+    async def _finish_role_job(self, job, cancelled=False):
+        """Forget a finished job and post the final numbers"""
+        guild_id = job['guild_id']
+        if self.role_jobs.get(guild_id) is not job:
+            return
+        
+        del self.role_jobs[guild_id]
+        self.role_tasks.pop(guild_id, None)
+        await self.bot.database.execute("DELETE FROM mass_role_jobs WHERE guild_id = ?", (guild_id,))
+        await self._edit_role_job_status(job, self.bot.get_guild(guild_id), done=not cancelled, cancelled=cancelled)
+    
+    async def _edit_role_job_status(self, job, guild, done=False, cancelled=False, crashed=False):
+        channel = self.bot.get_channel(job['channel_id'])
+        if channel is None or job['message_id'] is None:
+            return
+        
+        try:
+            await channel.get_partial_message(job['message_id']).edit(
+                embed=self._role_job_embed(job, guild, done, cancelled, crashed)
+            )
+        except discord.HTTPException:
+            pass  # Status message was deleted
+    
+    def _role_job_embed(self, job, guild, done=False, cancelled=False, crashed=False):
+        role = guild.get_role(job['role_id']) if guild else None
+        role_text = role.mention if role else "that role"
+        who = f"everyone with <@&{job['filter_role_id']}>" if job['filter_role_id'] else "every member"
+        verb = "Giving" if job['action'] == 'add' else "Taking away"
+        
+        description = f"Meow! {verb} {role_text} for {who}! 🐾"
+        if crashed:
+            title, color = "😿 Role Job Hit a Snag", discord.Color.from_rgb(255, 99, 71)
+            description += "\n\nSomething went wrong, so I stopped and saved my place. I'll pick up from there when I restart, or use `!role cancel` to drop it."
+        elif cancelled:
+            title, color = "🐱 Role Job Stopped", discord.Color.from_rgb(255, 182, 193)
+        elif done:
+            title, color = "🐱 Role Job Done!", discord.Color.from_rgb(144, 238, 144)
+        else:
+            title, color = "🏷️ Kitty Is Busy...", discord.Color.from_rgb(255, 192, 203)
+        
+        embed = discord.Embed(
+            title=title,
+            description=description,
+            color=color,
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="✅ Changed:", value=str(job['changed']), inline=True)
+        embed.add_field(name="⏭️ Already set:", value=str(job['skipped']), inline=True)
+        embed.add_field(name="❌ Failed:", value=str(job['failed']), inline=True)
+        # Cute kitten thumbnail would go here
+        return embed
+
 async def setup(bot):
     await bot.add_cog(AdvancedModerationCog(bot))
\ No newline at end of file
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 import random
 import asyncio
+import time
 from datetime import datetime
 
 class FunCog(commands.Cog):
@@ -219,11 +220,13 @@ class FunCog(commands.Cog):
             'players': set(),
             'channel': ctx.channel
         }
+        self.bot.reactions.register(msg.id, self._add_player, expires_at=time.time() + 30)
         
         # Wait for reactions
         await asyncio.sleep(30)
         
         # Check results
+        self.bot.reactions.unregister(msg.id)
         if msg.id in self.play_sessions:
             session = self.play_sessions[msg.id]
             if session['players']:
@@ -243,17 +246,14 @@ class FunCog(commands.Cog):
             await session['channel'].send(embed=result_embed)
             del self.play_sessions[msg.id]
     
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        """Handle playtime reactions"""
-        if user.bot:
+    async def _add_player(self, payload):
+        """Handle playtime reactions (routed by the reaction router)"""
+        if payload.member and payload.member.bot:
             return
         
-        msg_id = reaction.message.id
-        if msg_id in self.play_sessions:
-            session = self.play_sessions[msg_id]
-            if str(reaction.emoji) == session['game']['emoji']:
-                session['players'].add(user.id)
+        session = self.play_sessions.get(payload.message_id)
+        if session and str(payload.emoji) == session['game']['emoji']:
+            session['players'].add(payload.user_id)
 
 async def setup(bot):
     await bot.add_cog(FunCog(bot))
\ No newline at end of file
@@ -2,89 +2,215 @@ import discord
 from discord.ext import commands
 from datetime import datetime, timedelta
 import asyncio
-import re
+import random
+import time
 from typing import Optional
-from utils.permissions import has_mod_permissions
-from utils.logging import get_logger
+from utils.permissions import (
+    has_mod_permissions, has_permissions_or_level, get_permission_level, PermissionLevel, top_role_position
+)
+from utils.copypasta import CopypastaTracker
+from utils.durations import format_duration, parse_duration
+from utils.normalize import normalize_terms
+from utils.pipeline import ALL_FEATURES, FEATURE_NAMES, ContentHashCache, FilterFeature, MessagePipeline
+from utils.scanning import SCAN_TIMED_OUT, DeepScanner
+from utils.purge import BULK_DELETE_MAX_AGE, parse_purge_filter
+from utils.targets import chunked, parse_user_ids
+from utils.warnings import AutomodLadder, WarningTimeline
+from utils.logging import get_logger, log_moderation_action
+from config import BOT_CONFIG
 
 logger = get_logger(__name__)
 
+CLEAR_PROGRESS_INTERVAL = 3  # Seconds between !clear progress edits
+EXPIRY_RETRY_SECONDS = 60  # First wait before retrying an unmute/unban that failed; doubles each time
+EXPIRY_RETRY_MAX_SECONDS = 3600
+EXPIRY_MAX_ATTEMPTS = 50  # About two days of retries before giving up
+
 class ModerationCog(commands.Cog):
     """Moderation commands cog"""
     
     def __init__(self, bot):
         self.bot = bot
         self.warnings = {}  # In-memory storage for warnings
-        self.muted_users = {}  # Track muted users
-        self.mod_logs = []  # In-memory storage for moderation logs
-        self.automod_settings = {}  # Auto-moderation settings per guild
+        self.warning_timelines = {}  # (guild_id, user_id) -> WarningTimeline of warning times
+        self.automod_ladders = {}  # guild_id -> AutomodLadder compiled from the guild's config
+        self.muted_users = {}  # (guild_id, user_id) -> mute info
+        self.configs = bot.guild_configs  # Auto-moderation settings live in each guild's config
         
         # Inappropriate content filters
         self.banned_words = [
             'spam', 'scam', 'hack', 'cheat'  # Basic filter words
         ]
+        self.banned_terms = normalize_terms(self.banned_words)  # Folded once to match normalized messages
         
         self.spam_threshold = 5  # Messages per 10 seconds
         self.user_message_history = {}
+        
+        self.scanner = DeepScanner(
+            BOT_CONFIG['scan_workers'], BOT_CONFIG['scan_inline_chars'],
+            BOT_CONFIG['scan_max_attachment_bytes'], BOT_CONFIG['scan_max_attachments'],
+            BOT_CONFIG['scan_timeout']
+        )
+        self.copypasta = CopypastaTracker(
+            BOT_CONFIG['copypasta_window'], BOT_CONFIG['copypasta_min_authors'],
+            BOT_CONFIG['copypasta_max_distance'], BOT_CONFIG['copypasta_max_entries']
+        )
+        self.pipeline = MessagePipeline()
+        self.edit_cache = ContentHashCache(BOT_CONFIG['edit_cache_size'])
+        self._register_stages()
+        
+        # Mention reply cooldowns: channel_id -> window end, guild_id -> [window end, replies]
+        self.mention_cooldown = BOT_CONFIG['mention_cooldown']
+        self.mention_guild_replies = BOT_CONFIG['mention_guild_replies']
+        self.mention_windows = {}
+        self.guild_mention_windows = {}
+        self.suppressed_mentions = {}  # bucket key -> pings ignored while on cooldown
+        self.next_mention_prune = 0.0  # Expired windows are swept once per cooldown period
+        
+        # Timed actions are undone by the shared expiry loop, even after a restart
+        self.bot.expiries.register('unmute', self._expire_mute)
+        self.bot.expiries.register('unban', self._expire_tempban)
+        for entry in self.bot.expiries.pending('unmute'):
+            self.muted_users[(entry['guild_id'], entry['target_id'])] = {
+                'unmute_time': datetime.fromtimestamp(entry['expires_at']),
+                'role': entry['data'].get('role_id')
+            }
+    
+    def cog_unload(self):
+        """Shut down the content scanning processes"""
+        self.scanner.close()
     
     @commands.Cog.listener()
     async def on_message(self, message):
-        """Message filter for inappropriate content and bot mentions"""
+        """Run every non-bot message through the moderation pipeline"""
         if message.author.bot:
             return
         
-        # Check if bot is mentioned
-        if self.bot.user.mentioned_in(message):
-            # Create cute ping response
-            embed = discord.Embed(
-                title="🐱 Meow! Someone Called Me!",
-                description=f"Hello there, {message.author.mention}! I'm Kitten Mod, your adorable moderation assistant! 🐾\n\nNeed help? Try `{self.bot.command_prefix}help` to see all my cute commands!\n\nI'm here to keep our server safe and cozy! 💕",
-                color=discord.Color.from_rgb(255, 192, 203)
-            )
-            # Cute kitten thumbnail would go here
-            
-            # Add some random cute responses
-            import random
-            cute_responses = [
-                "Purr purr! What can I help you with? 🐾",
-                "Meow! Did someone need a fluffy moderator? ✨",
-                "*stretches paws* I'm here to help! 🐱",
-                "Mrow! Ready to keep things purrfect! 💕",
-                "*blinks slowly* Hello friend! Need assistance? 😸"
-            ]
-            
-            embed.add_field(
-                name="💭 Kitten Says:",
-                value=random.choice(cute_responses),
-                inline=False
-            )
-            
-            await message.channel.send(embed=embed)
+        if message.guild:
+            self.edit_cache.changed(message.id, message.content)
+        await self.pipeline.run(message, self._filter_features(message.guild), self._is_filter_exempt)
+    
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        """Filter edited messages too, including ones that aren't cached"""
+        message = payload.message
+        if message.guild is None or message.author.bot:
             return
         
-        # Check for banned words
-        content_lower = message.content.lower()
-        for word in self.banned_words:
-            if word in content_lower:
-                await message.delete()
-                
-                embed = discord.Embed(
-                    title="🐱 Meow! Message Cleaned Up",
-                    description=f"{message.author.mention}, I had to clean up your message because it had some naughty words! Let's keep things cute and friendly! 💕",
-                    color=discord.Color.from_rgb(255, 182, 193)
-                )
-                # Cute kitten thumbnail would go here
-                warning_msg = await message.channel.send(embed=embed)
-                
-                # Delete warning message after 5 seconds
-                await asyncio.sleep(5)
+        # Unfurls and embed updates don't change the text that was already scanned
+        if not self.edit_cache.changed(message.id, message.content):
+            return
+        await self.pipeline.run(message, self._filter_features(message.guild), self._is_filter_exempt, edited=True)
+    
+    def _filter_features(self, guild):
+        config = self.configs.peek(guild.id) if guild else None
+        return ALL_FEATURES if config is None else ALL_FEATURES & ~config.filter_disabled
+    
+    def _register_stages(self):
+        """Pipeline stages, cheapest first"""
+        self.pipeline.register(
+            'mention', self._mention_stage, cost=0,
+            applies=lambda message: self.bot.user.mentioned_in(message),
+            skip_exempt=False, guild_only=False, edits=False
+        )
+        self.pipeline.register('spam', self._spam_stage, cost=1, feature=FilterFeature.SPAM, edits=False)
+        self.pipeline.register(
+            'words', self._word_filter_stage, cost=2, feature=FilterFeature.WORDS,
+            applies=lambda message: len(message.content) <= self.scanner.inline_chars
+        )
+        self.pipeline.register(
+            'copypasta', self._copypasta_stage, cost=3, feature=FilterFeature.COPYPASTA,
+            applies=lambda message: len(message.content) >= BOT_CONFIG['copypasta_min_length'],
+            edits=False
+        )
+        self.pipeline.register(
+            'deep_scan', self._deep_scan_stage, cost=4, feature=FilterFeature.ATTACHMENTS,
+            applies=self.scanner.needs_scan
+        )
+    
+    @staticmethod
+    def _is_filter_exempt(message):
+        # Moderators (including roles the guild mapped to moderator) skip the filters;
+        # edits of uncached messages can carry a plain User, which is never exempt
+        return isinstance(message.author, discord.Member) and get_permission_level(message.author) >= PermissionLevel.MODERATOR
+    
+    async def _mention_stage(self, context):
+        """Reply to bot mentions; the message still goes through the filters"""
+        if self._mention_reply_allowed(context.message):
+            await self._send_mention_reply(context.message)
+        return False
+    
+    async def _word_filter_stage(self, context):
+        """Delete messages with banned words"""
+        if not context.text.find_any(self.banned_terms):
+            return False
+        
+        await self._remove_filtered_message(context.message)
+        return True
+    
+    async def _deep_scan_stage(self, context):
+        """Delete messages hiding banned words in embeds, attachments or long pastes"""
+        term = await self.scanner.scan(context.message, self.banned_terms)
+        if not term:
+            return False
+        
+        await self._remove_filtered_message(context.message)
+        if term == SCAN_TIMED_OUT:
+            self._log_action(
+                context.message.guild, "FILTER_TIMEOUT", None, context.message.author,
+                f"Removed a message in #{context.message.channel} that took too long to scan"
+            )
+        return True
+    
+    async def _copypasta_stage(self, context):
+        """Remove text that many different accounts are pasting"""
+        message = context.message
+        copies = self.copypasta.add(
+            message.guild.id, message.channel.id, message.id, message.author.id, context.text.leet
+        )
+        if not copies:
+            return False
+        
+        # Bulk delete each channel's copies
+        by_channel = {}
+        for copy in copies:
+            by_channel.setdefault(copy.channel_id, []).append(discord.Object(id=copy.message_id))
+        for channel_id, messages in by_channel.items():
+            channel = message.guild.get_channel(channel_id)
+            if channel is None:
+                continue
+            for chunk in chunked(messages, 100):
                 try:
-                    await warning_msg.delete()
-                except:
-                    pass
-                return
+                    await channel.delete_messages(chunk, reason="Automatic: Copypasta spam")
+                except discord.HTTPException as e:
+                    logger.warning(f"Couldn't remove copypasta in channel {channel_id}: {e}")
+        
+        # Flag the accounts for the moderators
+        author_ids = list(dict.fromkeys(copy.author_id for copy in copies))
+        if len(copies) == 1:
+            self._log_action(message.guild, "COPYPASTA", None, message.author, "Posted text that many accounts are spamming")
+        else:
+            self._log_action(
+                message.guild, "COPYPASTA", None, None,
+                f"Removed {len(copies)} copies of the same text from {len(author_ids)} accounts: " +
+                " ".join(f"<@{author_id}>" for author_id in author_ids)
+            )
+        return True
+    
+    async def _remove_filtered_message(self, message):
+        await message.delete()
         
-        # Basic spam detection
+        embed = discord.Embed(
+            title="🐱 Meow! Message Cleaned Up",
+            description=f"{message.author.mention}, I had to clean up your message because it had some naughty words! Let's keep things cute and friendly! 💕",
+            color=discord.Color.from_rgb(255, 182, 193)
+        )
+        # Cute kitten thumbnail would go here
+        await message.channel.send(embed=embed, delete_after=5)
+    
+    async def _spam_stage(self, context):
+        """Mute members who send messages too quickly"""
+        message = context.message
         user_id = message.author.id
         now = datetime.now()
         
@@ -101,29 +227,140 @@ class ModerationCog(commands.Cog):
         ]
         
         # Check if user exceeded spam threshold
-        if len(self.user_message_history[user_id]) > self.spam_threshold:
-            try:
-                # Delete recent messages
-                async for msg in message.channel.history(limit=self.spam_threshold):
-                    if msg.author.id == user_id:
-                        await msg.delete()
-                
-                embed = discord.Embed(
-                    title="🐱 Slow Down, Speedy!",
-                    description=f"{message.author.mention}, you're typing too fast for this little kitten to keep up! Taking a short break to catch my breath... 😽",
-                    color=discord.Color.from_rgb(255, 182, 193)
-                )
-                # Cute kitten thumbnail would go here
-                await message.channel.send(embed=embed)
-                
-                # Auto-mute for spam
-                await self._mute_user(message.guild, message.author, duration_minutes=5, reason="Automatic: Spam detection")
-                
-            except discord.Forbidden:
-                pass
+        if len(self.user_message_history[user_id]) <= self.spam_threshold:
+            return False
+        
+        try:
+            # Delete recent messages
+            async for msg in message.channel.history(limit=self.spam_threshold):
+                if msg.author.id == user_id:
+                    await msg.delete()
+            
+            embed = discord.Embed(
+                title="🐱 Slow Down, Speedy!",
+                description=f"{message.author.mention}, you're typing too fast for this little kitten to keep up! Taking a short break to catch my breath... 😽",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await message.channel.send(embed=embed)
+            
+            # Auto-mute for spam
+            await self._mute_user(message.guild, message.author, duration_minutes=5, reason="Automatic: Spam detection")
+            
+        except discord.Forbidden:
+            pass
+        return True
+    
+    def _mention_reply_allowed(self, message):
+        """Check the channel and guild cooldown buckets for a bot mention reply"""
+        channel_id = message.channel.id
+        now = time.monotonic()
+        if now >= self.next_mention_prune:
+            self._prune_mention_windows(now)
+        
+        # Hot path during a raid: the channel is already on cooldown
+        window_end = self.mention_windows.get(channel_id, 0.0)
+        if now < window_end:
+            self._suppress_mention(('channel', channel_id), message.channel, window_end - now)
+            return False
+        
+        if message.guild is not None:
+            bucket = self.guild_mention_windows.get(message.guild.id)
+            if bucket is None or now >= bucket[0]:
+                bucket = [now + self.mention_cooldown, 0]
+                self.guild_mention_windows[message.guild.id] = bucket
+            
+            if bucket[1] >= self.mention_guild_replies:
+                self._suppress_mention(('guild', message.guild.id), message.channel, bucket[0] - now)
+                return False
+            bucket[1] += 1
+        
+        self.mention_windows[channel_id] = now + self.mention_cooldown
+        return True
+    
+    def _prune_mention_windows(self, now):
+        """Drop cooldown windows that have already ended"""
+        self.mention_windows = {
+            channel_id: window_end for channel_id, window_end in self.mention_windows.items() if window_end > now
+        }
+        self.guild_mention_windows = {
+            guild_id: bucket for guild_id, bucket in self.guild_mention_windows.items() if bucket[0] > now
+        }
+        self.next_mention_prune = now + self.mention_cooldown
+    
+    def _suppress_mention(self, key, channel, retry_after):
+        """Count a suppressed mention and schedule one summary for the bucket's window"""
+        count = self.suppressed_mentions.get(key)
+        if count is None:
+            self.suppressed_mentions[key] = 1
+            asyncio.create_task(self._send_mention_summary(key, channel, retry_after))
+        else:
+            self.suppressed_mentions[key] = count + 1
+    
+    async def _send_mention_summary(self, key, channel, delay):
+        """Send a single summary of the pings ignored during a cooldown window"""
+        await asyncio.sleep(delay)
+        
+        count = self.suppressed_mentions.pop(key, 0)
+        if not count:
+            return
+        
+        # The summary counts as the bucket's reply for the next window
+        window_end = time.monotonic() + self.mention_cooldown
+        scope, scope_id = key
+        if scope == 'guild':
+            self.guild_mention_windows[scope_id] = [window_end, 1]
+        else:
+            self.mention_windows[scope_id] = window_end
+        
+        embed = discord.Embed(
+            title="🐱 So Many Pings!",
+            description=f"Meow! I got {count} more ping{'s' if count != 1 else ''} while catching my breath! I'm still here and keeping things cozy! 🐾💕",
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        # Cute kitten thumbnail would go here
+        
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException:
+            pass
+    
+    async def _send_mention_reply(self, message):
+        """Reply to someone who mentioned the bot"""
+        prefix = await self.bot.get_prefix(message)
+        if isinstance(prefix, (list, tuple)):
+            prefix = prefix[0]
+        
+        # Create cute ping response
+        embed = discord.Embed(
+            title="🐱 Meow! Someone Called Me!",
+            description=f"Hello there, {message.author.mention}! I'm Kitten Mod, your adorable moderation assistant! 🐾\n\nNeed help? Try `{prefix}help` to see all my cute commands!\n\nI'm here to keep our server safe and cozy! 💕",
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        # Cute kitten thumbnail would go here
+        
+        # Add some random cute responses
+        cute_responses = [
+            "Purr purr! What can I help you with? 🐾",
+            "Meow! Did someone need a fluffy moderator? ✨",
+            "*stretches paws* I'm here to help! 🐱",
+            "Mrow! Ready to keep things purrfect! 💕",
+            "*blinks slowly* Hello friend! Need assistance? 😸"
+        ]
+        
+        embed.add_field(
+            name="💭 Kitten Says:",
+            value=random.choice(cute_responses),
+            inline=False
+        )
+        
+        try:
+            await message.channel.send(embed=embed)
+        except discord.HTTPException:
+            pass
     
     @commands.command(name='kick')
-    @commands.has_permissions(kick_members=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, kick_members=True)
     async def kick_user(self, ctx, member: discord.Member, *, reason="No reason provided"):
         """Kick a user from the server"""
         if member.top_role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
@@ -148,7 +385,7 @@ class ModerationCog(commands.Cog):
             embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
             
             await ctx.send(embed=embed)
-            self._log_action("KICK", ctx.author, member, reason)
+            self._log_action(ctx.guild, "KICK", ctx.author, member, reason)
             
             logger.info(f"{ctx.author} kicked {member} for: {reason}")
             
@@ -162,7 +399,7 @@ class ModerationCog(commands.Cog):
             await ctx.send(embed=embed)
     
     @commands.command(name='ban')
-    @commands.has_permissions(ban_members=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, ban_members=True)
     async def ban_user(self, ctx, member: discord.Member, *, reason="No reason provided"):
         """Ban a user from the server"""
         if member.top_role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
@@ -187,7 +424,7 @@ class ModerationCog(commands.Cog):
             embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
             
             await ctx.send(embed=embed)
-            self._log_action("BAN", ctx.author, member, reason)
+            self._log_action(ctx.guild, "BAN", ctx.author, member, reason)
             
             logger.info(f"{ctx.author} banned {member} for: {reason}")
             
@@ -200,24 +437,78 @@ class ModerationCog(commands.Cog):
             embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
             await ctx.send(embed=embed)
     
+    @commands.command(name='tempban')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, ban_members=True)
+    async def tempban_user(self, ctx, member: discord.Member, duration: str, *, reason="No reason provided"):
+        """Ban a user for a while; they're unbanned automatically, even across restarts"""
+        seconds = parse_duration(duration)
+        if seconds is None:
+            embed = discord.Embed(
+                title="🐱 Confused Kitten",
+                description="Meow! I don't understand that time format. Please use: `10m`, `1h`, `2d` (minutes, hours, days) 🕰️",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+            await ctx.send(embed=embed)
+            return
+        
+        if member.top_role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+            embed = discord.Embed(
+                title="🐱 Oopsie! Can't Do That",
+                description="Meow! I can't help you with someone who has a higher rank than you. Even kittens have rules! 😸",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+            await ctx.send(embed=embed)
+            return
+        
+        try:
+            await member.ban(reason=f"Tempbanned by {ctx.author} for {duration}: {reason}", delete_message_days=1)
+        except discord.Forbidden:
+            embed = discord.Embed(
+                title="🐱 Kitty Can't Help",
+                description="Meow! I don't have the right permissions to help with this. Maybe ask a server admin to give me more powers? 🥺",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+            await ctx.send(embed=embed)
+            return
+        
+        await self.bot.expiries.add('unban', ctx.guild.id, member.id, time.time() + seconds)
+        
+        embed = discord.Embed(
+            title="🐱 Sent to the Naughty Corner (For Now)",
+            description=f"**Kitty had to ban:** {member.mention} ({member.id})\n**For:** {duration}\n**Why:** {reason}\n**Helpful moderator:** {ctx.author.mention}\n\nMeow! They can come back once they've had a good think! ⏰",
+            color=discord.Color.from_rgb(255, 182, 193),
+            timestamp=datetime.now()
+        )
+        embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+        
+        await ctx.send(embed=embed)
+        self._log_action(ctx.guild, "TEMPBAN", ctx.author, member, f"{reason} ({duration})")
+        
+        logger.info(f"{ctx.author} tempbanned {member} for {duration}: {reason}")
+    
     @commands.command(name='unban')
-    @commands.has_permissions(ban_members=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, ban_members=True)
     async def unban_user(self, ctx, user_id: int):
         """Unban a user by their ID"""
         try:
-            user = await self.bot.fetch_user(user_id)
+            # Unbanning only needs the ID, so skip fetching the user
+            user = discord.Object(id=user_id)
             await ctx.guild.unban(user, reason=f"Unbanned by {ctx.author}")
             
             embed = discord.Embed(
                 title="🐱 Welcome Back Home!",
-                description=f"**Kitty welcomed back:** {user.mention} ({user.id})\n**Kind moderator:** {ctx.author.mention}\n\nMeow! Everyone deserves a second chance! 🏠💕",
+                description=f"**Kitty welcomed back:** <@{user.id}> ({user.id})\n**Kind moderator:** {ctx.author.mention}\n\nMeow! Everyone deserves a second chance! 🏠💕",
                 color=discord.Color.from_rgb(144, 238, 144),
                 timestamp=datetime.now()
             )
             embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
             
             await ctx.send(embed=embed)
-            self._log_action("UNBAN", ctx.author, user, "Unbanned")
+            self._log_action(ctx.guild, "UNBAN", ctx.author, user, "Unbanned")
+            await self.bot.expiries.remove('unban', ctx.guild.id, user.id)
             
         except discord.NotFound:
             embed = discord.Embed(
@@ -228,13 +519,182 @@ class ModerationCog(commands.Cog):
             embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
             await ctx.send(embed=embed)
     
+    @commands.command(name='massban')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, ban_members=True)
+    async def mass_ban(self, ctx, *, targets: str = ""):
+        """Ban many users at once by ID (list them, or attach a text file of IDs), then an optional reason"""
+        user_ids, reason = await self._collect_targets(ctx, targets)
+        if user_ids is None:
+            return
+        
+        allowed, skipped = self._filter_targets(ctx, user_ids, require_member=False)
+        audit_reason = f"Mass ban by {ctx.author}: {reason}"
+        
+        ban_one = lambda user_id: ctx.guild.ban(discord.Object(id=user_id), reason=audit_reason)
+        if hasattr(ctx.guild, 'bulk_ban'):
+            # One request per 200 users
+            done, failed = [], []
+            for chunk in chunked(allowed, 200):
+                try:
+                    result = await ctx.guild.bulk_ban([discord.Object(id=user_id) for user_id in chunk], reason=audit_reason)
+                    done.extend(user.id for user in result.banned)
+                    failed.extend(user.id for user in result.failed)
+                except discord.HTTPException as e:
+                    # Bulk ban needs Manage Server too and fails outright when none of the chunk
+                    # could be banned; ban this chunk one by one instead
+                    logger.warning(f"Bulk ban failed in {ctx.guild.name}, banning {len(chunk)} users one by one: {e}")
+                    chunk_done, chunk_failed = await self._run_bounded(chunk, ban_one)
+                    done.extend(chunk_done)
+                    failed.extend(chunk_failed)
+        else:
+            done, failed = await self._run_bounded(allowed, ban_one)
+        
+        for user_id in done:
+            self._log_action(ctx.guild, "BAN", ctx.author, discord.Object(id=user_id), reason)
+        logger.info(f"{ctx.author} mass banned {len(done)} users for: {reason}")
+        
+        await self._send_mass_summary(ctx, "ban", done, skipped, failed, reason)
+    
+    @commands.command(name='masskick')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, kick_members=True)
+    async def mass_kick(self, ctx, *, targets: str = ""):
+        """Kick many members at once by ID (list them, or attach a text file of IDs), then an optional reason"""
+        user_ids, reason = await self._collect_targets(ctx, targets)
+        if user_ids is None:
+            return
+        
+        allowed, skipped = self._filter_targets(ctx, user_ids, require_member=True)
+        audit_reason = f"Mass kick by {ctx.author}: {reason}"
+        done, failed = await self._run_bounded(
+            allowed, lambda user_id: ctx.guild.kick(discord.Object(id=user_id), reason=audit_reason)
+        )
+        
+        for user_id in done:
+            self._log_action(ctx.guild, "KICK", ctx.author, discord.Object(id=user_id), reason)
+        logger.info(f"{ctx.author} mass kicked {len(done)} members for: {reason}")
+        
+        await self._send_mass_summary(ctx, "kick", done, skipped, failed, reason)
+    
+    @commands.command(name='massunban')
+    @has_permissions_or_level(PermissionLevel.MODERATOR, ban_members=True)
+    async def mass_unban(self, ctx, *, targets: str = ""):
+        """Unban many users at once by ID (list them, or attach a text file of IDs), then an optional reason"""
+        user_ids, reason = await self._collect_targets(ctx, targets)
+        if user_ids is None:
+            return
+        
+        audit_reason = f"Mass unban by {ctx.author}: {reason}"
+        done, failed = await self._run_bounded(
+            user_ids, lambda user_id: ctx.guild.unban(discord.Object(id=user_id), reason=audit_reason)
+        )
+        
+        for user_id in done:
+            self._log_action(ctx.guild, "UNBAN", ctx.author, discord.Object(id=user_id), reason)
+            await self.bot.expiries.remove('unban', ctx.guild.id, user_id)
+        logger.info(f"{ctx.author} mass unbanned {len(done)} users")
+        
+        await self._send_mass_summary(ctx, "unban", done, [], failed, reason)
+    
+    async def _collect_targets(self, ctx, text):
+        """Read user IDs from the command and any attached files; the words after the IDs are the reason"""
+        user_ids, reason = parse_user_ids(text)
+        
+        for attachment in ctx.message.attachments:
+            try:
+                data = await attachment.read()
+            except discord.HTTPException:
+                continue
+            file_ids, _ = parse_user_ids(data.decode('utf-8', errors='ignore'), stop_at_text=False)
+            user_ids.extend(file_ids)
+        
+        user_ids = list(dict.fromkeys(user_ids))  # Drop duplicates, keep order
+        max_targets = BOT_CONFIG['mass_action_max']
+        
+        if not user_ids or len(user_ids) > max_targets:
+            embed = discord.Embed(
+                title="🐱 Kitty Needs a List",
+                description=f"Meow! Give me between 1 and {max_targets} user IDs (or mentions), or attach a text file with them, then an optional reason! 📋",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+            await ctx.send(embed=embed)
+            return None, None
+        
+        return user_ids, reason or "No reason provided"
+    
+    def _filter_targets(self, ctx, user_ids, require_member):
+        """Split targets into allowed and skipped in one pass over the role hierarchy"""
+        guild = ctx.guild
+        is_owner = ctx.author == guild.owner
+        author_top = top_role_position(ctx.author)
+        bot_top = top_role_position(guild.me)
+        protected = {ctx.author.id, guild.me.id, guild.owner_id}
+        
+        allowed, skipped = [], []
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            if user_id in protected:
+                skipped.append(user_id)
+            elif member is None:
+                # Users who already left can still be banned, but not kicked
+                (skipped if require_member else allowed).append(user_id)
+            elif top_role_position(member) >= bot_top or (top_role_position(member) >= author_top and not is_owner):
+                skipped.append(user_id)
+            else:
+                allowed.append(user_id)
+        
+        return allowed, skipped
+    
+    async def _run_bounded(self, user_ids, action):
+        """Run action(user_id) for every user with limited concurrency; returns (done, failed)"""
+        semaphore = asyncio.Semaphore(BOT_CONFIG['mass_action_concurrency'])
+        
+        async def run(user_id):
+            async with semaphore:
+                try:
+                    await action(user_id)
+                    return True
+                except discord.HTTPException:
+                    return False
+        
+        results = await asyncio.gather(*(run(user_id) for user_id in user_ids))
+        done = [user_id for user_id, ok in zip(user_ids, results) if ok]
+        failed = [user_id for user_id, ok in zip(user_ids, results) if not ok]
+        return done, failed
+    
+    async def _send_mass_summary(self, ctx, action, done, skipped, failed, reason):
+        """Report a mass action in one embed"""
+        titles = {
+            'ban': ("🐱 Naughty Corner Cleanup", "Banned"),
+            'kick': ("🐾 Group Escort Out", "Kicked"),
+            'unban': ("🐱 Welcome Back, Everyone!", "Unbanned")
+        }
+        title, done_label = titles[action]
+        
+        embed = discord.Embed(
+            title=title,
+            description=f"**Why:** {reason}\n**Helpful moderator:** {ctx.author.mention}\n\nMeow! That was a lot of paperwork for a little kitten! 📋",
+            color=discord.Color.from_rgb(144, 238, 144) if not failed else discord.Color.from_rgb(255, 182, 193),
+            timestamp=datetime.now()
+        )
+        embed.add_field(name=f"✅ {done_label}", value=str(len(done)), inline=True)
+        if skipped:
+            embed.add_field(name="🛡️ Skipped (rank, self or not here)", value=str(len(skipped)), inline=True)
+        if failed:
+            preview = ", ".join(str(user_id) for user_id in failed[:10])
+            more = f" and {len(failed) - 10} more" if len(failed) > 10 else ""
+            embed.add_field(name="😿 Failed", value=f"{len(failed)}: {preview}{more}", inline=False)
+        embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+        
+        await ctx.send(embed=embed)
+    
     @commands.command(name='mute')
-    @commands.has_permissions(manage_roles=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_roles=True)
     async def mute_user(self, ctx, member: discord.Member, duration: str = "10m", *, reason="No reason provided"):
         """Mute a user for a specified duration"""
         # Parse duration
-        duration_match = re.match(r'^(\d+)([smhd])$', duration.lower())
-        if not duration_match:
+        seconds = parse_duration(duration)
+        if seconds is None:
             embed = discord.Embed(
                 title="🐱 Confused Kitten",
                 description="Meow! I don't understand that time format. Please use: `10m`, `1h`, `2d` (minutes, hours, days) 🕰️",
@@ -244,18 +704,8 @@ class ModerationCog(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        amount, unit = int(duration_match.group(1)), duration_match.group(2)
-        
         # Convert to minutes
-        duration_minutes = amount
-        if unit == 's':
-            duration_minutes = amount / 60
-        elif unit == 'm':
-            duration_minutes = amount
-        elif unit == 'h':
-            duration_minutes = amount * 60
-        elif unit == 'd':
-            duration_minutes = amount * 60 * 24
+        duration_minutes = seconds / 60
         
         await self._mute_user(ctx.guild, member, duration_minutes, reason, ctx.author)
         
@@ -286,36 +736,64 @@ class ModerationCog(commands.Cog):
         
         await member.add_roles(muted_role, reason=reason)
         
-        # Store mute info
-        self.muted_users[member.id] = {
-            'guild_id': guild.id,
-            'unmute_time': datetime.now() + timedelta(minutes=duration_minutes),
+        # Store mute info and its durable expiry
+        unmute_at = time.time() + duration_minutes * 60
+        self.muted_users[(guild.id, member.id)] = {
+            'unmute_time': datetime.fromtimestamp(unmute_at),
             'role': muted_role.id
         }
-        
-        # Schedule unmute
-        asyncio.create_task(self._schedule_unmute(member, duration_minutes))
+        await self.bot.expiries.add('unmute', guild.id, member.id, unmute_at, {'role_id': muted_role.id})
         
         if moderator:
-            self._log_action("MUTE", moderator, member, f"{reason} ({duration_minutes}m)")
-    
-    async def _schedule_unmute(self, member, duration_minutes):
-        """Schedule automatic unmute"""
-        await asyncio.sleep(duration_minutes * 60)  # Convert to seconds
-        
-        if member.id in self.muted_users:
-            guild = self.bot.get_guild(self.muted_users[member.id]['guild_id'])
-            if guild:
-                member = guild.get_member(member.id)
-                if member:
-                    muted_role = guild.get_role(self.muted_users[member.id]['role'])
-                    if muted_role and muted_role in member.roles:
-                        await member.remove_roles(muted_role, reason="Mute duration expired")
-            
-            del self.muted_users[member.id]
+            self._log_action(guild, "MUTE", moderator, member, f"{reason} ({duration_minutes}m)")
+    
+    async def _retry_expiry(self, kind, guild_id, user_id, data, error):
+        """Schedule another go at an expiry that failed, backing off each time"""
+        attempt = data.get('attempt', 0) + 1
+        if attempt > EXPIRY_MAX_ATTEMPTS:
+            logger.error(f"Giving up on {kind} for {user_id} in guild {guild_id} after {attempt - 1} tries: {error}")
+            return
+        
+        delay = min(EXPIRY_RETRY_SECONDS * 2 ** (attempt - 1), EXPIRY_RETRY_MAX_SECONDS)
+        logger.warning(f"Couldn't {kind} {user_id} in guild {guild_id} ({error}), retrying in {delay}s")
+        await self.bot.expiries.add(kind, guild_id, user_id, time.time() + delay, {**data, 'attempt': attempt})
+    
+    async def _expire_mute(self, guild_id, user_id, data):
+        """Unmute someone whose mute ran out (also runs at startup for mutes that expired while offline)"""
+        guild = self.bot.get_guild(guild_id)
+        if not guild or guild.unavailable:
+            await self._retry_expiry('unmute', guild_id, user_id, data, "server unavailable")
+            return
+        
+        member = guild.get_member(user_id)
+        muted_role = guild.get_role(data.get('role_id'))
+        if member and muted_role and muted_role in member.roles:
+            try:
+                await member.remove_roles(muted_role, reason="Mute duration expired")
+            except discord.NotFound:
+                pass  # Left, or the role is gone
+            except discord.HTTPException as e:
+                await self._retry_expiry('unmute', guild_id, user_id, data, e)
+                return
+        self.muted_users.pop((guild_id, user_id), None)
+    
+    async def _expire_tempban(self, guild_id, user_id, data):
+        """Lift a temporary ban once it runs out"""
+        guild = self.bot.get_guild(guild_id)
+        if not guild or guild.unavailable:
+            await self._retry_expiry('unban', guild_id, user_id, data, "server unavailable")
+            return
+        
+        try:
+            await guild.unban(discord.Object(id=user_id), reason="Tempban expired")
+            self._log_action(guild, "UNBAN", None, discord.Object(id=user_id), "Tempban expired")
+        except discord.NotFound:
+            pass  # Already unbanned
+        except discord.HTTPException as e:
+            await self._retry_expiry('unban', guild_id, user_id, data, e)
     
     @commands.command(name='unmute')
-    @commands.has_permissions(manage_roles=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_roles=True)
     async def unmute_user(self, ctx, member: discord.Member):
         """Unmute a user"""
         muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
@@ -332,8 +810,8 @@ class ModerationCog(commands.Cog):
         await member.remove_roles(muted_role, reason=f"Unmuted by {ctx.author}")
         
         # Remove from muted users tracking
-        if member.id in self.muted_users:
-            del self.muted_users[member.id]
+        self.muted_users.pop((ctx.guild.id, member.id), None)
+        await self.bot.expiries.remove('unmute', ctx.guild.id, member.id)
         
         embed = discord.Embed(
             title="🐱 Welcome Back to Chatting!",
@@ -344,10 +822,10 @@ class ModerationCog(commands.Cog):
         embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
         
         await ctx.send(embed=embed)
-        self._log_action("UNMUTE", ctx.author, member, "Manual unmute")
+        self._log_action(ctx.guild, "UNMUTE", ctx.author, member, "Manual unmute")
     
     @commands.command(name='warn')
-    @commands.has_permissions(manage_messages=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_messages=True)
     async def warn_user(self, ctx, member: discord.Member, *, reason):
         """Warn a user"""
         guild_id = ctx.guild.id
@@ -360,14 +838,17 @@ class ModerationCog(commands.Cog):
             self.warnings[guild_id][user_id] = []
         
         # Add warning
+        now = time.time()
         warning = {
             'reason': reason,
             'moderator': ctx.author.id,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': datetime.fromtimestamp(now).isoformat(),
+            'time': now,
             'id': len(self.warnings[guild_id][user_id]) + 1
         }
         
         self.warnings[guild_id][user_id].append(warning)
+        self.warning_timelines.setdefault((guild_id, user_id), WarningTimeline()).add(now)
         
         embed = discord.Embed(
             title="🐱 Gentle Reminder from Kitten",
@@ -378,7 +859,7 @@ class ModerationCog(commands.Cog):
         embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
         
         await ctx.send(embed=embed)
-        self._log_action("WARN", ctx.author, member, reason)
+        self._log_action(ctx.guild, "WARN", ctx.author, member, reason)
         
         # Check if auto-moderation should trigger
         await self._check_automod(ctx.guild, member)
@@ -396,7 +877,7 @@ class ModerationCog(commands.Cog):
             pass  # User has DMs disabled
     
     @commands.command(name='warnings')
-    @commands.has_permissions(manage_messages=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_messages=True)
     async def view_warnings(self, ctx, member: discord.Member):
         """View warnings for a user"""
         guild_id = ctx.guild.id
@@ -431,41 +912,133 @@ class ModerationCog(commands.Cog):
                 inline=False
             )
         
-        embed.set_footer(text=f"💕 Total reminders: {len(user_warnings)} | Every mistake is a chance to grow!")
+        config = self.configs.peek(guild_id)
+        if config and config.warning_expiry:
+            timeline = self.warning_timelines.get((guild_id, user_id))
+            active = timeline.count_since(time.time() - config.warning_expiry) if timeline else 0
+            embed.set_footer(text=f"💕 Total reminders: {len(user_warnings)} ({active} still count) | Every mistake is a chance to grow!")
+        else:
+            embed.set_footer(text=f"💕 Total reminders: {len(user_warnings)} | Every mistake is a chance to grow!")
         await ctx.send(embed=embed)
     
     @commands.command(name='clear')
-    @commands.has_permissions(manage_messages=True)
-    async def clear_messages(self, ctx, amount: int):
-        """Clear a specified number of messages"""
-        if amount < 1 or amount > 100:
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_messages=True)
+    async def clear_messages(self, ctx, amount: int, *, filters: str = ""):
+        """Clear messages, optionally filtered (e.g., !clear 500 @user, !clear 200 bots, !clear 1000 contains free nitro)"""
+        max_messages = BOT_CONFIG['clear_max_messages']
+        if amount < 1 or amount > max_messages:
             embed = discord.Embed(
                 title="🐱 Kitty Needs a Valid Number",
-                description="Meow! Please give me a number between 1 and 100 so I know how many messages to clean up! 🧹",
+                description=f"Meow! Please give me a number between 1 and {max_messages} so I know how many messages to clean up! 🧹",
                 color=discord.Color.from_rgb(255, 182, 193)
             )
             embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
             await ctx.send(embed=embed)
             return
         
-        deleted = await ctx.channel.purge(limit=amount + 1)  # +1 for the command message
+        try:
+            purge_filter = parse_purge_filter(filters)
+        except ValueError as e:
+            embed = discord.Embed(
+                title="🐱 Confused Kitten",
+                description=f"Meow! {e}! Filters I know: `@user`, `bots`, `attachments`, `links`, `contains <text>`, `regex <pattern>` 🧹",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+            await ctx.send(embed=embed)
+            return
+        
+        try:
+            await ctx.message.delete()
+        except discord.HTTPException:
+            pass
+        
+        status = await ctx.send(embed=self._clear_status_embed(0, amount, purge_filter))
+        
+        try:
+            deleted = await self._purge(ctx.channel, amount, purge_filter, status)
+        except discord.Forbidden:
+            embed = discord.Embed(
+                title="🐱 Kitty Can't Help",
+                description="Meow! I don't have the right permissions to help with this. Maybe ask a server admin to give me more powers? 🥺",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+            await status.edit(embed=embed)
+            return
         
         embed = discord.Embed(
             title="🧹 Kitty Cleaned Up!",
-            description=f"Meow! I tidied up {len(deleted) - 1} messages for you! The chat looks much cleaner now! 🐾✨",
+            description=f"Meow! I tidied up {deleted} messages {purge_filter.describe()} for you! The chat looks much cleaner now! 🐾✨",
             color=discord.Color.from_rgb(144, 238, 144)
         )
         embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
         
         # Delete this message after 5 seconds
-        msg = await ctx.send(embed=embed)
-        await asyncio.sleep(5)
         try:
-            await msg.delete()
-        except:
+            await status.edit(embed=embed)
+            await status.delete(delay=5)
+        except discord.HTTPException:
             pass
         
-        self._log_action("CLEAR", ctx.author, None, f"Cleared {len(deleted) - 1} messages in {ctx.channel.name}")
+        self._log_action(ctx.guild, "CLEAR", ctx.author, None, f"Cleared {deleted} messages {purge_filter.describe()} in {ctx.channel.name}")
+    
+    async def _purge(self, channel, amount, purge_filter, status):
+        """Stream channel history and delete matching messages, 100 at a time where Discord allows it"""
+        bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE + timedelta(minutes=1)
+        chunk = []
+        deleted = 0
+        last_update = time.monotonic()
+        
+        async for message in channel.history(limit=BOT_CONFIG['clear_scan_limit'], before=status):
+            if deleted + len(chunk) >= amount:
+                break
+            if purge_filter.pattern is not None:
+                # A regex can take a few milliseconds on a long message; let other events in between
+                await asyncio.sleep(0)
+            if not purge_filter.matches(message):
+                continue
+            
+            if message.created_at > bulk_cutoff:
+                chunk.append(message)
+                if len(chunk) == 100:
+                    await channel.delete_messages(chunk)
+                    deleted += len(chunk)
+                    chunk = []
+            else:
+                # Too old for bulk delete: history is newest first, so flush what's left and go one by one
+                if chunk:
+                    await channel.delete_messages(chunk)
+                    deleted += len(chunk)
+                    chunk = []
+                try:
+                    await message.delete()
+                    deleted += 1
+                except discord.NotFound:
+                    pass
+            
+            # Edit progress into the status message at most every few seconds
+            if time.monotonic() - last_update >= CLEAR_PROGRESS_INTERVAL:
+                last_update = time.monotonic()
+                try:
+                    await status.edit(embed=self._clear_status_embed(deleted, amount, purge_filter))
+                except discord.HTTPException:
+                    pass
+        
+        if chunk:
+            await channel.delete_messages(chunk)
+            deleted += len(chunk)
+        
+        return deleted
+    
+    def _clear_status_embed(self, deleted, amount, purge_filter):
+        embed = discord.Embed(
+            title="🧹 Kitty Is Cleaning...",
+            description=f"Meow! Tidying up messages {purge_filter.describe()}... {deleted}/{amount} so far! 🐾",
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        embed.set_thumbnail(url="attachment://IMG_0229_1756759800418.jpeg")
+        return embed
     
     @commands.command(name='userinfo')
     async def user_info(self, ctx, member: Optional[discord.Member] = None):
@@ -501,7 +1074,7 @@ class ModerationCog(commands.Cog):
         await ctx.send(embed=embed)
     
     @commands.command(name='removewarn')
-    @commands.has_permissions(manage_messages=True)
+    @has_permissions_or_level(PermissionLevel.MODERATOR, manage_messages=True)
     async def remove_warning(self, ctx, member: discord.Member, warning_id: int):
         """Remove a specific warning from a user"""
         guild_id = ctx.guild.id
@@ -538,9 +1111,14 @@ class ModerationCog(commands.Cog):
             await ctx.send(embed=embed)
             return
         
+        timeline = self.warning_timelines.get((guild_id, user_id))
+        if timeline:
+            timeline.remove(removed_warning['time'])
+        
         # Clean up empty warning list
         if not user_warnings:
             del self.warnings[guild_id][user_id]
+            self.warning_timelines.pop((guild_id, user_id), None)
         
         embed = discord.Embed(
             title="🐱 Reminder Removed!",
@@ -551,26 +1129,187 @@ class ModerationCog(commands.Cog):
         # Cute kitten thumbnail would go here
         
         await ctx.send(embed=embed)
-        self._log_action("REMOVE_WARN", ctx.author, member, f"Removed warning #{warning_id}: {removed_warning['reason']}")
+        self._log_action(ctx.guild, "REMOVE_WARN", ctx.author, member, f"Removed warning #{warning_id}: {removed_warning['reason']}")
     
-    @commands.command(name='automod')
-    @commands.has_permissions(administrator=True)
-    async def setup_automod(self, ctx, warnings_threshold: int, action: str):
-        """Set up automatic actions when users reach warning thresholds"""
+    @commands.command(name='modlog', extras={'permission_level': PermissionLevel.ADMIN})
+    @has_permissions_or_level(PermissionLevel.ADMIN, administrator=True)
+    async def setup_modlog(self, ctx, action: str = 'status', channel: Optional[discord.TextChannel] = None):
+        """Choose where moderation actions are logged (set #channel, disable, status)"""
+        config = self.configs.get(ctx.guild.id)
+        action = action.lower()
+        
+        if action == 'set':
+            channel = channel or ctx.channel
+            config.modlog_channel_id = channel.id
+            self.configs.mark_dirty(ctx.guild.id)
+            self.bot.mod_log.forget(ctx.guild.id)
+            embed = discord.Embed(
+                title="🐱 Mod Log Set!",
+                description=f"Meow! I'll write down every moderation action in {channel.mention}! 📋✨",
+                color=discord.Color.from_rgb(144, 238, 144)
+            )
+        elif action == 'disable':
+            config.modlog_channel_id = None
+            self.configs.mark_dirty(ctx.guild.id)
+            self.bot.mod_log.forget(ctx.guild.id)
+            embed = discord.Embed(
+                title="🐱 Mod Log Reset",
+                description="Meow! I'll go back to looking for a channel with mod, staff or admin in its name! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+        elif action == 'status':
+            channel = self.bot.mod_log.channel_for(ctx.guild)
+            if channel is None:
+                description = "Meow! I don't have a mod-log channel yet! Set one with `!modlog set #channel` 🐾"
+            elif config.modlog_channel_id == channel.id:
+                description = f"Meow! Moderation actions are logged in {channel.mention}! 📋"
+            else:
+                description = f"Meow! I found {channel.mention} and I'm logging there! Use `!modlog set #channel` to pick another! 📋"
+            embed = discord.Embed(
+                title="🐱 Mod Log Status",
+                description=description,
+                color=discord.Color.from_rgb(255, 192, 203)
+            )
+        else:
+            embed = discord.Embed(
+                title="🐱 Invalid Action",
+                description="Meow! Use: `set #channel`, `disable`, or `status` 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+        
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    @commands.command(name='filter', extras={'permission_level': PermissionLevel.ADMIN})
+    @has_permissions_or_level(PermissionLevel.ADMIN, administrator=True)
+    async def setup_filter(self, ctx, action: str = 'status', feature: str = None):
+        """Turn message filters on or off (enable/disable words|spam|attachments|copypasta, status)"""
+        config = self.configs.get(ctx.guild.id)
+        action = action.lower()
+        features = ALL_FEATURES & ~config.filter_disabled
+        
+        if action in ('enable', 'disable'):
+            bit = FEATURE_NAMES.get((feature or '').lower())
+            if bit is None:
+                embed = discord.Embed(
+                    title="🐱 Unknown Filter",
+                    description=f"Meow! I know these filters: {', '.join(f'`{name}`' for name in FEATURE_NAMES)} 🐾",
+                    color=discord.Color.from_rgb(255, 182, 193)
+                )
+                # Cute kitten thumbnail would go here
+                await ctx.send(embed=embed)
+                return
+            
+            if action == 'enable':
+                config.filter_disabled &= ~bit
+            else:
+                config.filter_disabled |= bit
+            self.configs.mark_dirty(ctx.guild.id)
+            embed = discord.Embed(
+                title="🐱 Filter Updated!",
+                description=f"Meow! The `{feature.lower()}` filter is now {'on' if action == 'enable' else 'off'}! 🐾",
+                color=discord.Color.from_rgb(144, 238, 144)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            self._log_action(ctx.guild, "FILTER_SET", ctx.author, None, f"{action.title()}d {feature.lower()} filter")
+            return
+        
+        if action != 'status':
+            embed = discord.Embed(
+                title="🐱 Invalid Action",
+                description="Meow! Use: `enable <filter>`, `disable <filter>`, or `status` 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
+        
+        embed = discord.Embed(
+            title="🐱 Message Filters",
+            description="\n".join(
+                f"{'✅' if features & bit else '❌'} `{name}`" for name, bit in FEATURE_NAMES.items()
+            ),
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        timings = "\n".join(
+            f"`{name}`: {stats['calls']} runs, avg {stats['avg_ms']} ms, max {stats['max_ms']} ms"
+            for name, stats in self.pipeline.stats().items() if stats['calls']
+        )
+        if timings:
+            embed.add_field(name="⏱️ Stage timings (all servers):", value=timings, inline=False)
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    @commands.command(name='automod', extras={'permission_level': PermissionLevel.ADMIN})
+    @has_permissions_or_level(PermissionLevel.ADMIN, administrator=True)
+    async def setup_automod(self, ctx, warnings_threshold: str = 'list', action: str = None, window: str = None):
+        """Set automatic actions for warning counts (!automod 3 mute 7d, !automod remove 3, !automod expire 30d, !automod list)"""
         guild_id = ctx.guild.id
+        config = self.configs.get(guild_id)
+        option = warnings_threshold.lower()
+        
+        if option == 'list':
+            await ctx.send(embed=self._automod_rules_embed(config))
+            return
+        
+        if option == 'expire':
+            expiry = None if (action or 'off').lower() == 'off' else parse_duration(action)
+            if action and action.lower() != 'off' and expiry is None:
+                embed = discord.Embed(
+                    title="🐱 Confused Kitten",
+                    description="Meow! Tell me how long warnings should count for, like `!automod expire 30d`, or `off` to keep them forever! 🐾",
+                    color=discord.Color.from_rgb(255, 182, 193)
+                )
+                # Cute kitten thumbnail would go here
+                await ctx.send(embed=embed)
+                return
+            
+            config.warning_expiry = expiry
+            self._update_automod(config)
+            
+            embed = discord.Embed(
+                title="🐱 Warning Expiry Set!",
+                description=f"Meow! Reminders now stop counting after {format_duration(expiry)}! 🐾⏰" if expiry else "Meow! Reminders count forever again! 🐾",
+                color=discord.Color.from_rgb(144, 238, 144)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            self._log_action(ctx.guild, "AUTOMOD_SET", ctx.author, None, f"Warning expiry -> {format_duration(expiry) if expiry else 'never'}")
+            return
+        
+        if option == 'remove':
+            threshold = int(action) if action and action.isdigit() else None
+            if threshold not in config.automod:
+                embed = discord.Embed(
+                    title="🐱 No Such Rule",
+                    description="Meow! I don't have a rule for that many reminders! Check `!automod list` 🐾",
+                    color=discord.Color.from_rgb(255, 182, 193)
+                )
+                # Cute kitten thumbnail would go here
+                await ctx.send(embed=embed)
+                return
+            
+            del config.automod[threshold]
+            config.automod_windows.pop(threshold, None)
+            self._update_automod(config)
+            await ctx.send(embed=self._automod_rules_embed(config))
+            self._log_action(ctx.guild, "AUTOMOD_SET", ctx.author, None, f"Removed {threshold} warnings rule")
+            return
         
         valid_actions = ['kick', 'ban', 'mute']
-        if action.lower() not in valid_actions:
+        if not option.isdigit() or action is None or action.lower() not in valid_actions:
             embed = discord.Embed(
                 title="🐱 Confused Kitten",
-                description=f"Meow! I don't understand that action. Please use one of these: `kick`, `ban`, or `mute` 🐾",
+                description=f"Meow! I don't understand that action. Please use one of these: `kick`, `ban`, or `mute`, like `!automod 3 mute 7d` 🐾",
                 color=discord.Color.from_rgb(255, 182, 193)
             )
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
             return
         
-        if warnings_threshold < 1 or warnings_threshold > 20:
+        threshold = int(option)
+        if threshold < 1 or threshold > 20:
             embed = discord.Embed(
                 title="🐱 That's Too Many or Too Few!",
                 description="Meow! Please choose a number between 1 and 20 warnings for the threshold! 🐾",
@@ -580,99 +1319,138 @@ class ModerationCog(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        # Store automod settings
-        if guild_id not in self.automod_settings:
-            self.automod_settings[guild_id] = {}
+        window_seconds = parse_duration(window) if window else None
+        if window and window_seconds is None:
+            embed = discord.Embed(
+                title="🐱 Invalid Time Format",
+                description="Meow! Use formats like: `12h`, `7d` for how close together the reminders must be 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
         
-        self.automod_settings[guild_id][warnings_threshold] = action.lower()
+        # Store automod settings
+        config.automod[threshold] = action.lower()
+        if window_seconds:
+            config.automod_windows[threshold] = window_seconds
+        else:
+            config.automod_windows.pop(threshold, None)
+        self._update_automod(config)
         
         action_descriptions = {
             'kick': 'gently escort them out 🚪',
             'ban': 'send them to the timeout corner 🏠',
             'mute': 'give them quiet time 🤫'
         }
+        within = f" within {format_duration(window_seconds)}" if window_seconds else ""
         
         embed = discord.Embed(
             title="🐱 Automod Set Up!",
-            description=f"**Threshold:** {warnings_threshold} reminders\n**Action:** {action_descriptions[action.lower()]}\n**Set by:** {ctx.author.mention}\n\nMeow! Now I'll automatically help when someone gets too many reminders! 🐾⚡",
+            description=f"**Threshold:** {threshold} reminders{within}\n**Action:** {action_descriptions[action.lower()]}\n**Set by:** {ctx.author.mention}\n\nMeow! Now I'll automatically help when someone gets too many reminders! 🐾⚡",
             color=discord.Color.from_rgb(144, 238, 144),
             timestamp=datetime.now()
         )
         # Cute kitten thumbnail would go here
         
         await ctx.send(embed=embed)
-        self._log_action("AUTOMOD_SET", ctx.author, None, f"Set {warnings_threshold} warnings -> {action}")
+        self._log_action(ctx.guild, "AUTOMOD_SET", ctx.author, None, f"Set {threshold} warnings{within} -> {action}")
+    
+    def _update_automod(self, config):
+        """Save automod changes and drop the compiled ladder"""
+        self.configs.mark_dirty(config.guild_id)
+        self.automod_ladders.pop(config.guild_id, None)
+    
+    def _automod_rules_embed(self, config):
+        lines = [
+            f"**{threshold}** reminders{f' within {format_duration(window)}' if window else ''} → {action}"
+            for threshold, window, action in self._get_automod_ladder(config).rules
+        ]
+        embed = discord.Embed(
+            title="🐱 Automod Rules",
+            description="\n".join(lines) if lines else "Meow! No automod rules yet! Try `!automod 3 mute 7d` 🐾",
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        if config.warning_expiry:
+            embed.set_footer(text=f"Reminders stop counting after {format_duration(config.warning_expiry)}")
+        # Cute kitten thumbnail would go here
+        return embed
+    
+    def _get_automod_ladder(self, config):
+        """The guild's automod rules, compiled once per change"""
+        ladder = self.automod_ladders.get(config.guild_id)
+        if ladder is None:
+            ladder = AutomodLadder(config.automod, config.automod_windows, config.warning_expiry)
+            self.automod_ladders[config.guild_id] = ladder
+        return ladder
     
     async def _check_automod(self, guild, member):
         """Check if automod actions should be triggered"""
-        guild_id = guild.id
-        user_id = member.id
-        
-        if guild_id not in self.automod_settings or not self.automod_settings[guild_id]:
+        config = self.configs.peek(guild.id)
+        if config is None or not config.automod:
             return
         
-        if guild_id not in self.warnings or user_id not in self.warnings[guild_id]:
+        timeline = self.warning_timelines.get((guild.id, member.id))
+        if not timeline:
             return
         
-        warning_count = len(self.warnings[guild_id][user_id])
-        
-        # Check if any threshold is met (check highest threshold first)
-        for threshold in sorted(self.automod_settings[guild_id].keys(), reverse=True):
-            if warning_count >= threshold:
-                action = self.automod_settings[guild_id][threshold]
-                await self._execute_automod_action(guild, member, action, threshold)
-                break
+        # Strictest rule first; each counts only the warnings inside its window
+        rule = self._get_automod_ladder(config).match(timeline, time.time())
+        if rule:
+            threshold, window, action = rule
+            await self._execute_automod_action(guild, member, action, threshold, window)
     
-    async def _execute_automod_action(self, guild, member, action, threshold):
+    async def _execute_automod_action(self, guild, member, action, threshold, window=None):
         """Execute the automod action"""
+        reached = f"{threshold} warnings within {format_duration(window)}" if window else f"{threshold} warnings"
+        
         try:
             if action == 'kick':
-                await member.kick(reason=f"Automatic: Reached {threshold} warnings")
+                await member.kick(reason=f"Automatic: Reached {reached}")
                 action_text = "gently escorted out"
                 emoji = "🚪"
             elif action == 'ban':
-                await member.ban(reason=f"Automatic: Reached {threshold} warnings", delete_message_days=1)
+                await member.ban(reason=f"Automatic: Reached {reached}", delete_message_days=1)
                 action_text = "sent to the timeout corner"
                 emoji = "🏠"
             elif action == 'mute':
-                await self._mute_user(guild, member, 60, f"Automatic: Reached {threshold} warnings")
+                await self._mute_user(guild, member, 60, f"Automatic: Reached {reached}")
                 action_text = "given quiet time"
                 emoji = "🤫"
             else:
                 return  # Unknown action
             
-            # Find a general channel to announce
-            channel = guild.system_channel or (guild.text_channels[0] if guild.text_channels else None)
-            if channel:
-                embed = discord.Embed(
-                    title=f"🐱 Automod Action Taken {emoji}",
-                    description=f"**Member:** {member.mention}\n**Action:** {action_text.title()}\n**Reason:** Reached {threshold} reminders\n\nMeow! Sometimes I need to take automatic action to keep everyone safe! 🐾⚡",
-                    color=discord.Color.from_rgb(255, 182, 193),
-                    timestamp=datetime.now()
-                )
-                # Cute kitten thumbnail would go here
-                await channel.send(embed=embed)
+            embed = discord.Embed(
+                title=f"🐱 Automod Action Taken {emoji}",
+                description=f"**Member:** {member.mention}\n**Action:** {action_text.title()}\n**Reason:** Reached {reached.replace('warnings', 'reminders')}\n\nMeow! Sometimes I need to take automatic action to keep everyone safe! 🐾⚡",
+                color=discord.Color.from_rgb(255, 182, 193),
+                timestamp=datetime.now()
+            )
+            # Cute kitten thumbnail would go here
             
-            self._log_action(f"AUTO_{action.upper()}", None, member, f"Automatic {action} for {threshold} warnings")
+            # Announce in the mod log, or a general channel if the guild has none
+            if not self.bot.mod_log.log(guild, embed):
+                channel = guild.system_channel or (guild.text_channels[0] if guild.text_channels else None)
+                if channel:
+                    await channel.send(embed=embed)
+            
+            log_moderation_action(f"AUTO_{action.upper()}", None, member.id, f"Automatic {action} for {reached}", guild.id)
             
         except discord.Forbidden:
             pass  # Bot doesn't have permissions
     
-    def _log_action(self, action, moderator, target, reason):
-        """Log moderation actions"""
-        log_entry = {
-            'action': action,
-            'moderator': moderator.id if moderator else None,
-            'target': target.id if target else None,
-            'reason': reason,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        self.mod_logs.append(log_entry)
+    def _log_action(self, guild, action, moderator, target, reason):
+        """Log moderation actions to the console and the guild's mod-log channel"""
+        log_moderation_action(
+            action,
+            moderator.id if moderator else None,
+            target.id if target else None,
+            reason,
+            guild.id if guild else None
+        )
         
-        # Keep only last 1000 logs to prevent memory issues
-        if len(self.mod_logs) > 1000:
-            self.mod_logs = self.mod_logs[-1000:]
+        if guild:
+            self.bot.mod_log.log_action(guild, action, moderator, target, reason)
 
 async def setup(bot):
     await bot.add_cog(ModerationCog(bot))
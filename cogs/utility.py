@@ -2,17 +2,70 @@ import discord
 from discord.ext import commands
 import random
 import asyncio
-from datetime import datetime, timedelta
-import re
+import json
+import time
+from datetime import datetime, timezone
 from typing import Optional
+from utils.durations import format_duration, parse_duration
+from utils.logging import get_logger
+from utils.scheduler import HeapScheduler
+
+logger = get_logger(__name__)
+
+REMINDER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    guild_id INTEGER,
+    message TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    interval REAL
+);
+"""
+
+REMINDER_FIELDS = ('id', 'user_id', 'channel_id', 'guild_id', 'message', 'due_at', 'interval')
+
+POLL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS polls (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    ends_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS poll_votes (
+    message_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    option INTEGER NOT NULL,
+    PRIMARY KEY (message_id, user_id)
+);
+"""
+
+YES_NO_OPTIONS = ('Yes', 'No')
+YES_NO_EMOJIS = ('👍', '👎')
+NUMBER_EMOJIS = ('1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟')
+
+DEFAULT_POLL_SECONDS = 60
+MIN_POLL_SECONDS = 10
+MAX_POLL_SECONDS = 604800  # 7 days
+
+MAX_REMINDERS_PER_USER = 25
+MIN_REPEAT_SECONDS = 600  # Repeating reminders fire at most every 10 minutes
+LATE_DELIVERY_SECONDS = 60  # Reminders delivered later than this mention the delay
 
 class UtilityCog(commands.Cog):
     """Utility commands for Kitten Mod"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.reminders = {}  # Store active reminders
-        self.polls = {}  # Store active polls
+        self.db = bot.database
+        self.reminders = {}  # Pending reminders by ID (mirrors the reminders table)
+        self.user_reminders = {}  # user_id -> reminder IDs
+        self.reminder_scheduler = HeapScheduler(self._deliver_reminder, 'reminders')
+        self.polls = {}  # Open polls by message ID (mirrors the polls table)
+        self.poll_scheduler = HeapScheduler(self._show_poll_results, 'polls')
         
         # 8ball responses
         self.eightball_responses = [
@@ -52,13 +105,96 @@ class UtilityCog(commands.Cog):
             "You're absolutely fantastic, no kitten around! 🎉"
         ]
     
+    async def cog_load(self):
+        """Load pending reminders and start the scheduler once the bot is ready"""
+        await self.db.executescript(REMINDER_SCHEMA)
+        rows = await self.db.fetchall(
+            "SELECT id, user_id, channel_id, guild_id, message, due_at, interval FROM reminders"
+        )
+        
+        for row in rows:
+            reminder = dict(zip(REMINDER_FIELDS, row))
+            self._track_reminder(reminder)
+        
+        logger.info(f"Loaded {len(rows)} pending reminders")
+        
+        await self.db.executescript(POLL_SCHEMA)
+        polls = await self.db.fetchall(
+            "SELECT message_id, channel_id, author_id, question, options, ends_at FROM polls"
+        )
+        votes = {}
+        for message_id, user_id, option in await self.db.fetchall("SELECT message_id, user_id, option FROM poll_votes"):
+            votes.setdefault(message_id, []).append((user_id, option))
+        
+        for message_id, channel_id, author_id, question, options, ends_at in polls:
+            self._track_poll({
+                'message_id': message_id,
+                'channel_id': channel_id,
+                'author_id': author_id,
+                'question': question,
+                'options': json.loads(options),
+                'ends_at': ends_at
+            }, votes.get(message_id, ()))
+        
+        logger.info(f"Loaded {len(polls)} open polls")
+        self._start_task = asyncio.create_task(self._start_scheduler())
+    
+    def cog_unload(self):
+        """Stop the reminder and poll schedulers"""
+        self._start_task.cancel()
+        self.reminder_scheduler.stop()
+        self.poll_scheduler.stop()
+        for message_id in self.polls:
+            self.bot.reactions.unregister(message_id)
+    
+    async def _start_scheduler(self):
+        # Channels and users must be cached before anything is delivered
+        await self.bot.wait_until_ready()
+        self.reminder_scheduler.start()
+        self.poll_scheduler.start()
+    
+    def _track_reminder(self, reminder):
+        """Index a reminder in memory and schedule it"""
+        self.reminders[reminder['id']] = reminder
+        self.user_reminders.setdefault(reminder['user_id'], set()).add(reminder['id'])
+        self.reminder_scheduler.schedule(reminder['id'], reminder['due_at'])
+    
+    def _forget_reminder(self, reminder_id):
+        """Remove a reminder from memory and the scheduler"""
+        reminder = self.reminders.pop(reminder_id, None)
+        if reminder is None:
+            return None
+        
+        user_ids = self.user_reminders.get(reminder['user_id'])
+        if user_ids:
+            user_ids.discard(reminder_id)
+            if not user_ids:
+                del self.user_reminders[reminder['user_id']]
+        
+        self.reminder_scheduler.cancel(reminder_id)
+        return reminder
+    
     @commands.command(name='remind')
     async def set_reminder(self, ctx, time_str: str, *, message: str):
-        """Set a cute reminder (e.g., !remind 10m Feed the cats)"""
+        """Set a cute reminder (e.g., !remind 10m Feed the cats, or !remind every 1d Water plants)"""
+        
+        # Recurring reminders: !remind every <time> <message>
+        recurring = time_str.lower() == 'every'
+        if recurring:
+            parts = message.split(maxsplit=1)
+            if len(parts) < 2:
+                embed = discord.Embed(
+                    title="🐱 Missing Something",
+                    description="Meow! Use it like this: `!remind every 1d Water the plants` 🐾",
+                    color=discord.Color.from_rgb(255, 182, 193)
+                )
+                # Cute kitten thumbnail would go here
+                await ctx.send(embed=embed)
+                return
+            time_str, message = parts
         
-        # Parse time string
-        time_match = re.match(r'^(\d+)([smhd])$', time_str.lower())
-        if not time_match:
+        seconds = parse_duration(time_str)
+        if seconds is None:
             embed = discord.Embed(
                 title="🐱 Invalid Time Format",
                 description="Meow! Use formats like: `10m`, `2h`, `1d` (minutes, hours, days) 🐾",
@@ -68,24 +204,12 @@ class UtilityCog(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        amount, unit = int(time_match.group(1)), time_match.group(2)
-        
-        # Convert to seconds
-        seconds = amount  # Default to amount as seconds
-        if unit == 's':
-            seconds = amount
-        elif unit == 'm':
-            seconds = amount * 60
-        elif unit == 'h':
-            seconds = amount * 3600
-        elif unit == 'd':
-            seconds = amount * 86400
-        
         # Check reasonable limits
-        if seconds < 10:  # Minimum 10 seconds
+        minimum = MIN_REPEAT_SECONDS if recurring else 10
+        if seconds < minimum:
             embed = discord.Embed(
                 title="🐱 Too Quick!",
-                description="Meow! Please set reminders for at least 10 seconds! 🐾",
+                description=f"Meow! Please set {'repeating ' if recurring else ''}reminders for at least {minimum // 60 if recurring else minimum} {'minutes' if recurring else 'seconds'}! 🐾",
                 color=discord.Color.from_rgb(255, 182, 193)
             )
             # Cute kitten thumbnail would go here
@@ -102,61 +226,173 @@ class UtilityCog(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        # Set reminder
-        reminder_time = datetime.now() + timedelta(seconds=seconds)
-        reminder_id = f"{ctx.author.id}_{len(self.reminders)}"
+        if len(self.user_reminders.get(ctx.author.id, ())) >= MAX_REMINDERS_PER_USER:
+            embed = discord.Embed(
+                title="🐱 Too Many Reminders!",
+                description=f"Meow! You already have {MAX_REMINDERS_PER_USER} reminders! Cancel some with `!reminders cancel <id>` first! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
         
-        self.reminders[reminder_id] = {
+        # Store the reminder before scheduling it so it survives restarts
+        due_at = time.time() + seconds
+        reminder = {
             'user_id': ctx.author.id,
             'channel_id': ctx.channel.id,
+            'guild_id': ctx.guild.id if ctx.guild else None,
             'message': message,
-            'time': reminder_time
+            'due_at': due_at,
+            'interval': seconds if recurring else None
         }
+        reminder['id'] = await self.db.execute(
+            "INSERT INTO reminders (user_id, channel_id, guild_id, message, due_at, interval) VALUES (?, ?, ?, ?, ?, ?)",
+            (reminder['user_id'], reminder['channel_id'], reminder['guild_id'], message, due_at, reminder['interval'])
+        )
+        self._track_reminder(reminder)
+        
+        if recurring:
+            description = f"Meow! I'll remind you about: **{message}**\n\nI'll send you a message every {time_str}! 🐾🔁"
+        else:
+            description = f"Meow! I'll remind you about: **{message}**\n\nI'll send you a message in {time_str}! 🐾⏰"
         
         embed = discord.Embed(
             title="🐱 Reminder Set!",
-            description=f"Meow! I'll remind you about: **{message}**\n\nI'll send you a message in {time_str}! 🐾⏰",
+            description=description,
             color=discord.Color.from_rgb(144, 238, 144),
-            timestamp=reminder_time
+            timestamp=datetime.fromtimestamp(due_at, timezone.utc)
         )
+        embed.set_footer(text=f"Reminder #{reminder['id']}")
         # Cute kitten thumbnail would go here
         
         await ctx.send(embed=embed)
+    
+    @commands.group(name='reminders', invoke_without_command=True)
+    async def list_reminders(self, ctx):
+        """List your pending reminders"""
+        reminder_ids = self.user_reminders.get(ctx.author.id)
+        if not reminder_ids:
+            embed = discord.Embed(
+                title="🐱 No Reminders",
+                description="Meow! You don't have any reminders right now! Set one with `!remind 10m Feed the cats`! 🐾",
+                color=discord.Color.from_rgb(255, 192, 203)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
         
-        # Schedule the reminder
-        asyncio.create_task(self._send_reminder(reminder_id, seconds))
+        reminders = sorted((self.reminders[i] for i in reminder_ids), key=lambda r: r['due_at'])
+        
+        embed = discord.Embed(
+            title="🐱 Your Reminders",
+            description="Here's everything I'm remembering for you! 🐾",
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        
+        for reminder in reminders[:10]:
+            repeat = " 🔁" if reminder['interval'] else ""
+            text = reminder['message'] if len(reminder['message']) <= 100 else reminder['message'][:97] + "..."
+            embed.add_field(
+                name=f"#{reminder['id']}{repeat}",
+                value=f"{text}\n⏰ <t:{int(reminder['due_at'])}:R>",
+                inline=False
+            )
+        
+        if len(reminders) > 10:
+            embed.set_footer(text=f"...and {len(reminders) - 10} more")
+        # Cute kitten thumbnail would go here
+        
+        await ctx.send(embed=embed)
     
-    async def _send_reminder(self, reminder_id, delay_seconds):
-        """Send the reminder after the specified delay"""
-        await asyncio.sleep(delay_seconds)
+    @list_reminders.command(name='cancel')
+    async def cancel_reminder(self, ctx, reminder_id: int):
+        """Cancel one of your reminders by its ID"""
+        reminder = self.reminders.get(reminder_id)
+        if reminder is None or reminder['user_id'] != ctx.author.id:
+            embed = discord.Embed(
+                title="🐱 Reminder Not Found",
+                description=f"Meow! I couldn't find reminder #{reminder_id} for you! Check `!reminders` for your IDs! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
         
-        if reminder_id not in self.reminders:
+        self._forget_reminder(reminder_id)
+        await self.db.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
+        
+        embed = discord.Embed(
+            title="🐱 Reminder Cancelled!",
+            description=f"Meow! I've forgotten about reminder #{reminder_id}: **{reminder['message']}** 🐾",
+            color=discord.Color.from_rgb(144, 238, 144)
+        )
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    async def _deliver_reminder(self, reminder_id):
+        """Send a due reminder (called by the scheduler)"""
+        reminder = self.reminders.get(reminder_id)
+        if reminder is None:
             return  # Reminder was cancelled
         
-        reminder = self.reminders[reminder_id]
+        now = time.time()
+        late = now - reminder['due_at'] > LATE_DELIVERY_SECONDS
+        
         channel = self.bot.get_channel(reminder['channel_id'])
         user = self.bot.get_user(reminder['user_id'])
         
-        if channel and user:
+        if user:
+            description = f"Meow! You asked me to remind you about:\n\n**{reminder['message']}**\n\nHope this helps! 🐾💕"
+            if late:
+                description += f"\n\n*Sorry, I was napping when this was due <t:{int(reminder['due_at'])}:R>! 😿*"
+            
             embed = discord.Embed(
                 title="🐱 Reminder Alert!",
-                description=f"Meow! You asked me to remind you about:\n\n**{reminder['message']}**\n\nHope this helps! 🐾💕",
+                description=description,
                 color=discord.Color.from_rgb(255, 192, 203),
                 timestamp=datetime.now()
             )
+            if reminder['interval']:
+                embed.set_footer(text=f"Repeating reminder #{reminder_id} • !reminders cancel {reminder_id} to stop")
             # Cute kitten thumbnail would go here
             
             try:
-                await channel.send(f"{user.mention}", embed=embed)
-            except discord.Forbidden:
+                if channel:
+                    await channel.send(f"{user.mention}", embed=embed)
+                else:
+                    await user.send(embed=embed)
+            except discord.HTTPException:
                 pass  # Can't send message
         
-        # Clean up
-        del self.reminders[reminder_id]
+        if reminder['interval']:
+            # Skip occurrences missed while the bot was down
+            due_at = reminder['due_at']
+            while due_at <= now:
+                due_at += reminder['interval']
+            
+            reminder['due_at'] = due_at
+            self.reminder_scheduler.schedule(reminder_id, due_at)
+            await self.db.execute("UPDATE reminders SET due_at = ? WHERE id = ?", (due_at, reminder_id))
+        else:
+            # Clean up
+            self._forget_reminder(reminder_id)
+            await self.db.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
     
     @commands.command(name='poll')
     async def create_poll(self, ctx, *, question: str):
-        """Create a poll with cute kitten reactions"""
+        """Create a poll (e.g., !poll Pizza tonight? or !poll 10m Best snack? | Tuna | Salmon | Treats)"""
+        
+        # Optional duration first: !poll 10m <question>
+        seconds = DEFAULT_POLL_SECONDS
+        parts = question.split(maxsplit=1)
+        if len(parts) == 2 and parse_duration(parts[0]) is not None:
+            seconds = parse_duration(parts[0])
+            question = parts[1]
+        
+        # Options after the question: <question> | <option> | <option>
+        question, *options = [part.strip() for part in question.split('|')]
+        options = [option for option in options if option]
         
         if len(question) > 200:
             embed = discord.Embed(
@@ -168,97 +404,211 @@ class UtilityCog(commands.Cog):
             await ctx.send(embed=embed)
             return
         
+        if len(options) == 1 or len(options) > len(NUMBER_EMOJIS) or any(len(option) > 100 for option in options):
+            embed = discord.Embed(
+                title="🐱 Check Your Options",
+                description=f"Meow! Polls need between 2 and {len(NUMBER_EMOJIS)} options, each under 100 characters! Use it like this: `!poll Best snack? | Tuna | Salmon` 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
+        
+        if not MIN_POLL_SECONDS <= seconds <= MAX_POLL_SECONDS:
+            embed = discord.Embed(
+                title="🐱 Invalid Poll Length",
+                description="Meow! Polls can run from 10 seconds up to 7 days! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            # Cute kitten thumbnail would go here
+            await ctx.send(embed=embed)
+            return
+        
+        if options:
+            emojis = NUMBER_EMOJIS[:len(options)]
+            how_to_vote = "\n".join(f"{emoji} = {option}" for emoji, option in zip(emojis, options))
+            instructions = "React with the number of your choice!"
+        else:
+            emojis = YES_NO_EMOJIS
+            how_to_vote = "👍 = Yes/Agree\n👎 = No/Disagree"
+            instructions = "React with 👍 for yes or 👎 for no!"
+        
+        ends_at = time.time() + seconds
+        
         embed = discord.Embed(
             title="🐱 Kitten Poll!",
-            description=f"**{question}**\n\nReact with 👍 for yes or 👎 for no!\nResults will be shown in 60 seconds! 🐾",
+            description=f"**{question}**\n\n{instructions}\nResults will be shown <t:{int(ends_at)}:R>! 🐾",
             color=discord.Color.from_rgb(255, 192, 203),
             timestamp=datetime.now()
         )
         
         embed.add_field(
             name="📊 How to Vote:",
-            value="👍 = Yes/Agree\n👎 = No/Disagree",
+            value=how_to_vote,
             inline=True
         )
         
         embed.add_field(
             name="⏰ Duration:",
-            value="60 seconds",
+            value=format_duration(seconds),
             inline=True
         )
         
-        embed.set_footer(text=f"Poll by {ctx.author.display_name}")
+        embed.set_footer(text=f"Poll by {ctx.author.display_name} • One vote per person")
         # Cute kitten thumbnail would go here
         
         poll_msg = await ctx.send(embed=embed)
-        await poll_msg.add_reaction("👍")
-        await poll_msg.add_reaction("👎")
         
-        # Store poll data
-        self.polls[poll_msg.id] = {
+        # Store poll data (IDs only) before adding reactions so no early vote is missed
+        poll = {
+            'message_id': poll_msg.id,
+            'channel_id': ctx.channel.id,
+            'author_id': ctx.author.id,
             'question': question,
-            'author': ctx.author,
-            'channel': ctx.channel
+            'options': options,
+            'ends_at': ends_at
         }
+        await self.db.execute(
+            "INSERT INTO polls (message_id, channel_id, author_id, question, options, ends_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (poll_msg.id, ctx.channel.id, ctx.author.id, question, json.dumps(options), ends_at)
+        )
+        self._track_poll(poll)
+        
+        for emoji in emojis:
+            await poll_msg.add_reaction(emoji)
+    
+    def _track_poll(self, poll, votes=()):
+        """Index a poll in memory, rebuild its counters and schedule its end"""
+        # Polls without options are yes/no polls
+        if poll['options']:
+            poll['labels'], poll['emojis'] = poll['options'], NUMBER_EMOJIS[:len(poll['options'])]
+        else:
+            poll['labels'], poll['emojis'] = YES_NO_OPTIONS, YES_NO_EMOJIS
+        
+        poll['votes'] = dict(votes)  # user_id -> option index
+        poll['counts'] = [0] * len(poll['labels'])
+        for option in poll['votes'].values():
+            poll['counts'][option] += 1
         
-        # Wait and show results
-        await asyncio.sleep(60)
-        await self._show_poll_results(poll_msg)
+        self.polls[poll['message_id']] = poll
+        self.poll_scheduler.schedule(poll['message_id'], poll['ends_at'])
+        self.bot.reactions.register(poll['message_id'], self._add_poll_vote, self._remove_poll_vote, poll['ends_at'])
     
-    async def _show_poll_results(self, poll_msg):
-        """Show poll results after voting period"""
+    async def _add_poll_vote(self, payload):
+        """Count a poll vote as it comes in (routed by the reaction router)"""
+        poll = self.polls.get(payload.message_id)
+        if poll is None:
+            return
+        
         try:
-            # Refresh message to get current reactions
-            poll_msg = await poll_msg.channel.fetch_message(poll_msg.id)
-            
-            yes_votes = 0
-            no_votes = 0
-            
-            for reaction in poll_msg.reactions:
-                if str(reaction.emoji) == "👍":
-                    yes_votes = reaction.count - 1  # Subtract bot's reaction
-                elif str(reaction.emoji) == "👎":
-                    no_votes = reaction.count - 1  # Subtract bot's reaction
-            
-            total_votes = yes_votes + no_votes
+            option = poll['emojis'].index(str(payload.emoji))
+        except ValueError:
+            return  # Not a voting reaction
+        
+        previous = poll['votes'].get(payload.user_id)
+        if previous == option:
+            return
+        
+        # One vote per person: a new reaction moves their vote
+        poll['votes'][payload.user_id] = option
+        poll['counts'][option] += 1
+        if previous is not None:
+            poll['counts'][previous] -= 1
+        
+        await self.db.execute(
+            "INSERT INTO poll_votes (message_id, user_id, option) VALUES (?, ?, ?) "
+            "ON CONFLICT(message_id, user_id) DO UPDATE SET option = excluded.option",
+            (payload.message_id, payload.user_id, option)
+        )
+        
+        if previous is not None:
+            # Tidy up their old reaction (needs Manage Messages; the vote already moved either way)
+            channel = self.bot.get_channel(payload.channel_id)
+            if channel:
+                try:
+                    await channel.get_partial_message(payload.message_id).remove_reaction(
+                        poll['emojis'][previous], discord.Object(id=payload.user_id)
+                    )
+                except discord.HTTPException:
+                    pass
+    
+    async def _remove_poll_vote(self, payload):
+        """Take back a poll vote when its reaction is removed"""
+        poll = self.polls.get(payload.message_id)
+        if poll is None:
+            return
+        
+        try:
+            option = poll['emojis'].index(str(payload.emoji))
+        except ValueError:
+            return
+        
+        # Ignore removals of reactions that no longer count (e.g. after switching votes)
+        if poll['votes'].get(payload.user_id) != option:
+            return
+        
+        del poll['votes'][payload.user_id]
+        poll['counts'][option] -= 1
+        
+        await self.db.execute(
+            "DELETE FROM poll_votes WHERE message_id = ? AND user_id = ?",
+            (payload.message_id, payload.user_id)
+        )
+    
+    async def _show_poll_results(self, message_id):
+        """Show poll results once voting closes (called by the scheduler)"""
+        poll = self.polls.pop(message_id, None)
+        if poll is None:
+            return
+        self.bot.reactions.unregister(message_id)
+        
+        try:
+            counts = poll['counts']
+            total_votes = sum(counts)
             
             if total_votes == 0:
                 result_text = "No one voted... *sad kitten noises* 😿"
                 color = discord.Color.from_rgb(255, 182, 193)
             else:
-                yes_percent = (yes_votes / total_votes) * 100
-                no_percent = (no_votes / total_votes) * 100
+                ranked = sorted(range(len(counts)), key=lambda i: counts[i], reverse=True)
+                lines = [
+                    f"{poll['emojis'][i]} {poll['labels'][i]}: {counts[i]} vote{'s' if counts[i] != 1 else ''} ({counts[i] / total_votes * 100:.1f}%)"
+                    for i in ranked
+                ]
                 
-                if yes_votes > no_votes:
-                    result_text = f"**Yes wins!** 🎉\n👍 Yes: {yes_votes} votes ({yes_percent:.1f}%)\n👎 No: {no_votes} votes ({no_percent:.1f}%)"
-                    color = discord.Color.from_rgb(144, 238, 144)
-                elif no_votes > yes_votes:
-                    result_text = f"**No wins!** 📊\n👎 No: {no_votes} votes ({no_percent:.1f}%)\n👍 Yes: {yes_votes} votes ({yes_percent:.1f}%)"
+                winners = [i for i in ranked if counts[i] == counts[ranked[0]]]
+                if len(winners) > 1:
+                    headline = "**It's a tie!** 🤝"
+                    color = discord.Color.from_rgb(255, 192, 203)
+                elif not poll['options'] and winners[0] == 1:
+                    headline = "**No wins!** 📊"
                     color = discord.Color.from_rgb(255, 182, 193)
                 else:
-                    result_text = f"**It's a tie!** 🤝\n👍 Yes: {yes_votes} votes (50%)\n👎 No: {no_votes} votes (50%)"
-                    color = discord.Color.from_rgb(255, 192, 203)
+                    headline = f"**{poll['labels'][winners[0]]} wins!** 🎉"
+                    color = discord.Color.from_rgb(144, 238, 144)
+                
+                result_text = headline + "\n" + "\n".join(lines)
             
-            poll_data = self.polls.get(poll_msg.id)
-            if poll_data:
+            channel = self.bot.get_channel(poll['channel_id'])
+            if channel:
+                author = channel.guild.get_member(poll['author_id']) if getattr(channel, 'guild', None) else None
                 embed = discord.Embed(
                     title="🐱 Poll Results!",
-                    description=f"**Question:** {poll_data['question']}\n\n{result_text}\n\nMeow! Thanks everyone for voting! 🐾",
+                    description=f"**Question:** {poll['question']}\n\n{result_text}\n\nMeow! Thanks everyone for voting! 🐾",
                     color=color,
                     timestamp=datetime.now()
                 )
-                embed.set_footer(text=f"Poll by {poll_data['author'].display_name}")
+                embed.set_footer(text=f"Poll by {author.display_name if author else 'a mystery kitten'}")
                 # Cute kitten thumbnail would go here
                 
-                await poll_data['channel'].send(embed=embed)
-                del self.polls[poll_msg.id]
-                
-        except discord.NotFound:
-            # Message was deleted
-            if poll_msg.id in self.polls:
-                del self.polls[poll_msg.id]
-        except Exception:
-            pass  # Other error, just clean up
+                await channel.send(embed=embed)
+        except discord.HTTPException:
+            pass  # Can't send results
+        finally:
+            await self.db.run(lambda conn: (
+                conn.execute("DELETE FROM poll_votes WHERE message_id = ?", (message_id,)),
+                conn.execute("DELETE FROM polls WHERE message_id = ?", (message_id,))
+            ))
     
     @commands.command(name='8ball')
     async def magic_8ball(self, ctx, *, question: str):
@@ -1,22 +1,57 @@
 import discord
 from discord.ext import commands
-from datetime import datetime
+from datetime import datetime, timezone
+import asyncio
+import time
+from config import BOT_CONFIG, RAID_CONFIG
+from utils.autorole import AutoroleQueue
+from utils.lockdown import edit_channels, raid_scope, restore_channels
+from utils.logging import get_logger
+from utils.permissions import PermissionLevel, has_permissions_or_level
+from utils.raid import JoinRateDetector
+from utils.templates import compile_template
+
+# Autoroles a guild can hand out to every new member
+MAX_AUTOROLES = 5
+
+RAID_RESTORE_RETRY = 300  # Seconds before retrying channels that didn't unlock when a raid ended
+
+# {user} means a mention in welcomes and a plain name in goodbyes
+WELCOME_ALIASES = {'user': 'mention'}
+GOODBYE_ALIASES = {'user': 'user_name'}
+
+logger = get_logger(__name__)
+
+PLACEHOLDER_HELP = "You can also use `{mention}`, `{user_name}`, `{member_count}` and `{account_age}`! 🐾"
 
 class WelcomeCog(commands.Cog):
     """Welcome system and autorole features for Kitten Mod"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.welcome_settings = {}  # Guild settings for welcome messages
-        self.goodbye_settings = {}  # Guild settings for goodbye messages
-        self.autorole_settings = {}  # Guild settings for autoroles
+        self.configs = bot.guild_configs  # Welcome, goodbye, autorole and raid settings
+        self.autorole_queues = {}  # Autorole worker queues per guild
         self.processed_members = set()  # Track processed member joins to prevent duplicates
+        self.join_detectors = {}  # Join-rate detectors per guild
+        self.raid_mode = {}  # Active raid state per guild
+        self.announce_bursts = {}  # (guild_id, kind) -> members waiting for a combined announcement
+        self.announce_tasks = {}  # (guild_id, kind) -> task flushing that burst
+        
+        # Raid protections are undone by the shared expiry loop if the bot restarts mid-raid
+        self.bot.expiries.register('raid_end', self._expire_raid)
+    
+    def cog_unload(self):
+        """Stop background autorole workers and announcement flushes"""
+        for queue in self.autorole_queues.values():
+            queue.stop()
+        for task in self.announce_tasks.values():
+            task.cancel()
     
-    @commands.command(name='welcome')
-    @commands.has_permissions(administrator=True)
+    @commands.command(name='welcome', extras={'permission_level': PermissionLevel.ADMIN})
+    @has_permissions_or_level(PermissionLevel.ADMIN, administrator=True)
     async def setup_welcome(self, ctx, action: str, *, message_or_channel=None):
         """Set up cute welcome messages for new members"""
-        guild_id = ctx.guild.id
+        config = self.configs.get(ctx.guild.id)
         
         if action.lower() == 'setup':
             if not message_or_channel:
@@ -26,8 +61,9 @@ class WelcomeCog(commands.Cog):
                                f"`!welcome setup #channel` - Set welcome channel\n"
                                f"`!welcome message <text>` - Set custom message\n"
                                f"`!welcome disable` - Turn off welcomes\n"
+                               f"`!welcome coalesce <seconds|off>` - Combine welcomes during join bursts\n"
                                f"`!welcome test` - Test current settings\n\n"
-                               f"**Current Status:** {'Enabled' if guild_id in self.welcome_settings else 'Disabled'} 🐾",
+                               f"**Current Status:** {'Enabled' if config.welcome_channel_id else 'Disabled'} 🐾",
                     color=discord.Color.from_rgb(255, 192, 203)
                 )
                 # Cute kitten thumbnail would go here
@@ -37,10 +73,10 @@ class WelcomeCog(commands.Cog):
             # Try to parse as channel
             try:
                 channel = await commands.TextChannelConverter().convert(ctx, message_or_channel)
-                self.welcome_settings[guild_id] = {
-                    'channel_id': channel.id,
-                    'message': None  # Will use default
-                }
+                config.welcome_channel_id = channel.id
+                config.welcome_message = None  # Will use default
+                config.welcome_template = None
+                self.configs.mark_dirty(config.guild_id)
                 
                 embed = discord.Embed(
                     title="🐱 Welcome Channel Set!",
@@ -60,7 +96,7 @@ class WelcomeCog(commands.Cog):
                 await ctx.send(embed=embed)
         
         elif action.lower() == 'message':
-            if guild_id not in self.welcome_settings:
+            if not config.welcome_channel_id:
                 embed = discord.Embed(
                     title="🐱 No Welcome Channel",
                     description="Meow! You need to set up a welcome channel first with `!welcome setup #channel`! 🐾",
@@ -73,26 +109,34 @@ class WelcomeCog(commands.Cog):
             if not message_or_channel:
                 embed = discord.Embed(
                     title="🐱 No Message Provided",
-                    description="Meow! Please provide a welcome message! Use `{user}` to mention the new member and `{server}` for server name! 🐾",
+                    description="Meow! Please provide a welcome message! Use `{user}` to mention the new member and `{server}` for server name! " + PLACEHOLDER_HELP,
                     color=discord.Color.from_rgb(255, 182, 193)
                 )
                 # Cute kitten thumbnail would go here
                 await ctx.send(embed=embed)
                 return
             
-            self.welcome_settings[guild_id]['message'] = message_or_channel
+            # Parse the template once here instead of on every join
+            template = compile_template(message_or_channel, WELCOME_ALIASES)
+            config.welcome_message = message_or_channel
+            config.welcome_template = template
+            self.configs.mark_dirty(config.guild_id)
             
             embed = discord.Embed(
                 title="🐱 Welcome Message Set!",
-                description=f"Meow! Here's your new welcome message:\n\n{message_or_channel.replace('{user}', ctx.author.mention).replace('{server}', ctx.guild.name)} 🐾",
+                description=f"Meow! Here's your new welcome message:\n\n{template.render(ctx.guild, ctx.author)} 🐾",
                 color=discord.Color.from_rgb(144, 238, 144)
             )
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
         
         elif action.lower() == 'disable':
-            if guild_id in self.welcome_settings:
-                del self.welcome_settings[guild_id]
+            if config.welcome_channel_id:
+                config.welcome_channel_id = None
+                config.welcome_message = None
+                config.welcome_template = None
+                config.welcome_coalesce = None
+                self.configs.mark_dirty(config.guild_id)
                 embed = discord.Embed(
                     title="🐱 Welcome Disabled",
                     description="Meow! I've turned off welcome messages. I'll miss greeting new friends! 🥺🐾",
@@ -107,8 +151,11 @@ class WelcomeCog(commands.Cog):
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
         
+        elif action.lower() == 'coalesce':
+            await self._set_coalesce(ctx, config, 'welcome', message_or_channel)
+        
         elif action.lower() == 'test':
-            if guild_id not in self.welcome_settings:
+            if not config.welcome_channel_id:
                 embed = discord.Embed(
                     title="🐱 No Welcome Setup",
                     description="Meow! Welcome messages aren't set up yet! Use `!welcome setup #channel` first! 🐾",
@@ -121,11 +168,11 @@ class WelcomeCog(commands.Cog):
             # Test the welcome message
             await self._send_welcome_message(ctx.guild, ctx.author, test=True)
     
-    @commands.command(name='goodbye')
-    @commands.has_permissions(administrator=True) 
+    @commands.command(name='goodbye', extras={'permission_level': PermissionLevel.ADMIN})
+    @has_permissions_or_level(PermissionLevel.ADMIN, administrator=True) 
     async def setup_goodbye(self, ctx, action: str, *, message_or_channel=None):
         """Set up cute goodbye messages when members leave"""
-        guild_id = ctx.guild.id
+        config = self.configs.get(ctx.guild.id)
         
         if action.lower() == 'setup':
             if not message_or_channel:
@@ -134,8 +181,9 @@ class WelcomeCog(commands.Cog):
                     description="Meow! Here's how to set up goodbye messages:\n\n"
                                f"`!goodbye setup #channel` - Set goodbye channel\n"
                                f"`!goodbye message <text>` - Set custom message\n"
-                               f"`!goodbye disable` - Turn off goodbyes\n\n"
-                               f"**Current Status:** {'Enabled' if guild_id in self.goodbye_settings else 'Disabled'} 🐾",
+                               f"`!goodbye disable` - Turn off goodbyes\n"
+                               f"`!goodbye coalesce <seconds|off>` - Combine goodbyes during leave bursts\n\n"
+                               f"**Current Status:** {'Enabled' if config.goodbye_channel_id else 'Disabled'} 🐾",
                     color=discord.Color.from_rgb(255, 192, 203)
                 )
                 # Cute kitten thumbnail would go here
@@ -145,10 +193,10 @@ class WelcomeCog(commands.Cog):
             # Try to parse as channel
             try:
                 channel = await commands.TextChannelConverter().convert(ctx, message_or_channel)
-                self.goodbye_settings[guild_id] = {
-                    'channel_id': channel.id,
-                    'message': None  # Will use default
-                }
+                config.goodbye_channel_id = channel.id
+                config.goodbye_message = None  # Will use default
+                config.goodbye_template = None
+                self.configs.mark_dirty(config.guild_id)
                 
                 embed = discord.Embed(
                     title="🐱 Goodbye Channel Set!",
@@ -168,7 +216,7 @@ class WelcomeCog(commands.Cog):
                 await ctx.send(embed=embed)
         
         elif action.lower() == 'message':
-            if guild_id not in self.goodbye_settings:
+            if not config.goodbye_channel_id:
                 embed = discord.Embed(
                     title="🐱 No Goodbye Channel",
                     description="Meow! You need to set up a goodbye channel first with `!goodbye setup #channel`! 🐾",
@@ -181,26 +229,34 @@ class WelcomeCog(commands.Cog):
             if not message_or_channel:
                 embed = discord.Embed(
                     title="🐱 No Message Provided", 
-                    description="Meow! Please provide a goodbye message! Use `{user}` for the member's name and `{server}` for server name! 🐾",
+                    description="Meow! Please provide a goodbye message! Use `{user}` for the member's name and `{server}` for server name! " + PLACEHOLDER_HELP,
                     color=discord.Color.from_rgb(255, 182, 193)
                 )
                 # Cute kitten thumbnail would go here
                 await ctx.send(embed=embed)
                 return
             
-            self.goodbye_settings[guild_id]['message'] = message_or_channel
+            # Parse the template once here instead of on every leave
+            template = compile_template(message_or_channel, GOODBYE_ALIASES)
+            config.goodbye_message = message_or_channel
+            config.goodbye_template = template
+            self.configs.mark_dirty(config.guild_id)
             
             embed = discord.Embed(
                 title="🐱 Goodbye Message Set!",
-                description=f"Meow! Here's your goodbye message:\n\n{message_or_channel.replace('{user}', ctx.author.display_name).replace('{server}', ctx.guild.name)} 🐾",
+                description=f"Meow! Here's your goodbye message:\n\n{template.render(ctx.guild, ctx.author)} 🐾",
                 color=discord.Color.from_rgb(144, 238, 144)
             )
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
         
         elif action.lower() == 'disable':
-            if guild_id in self.goodbye_settings:
-                del self.goodbye_settings[guild_id]
+            if config.goodbye_channel_id:
+                config.goodbye_channel_id = None
+                config.goodbye_message = None
+                config.goodbye_template = None
+                config.goodbye_coalesce = None
+                self.configs.mark_dirty(config.guild_id)
                 embed = discord.Embed(
                     title="🐱 Goodbye Disabled",
                     description="Meow! I've turned off goodbye messages. 🐾",
@@ -214,18 +270,23 @@ class WelcomeCog(commands.Cog):
                 )
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
+        
+        elif action.lower() == 'coalesce':
+            await self._set_coalesce(ctx, config, 'goodbye', message_or_channel)
     
-    @commands.command(name='autorole')
-    @commands.has_permissions(administrator=True)
+    @commands.command(name='autorole', extras={'permission_level': PermissionLevel.ADMIN})
+    @has_permissions_or_level(PermissionLevel.ADMIN, administrator=True)
     async def setup_autorole(self, ctx, action: str, *, role_name=None):
-        """Set up automatic role assignment for new members"""
+        """Set up automatic role assignment for new members (set, add, remove, disable, status)"""
         guild_id = ctx.guild.id
+        config = self.configs.get(guild_id)
+        action = action.lower()
         
-        if action.lower() == 'set':
+        if action in ('set', 'add', 'remove'):
             if not role_name:
                 embed = discord.Embed(
                     title="🐱 No Role Specified",
-                    description="Meow! Please specify a role name! Example: `!autorole set Member` 🐾",
+                    description=f"Meow! Please specify a role name! Example: `!autorole {action} Member` 🐾",
                     color=discord.Color.from_rgb(255, 182, 193)
                 )
                 # Cute kitten thumbnail would go here
@@ -233,8 +294,8 @@ class WelcomeCog(commands.Cog):
                 return
             
             # Find the role
-            role = discord.utils.get(ctx.guild.roles, name=role_name)
-            if not role:
+            roles = self.bot.role_index.find(ctx.guild, role_name)
+            if not roles:
                 embed = discord.Embed(
                     title="🐱 Role Not Found",
                     description=f"Meow! I can't find a role called '{role_name}'. Make sure it exists! 🐾",
@@ -244,6 +305,29 @@ class WelcomeCog(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
+            role = await self.bot.role_index.choose(ctx, roles)
+            if role is None:
+                return
+            
+            if action == 'remove':
+                if role.id in config.autoroles:
+                    config.autoroles.remove(role.id)
+                    self.configs.mark_dirty(guild_id)
+                    embed = discord.Embed(
+                        title="🐱 Autorole Removed!",
+                        description=f"Meow! New members won't get the {role.mention} role anymore! 🐾",
+                        color=discord.Color.from_rgb(144, 238, 144)
+                    )
+                else:
+                    embed = discord.Embed(
+                        title="🐱 Not an Autorole",
+                        description=f"Meow! {role.mention} isn't one of my autoroles! 🐾",
+                        color=discord.Color.from_rgb(255, 182, 193)
+                    )
+                # Cute kitten thumbnail would go here
+                await ctx.send(embed=embed)
+                return
+            
             # Check if bot can assign this role
             if role >= ctx.guild.me.top_role:
                 embed = discord.Embed(
@@ -255,7 +339,27 @@ class WelcomeCog(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
-            self.autorole_settings[guild_id] = role.id
+            if action == 'set':
+                config.autoroles = [role.id]
+            else:
+                if role.id in config.autoroles:
+                    embed = discord.Embed(
+                        title="🐱 Already an Autorole",
+                        description=f"Meow! New members already get {role.mention}! 🐾",
+                        color=discord.Color.from_rgb(255, 182, 193)
+                    )
+                    await ctx.send(embed=embed)
+                    return
+                if len(config.autoroles) >= MAX_AUTOROLES:
+                    embed = discord.Embed(
+                        title="🐱 Too Many Autoroles",
+                        description=f"Meow! I can only hand out {MAX_AUTOROLES} autoroles at once! Remove one first! 🐾",
+                        color=discord.Color.from_rgb(255, 182, 193)
+                    )
+                    await ctx.send(embed=embed)
+                    return
+                config.autoroles.append(role.id)
+            self.configs.mark_dirty(guild_id)
             
             embed = discord.Embed(
                 title="🐱 Autorole Set!",
@@ -265,9 +369,10 @@ class WelcomeCog(commands.Cog):
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
         
-        elif action.lower() == 'disable':
-            if guild_id in self.autorole_settings:
-                del self.autorole_settings[guild_id]
+        elif action == 'disable':
+            if config.autoroles:
+                config.autoroles = []
+                self.configs.mark_dirty(guild_id)
                 embed = discord.Embed(
                     title="🐱 Autorole Disabled",
                     description="Meow! I've turned off automatic role assignment! 🐾",
@@ -282,32 +387,113 @@ class WelcomeCog(commands.Cog):
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
         
-        elif action.lower() == 'status':
-            if guild_id in self.autorole_settings:
-                role = ctx.guild.get_role(self.autorole_settings[guild_id])
-                if role:
-                    embed = discord.Embed(
-                        title="🐱 Autorole Status",
-                        description=f"Meow! Autorole is enabled! New members get: {role.mention} 🏷️",
-                        color=discord.Color.from_rgb(144, 238, 144)
-                    )
-                else:
-                    # Role was deleted
-                    del self.autorole_settings[guild_id]
-                    embed = discord.Embed(
-                        title="🐱 Autorole Broken",
-                        description="Meow! The autorole was set to a role that no longer exists! It's been disabled. 🐾",
-                        color=discord.Color.from_rgb(255, 182, 193)
-                    )
+        elif action == 'status':
+            roles = [ctx.guild.get_role(role_id) for role_id in config.autoroles]
+            
+            # Forget roles that were deleted
+            if None in roles:
+                roles = [role for role in roles if role]
+                config.autoroles = [role.id for role in roles]
+                self.configs.mark_dirty(guild_id)
+            
+            if roles:
+                embed = discord.Embed(
+                    title="🐱 Autorole Status",
+                    description=f"Meow! Autorole is enabled! New members get: {', '.join(role.mention for role in roles)} 🏷️",
+                    color=discord.Color.from_rgb(144, 238, 144)
+                )
             else:
                 embed = discord.Embed(
                     title="🐱 Autorole Status",
                     description="Meow! Autorole is currently disabled! 🐾",
                     color=discord.Color.from_rgb(255, 182, 193)
                 )
+            
+            queue = self.autorole_queues.get(guild_id)
+            if queue:
+                embed.add_field(name="⏳ Waiting:", value=str(queue.depth), inline=True)
+                embed.add_field(name="✅ Assigned:", value=str(queue.succeeded), inline=True)
+                embed.add_field(name="❌ Failed:", value=str(queue.failed), inline=True)
+                embed.add_field(name="🔁 Retries:", value=str(queue.retried), inline=True)
             # Cute kitten thumbnail would go here
             await ctx.send(embed=embed)
     
+    @commands.command(name='raidmode')
+    @has_permissions_or_level(PermissionLevel.ADMIN, manage_guild=True)
+    async def raid_mode_command(self, ctx, action: str = 'status', *, value: str = None):
+        """Show or control raid mode (status, on, off, verification on/off, lockdown on/off)"""
+        guild_id = ctx.guild.id
+        action = action.lower()
+        
+        if action == 'on':
+            if guild_id in self.raid_mode:
+                embed = discord.Embed(
+                    title="🐱 Already On Guard",
+                    description="Meow! Raid mode is already active! I'm watching the door! 🛡️🐾",
+                    color=discord.Color.from_rgb(255, 182, 193)
+                )
+            else:
+                raid = self._new_raid_state(0, 0)
+                self.raid_mode[guild_id] = raid
+                asyncio.create_task(self._start_raid_mode(ctx.guild, raid, started_by=ctx.author))
+                embed = discord.Embed(
+                    title="🛡️ Raid Mode On!",
+                    description="Meow! I've switched on raid mode. No welcomes until things calm down, and autoroles will catch up afterwards! 🐾",
+                    color=discord.Color.from_rgb(255, 192, 203)
+                )
+        
+        elif action == 'off':
+            if guild_id not in self.raid_mode:
+                embed = discord.Embed(
+                    title="🐱 No Raid Going On",
+                    description="Meow! Raid mode isn't active right now! 🐾",
+                    color=discord.Color.from_rgb(255, 182, 193)
+                )
+            else:
+                await self._end_raid_mode(ctx.guild, f"Ended by {ctx.author}")
+                embed = discord.Embed(
+                    title="🐱 Raid Mode Off!",
+                    description="Meow! Raid mode is over and everything is back to normal! 🐾💕",
+                    color=discord.Color.from_rgb(144, 238, 144)
+                )
+        
+        elif action in ('verification', 'lockdown'):
+            if value is None or value.lower() not in ('on', 'off'):
+                embed = discord.Embed(
+                    title="🐱 Confused Kitten",
+                    description=f"Meow! Use `{ctx.prefix}raidmode {action} on` or `{ctx.prefix}raidmode {action} off`! 🐾",
+                    color=discord.Color.from_rgb(255, 182, 193)
+                )
+            else:
+                key = 'raise_verification' if action == 'verification' else 'lock_channels'
+                config = self.configs.get(guild_id)
+                config.raid_settings[key] = value.lower() == 'on'
+                self.configs.mark_dirty(guild_id)
+                embed = discord.Embed(
+                    title="🐱 Raid Settings Updated!",
+                    description=f"Meow! During raids I'll {'now' if value.lower() == 'on' else 'no longer'} {'raise the verification level' if action == 'verification' else 'lock text channels'}! 🐾",
+                    color=discord.Color.from_rgb(144, 238, 144)
+                )
+        
+        else:
+            settings = self._get_raid_settings(guild_id)
+            raid = self.raid_mode.get(guild_id)
+            embed = discord.Embed(
+                title="🛡️ Raid Mode Status",
+                description=f"**Status:** {'Active 🚨' if raid else 'Calm 😸'}\n"
+                            f"**Trigger:** {settings['join_threshold']} joins in {settings['window_seconds']}s "
+                            f"(accounts under {settings['young_account_days']} days count x{settings['young_account_weight']})\n"
+                            f"**Raise verification:** {'Yes' if settings['raise_verification'] else 'No'}\n"
+                            f"**Lock channels:** {'Yes' if settings['lock_channels'] else 'No'}",
+                color=discord.Color.from_rgb(255, 192, 203)
+            )
+            if raid:
+                embed.add_field(name="🚪 Joins Held Back:", value=str(raid['joins']), inline=True)
+                embed.add_field(name="🐣 New Accounts:", value=str(raid['young']), inline=True)
+        
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Handle new member events"""
@@ -326,41 +512,471 @@ class WelcomeCog(commands.Cog):
             for entry in old_entries:
                 self.processed_members.discard(entry)
         
-        # Send welcome message
-        if guild_id in self.welcome_settings:
-            await self._send_welcome_message(member.guild, member)
+        # Raid mode suppresses welcomes and autoroles
+        if self._track_join(member):
+            return
         
-        # Assign autorole
-        if guild_id in self.autorole_settings:
-            role = member.guild.get_role(self.autorole_settings[guild_id])
-            if role and role < member.guild.me.top_role:
-                try:
-                    await member.add_roles(role, reason="Autorole via Kitten Mod")
-                except discord.Forbidden:
-                    pass  # Bot lacks permissions
+        config = self.configs.peek(guild_id)
+        if config is None:
+            return
+        
+        # Queue autoroles for the guild's worker
+        if config.autoroles:
+            self._queue_autoroles(guild_id, [member], config.autoroles)
+        
+        # Send welcome message
+        if config.welcome_channel_id:
+            await self._announce(member.guild, member, 'welcome')
     
     @commands.Cog.listener()
     async def on_member_remove(self, member):
         """Handle member leave events"""
-        guild_id = member.guild.id
+        config = self.configs.peek(member.guild.id)
         
         # Send goodbye message
-        if guild_id in self.goodbye_settings:
-            await self._send_goodbye_message(member.guild, member)
+        if config and config.goodbye_channel_id:
+            await self._announce(member.guild, member, 'goodbye')
+    
+    def _queue_autoroles(self, guild_id, members, role_ids):
+        """Hand members to the guild's autorole worker"""
+        queue = self.autorole_queues.get(guild_id)
+        if queue is None:
+            queue = AutoroleQueue(guild_id)
+            self.autorole_queues[guild_id] = queue
+        for member in members:
+            queue.enqueue(member, role_ids)
+    
+    def _release_held_autoroles(self, guild, since):
+        """Queue autoroles for members who joined during a raid and are still here; returns how many"""
+        config = self.configs.peek(guild.id)
+        if not config or not config.autoroles:
+            return 0
+        
+        # Allow for clock drift; anyone who already has their roles is skipped by the worker
+        cutoff = datetime.fromtimestamp(since - self._get_raid_settings(guild.id)['window_seconds'], timezone.utc)
+        members = [
+            member for member in guild.members
+            if not member.bot and member.joined_at and member.joined_at >= cutoff
+        ]
+        self._queue_autoroles(guild.id, members, config.autoroles)
+        return len(members)
+    
+    def _get_raid_settings(self, guild_id):
+        """Get raid settings for a guild (defaults with guild overrides)"""
+        config = self.configs.peek(guild_id)
+        return {**RAID_CONFIG, **config.raid_settings} if config else RAID_CONFIG
+    
+    def _new_raid_state(self, joins, young):
+        return {
+            'started': datetime.now(),
+            'started_at': time.time(),  # Members who joined since get their autoroles when it ends
+            'joins': joins,
+            'young': young,
+            'last_join': time.monotonic(),
+            'previous_verification': None,
+            'locked_channels': 0,  # Their overwrites are saved in bot.lockdowns under raid_scope()
+            'summary_message': None
+        }
+    
+    def _track_join(self, member):
+        """Record a join for raid detection; returns True while the guild is in raid mode"""
+        guild_id = member.guild.id
+        now = time.monotonic()
+        
+        detector = self.join_detectors.get(guild_id)
+        if detector is None:
+            settings = self._get_raid_settings(guild_id)
+            detector = JoinRateDetector(
+                settings['window_seconds'],
+                settings['join_threshold'],
+                settings['young_account_days'],
+                settings['young_account_weight']
+            )
+            self.join_detectors[guild_id] = detector
+        
+        young = detector.is_young(member.created_at, discord.utils.utcnow())
+        tripped = detector.record(now, young)
+        
+        raid = self.raid_mode.get(guild_id)
+        if raid is not None:
+            raid['joins'] += 1
+            raid['young'] += young
+            raid['last_join'] = now
+            return True
+        
+        if not tripped:
+            return False
+        
+        # Count the whole burst that tripped the detector
+        burst_young = sum(1 for _, weight in detector.joins if weight != 1.0)
+        raid = self._new_raid_state(len(detector.joins), burst_young)
+        self.raid_mode[guild_id] = raid
+        asyncio.create_task(self._start_raid_mode(member.guild, raid))
+        return True
+    
+    def _incident_channel(self, guild):
+        """Find a channel to post raid incident summaries in"""
+        return guild.system_channel or (guild.text_channels[0] if guild.text_channels else None)
+    
+    async def _start_raid_mode(self, guild, raid, started_by=None):
+        """Apply raid protections and post one incident summary"""
+        settings = self._get_raid_settings(guild.id)
+        actions = ["Welcome messages paused", "Autoroles held until the raid ends"]
+        
+        if settings['raise_verification'] and guild.verification_level < discord.VerificationLevel.high:
+            try:
+                previous = guild.verification_level
+                await guild.edit(verification_level=discord.VerificationLevel.high, reason="Raid mode via Kitten Mod")
+                raid['previous_verification'] = previous
+                actions.append("Verification level raised to High")
+            except discord.HTTPException:
+                pass  # Bot lacks Manage Server
+        
+        if settings['lock_channels']:
+            everyone_role = guild.default_role
+            lockdowns = self.bot.lockdowns
+            channels = [
+                channel for channel in guild.text_channels
+                # Already locked (by hand or a !lockdown) channels are left alone
+                if channel.id not in lockdowns and channel.overwrites_for(everyone_role).send_messages is not False
+            ]
+            
+            # Save the overwrites first so they can be put back even after a restart
+            await lockdowns.save(channels, everyone_role, raid_scope(guild.id))
+            
+            async def lock(channel):
+                overwrite = channel.overwrites_for(everyone_role)
+                overwrite.send_messages = False
+                await channel.set_permissions(everyone_role, overwrite=overwrite, reason="Raid mode via Kitten Mod")
+            
+            locked = await edit_channels(channels, lock)
+            locked_ids = {channel.id for channel in locked}
+            await lockdowns.discard(channel.id for channel in channels if channel.id not in locked_ids)
+            raid['locked_channels'] = len(locked)
+            
+            if locked:
+                actions.append(f"Locked {len(locked)} channels")
+        
+        await self._schedule_raid_end(guild, raid)
+        
+        if started_by:
+            trigger = f"Started manually by {started_by.mention}"
+        else:
+            trigger = f"{raid['joins']} joins in {settings['window_seconds']}s ({raid['young']} brand new accounts)"
+        
+        embed = discord.Embed(
+            title="🚨 Raid Mode Activated!",
+            description=f"Meow! Lots of kitties are rushing through the door at once, so I'm on guard! 🛡️🐾\n\n**Trigger:** {trigger}",
+            color=discord.Color.from_rgb(255, 99, 71),
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="🔒 Actions:", value="\n".join(actions), inline=False)
+        embed.set_footer(text=f"Raid mode ends after {settings['calm_minutes']} calm minutes or with !raidmode off")
+        
+        channel = self._incident_channel(guild)
+        if channel:
+            try:
+                raid['summary_message'] = await channel.send(embed=embed)
+            except discord.HTTPException:
+                pass
+        
+        asyncio.create_task(self._watch_raid(guild, raid))
+    
+    async def _watch_raid(self, guild, raid):
+        """End raid mode once joins have been calm for long enough"""
+        calm_seconds = self._get_raid_settings(guild.id)['calm_minutes'] * 60
+        
+        while self.raid_mode.get(guild.id) is raid:
+            remaining = raid['last_join'] + calm_seconds - time.monotonic()
+            if remaining <= 0:
+                await self._end_raid_mode(guild, "Things calmed down")
+                return
+            await self._schedule_raid_end(guild, raid)
+            await asyncio.sleep(remaining)
+    
+    async def _schedule_raid_end(self, guild, raid):
+        """Store when the raid should end and what to undo, in case the bot restarts before then"""
+        calm_seconds = self._get_raid_settings(guild.id)['calm_minutes'] * 60
+        remaining = max(raid['last_join'] + calm_seconds - time.monotonic(), 0)
+        previous = raid['previous_verification']
+        await self.bot.expiries.add(
+            'raid_end', guild.id, guild.id, time.time() + remaining,
+            {'verification': previous.value if previous is not None else None, 'started_at': raid['started_at']}
+        )
+    
+    async def _expire_raid(self, guild_id, target_id, data):
+        """End a raid that outlived a restart or retry channels that didn't unlock (a running raid just stays scheduled)"""
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return
+        
+        raid = self.raid_mode.get(guild_id)
+        if raid is not None:
+            # The calm-down watcher owns this raid; keep its end on record
+            await self._schedule_raid_end(guild, raid)
+            return
+        
+        if data.get('verification') is not None:
+            try:
+                await guild.edit(
+                    verification_level=discord.VerificationLevel(data['verification']),
+                    reason="Raid mode ended via Kitten Mod"
+                )
+            except discord.HTTPException:
+                pass
+        
+        snapshots = self.bot.lockdowns.for_scope(raid_scope(guild_id))
+        if snapshots:
+            restored, failed = await restore_channels(guild, self.bot.lockdowns, snapshots, "Raid mode ended via Kitten Mod")
+            if failed:
+                await self.bot.expiries.add('raid_end', guild_id, guild_id, time.time() + RAID_RESTORE_RETRY, {'verification': None})
+            if not restored and data.get('verification') is None and data.get('started_at') is None:
+                return  # A retry that still couldn't unlock anything; nothing to announce
+        
+        if data.get('started_at') is not None:
+            self._release_held_autoroles(guild, data['started_at'])
+        
+        channel = self._incident_channel(guild)
+        if channel:
+            embed = discord.Embed(
+                title="😸 Raid Mode Ended",
+                description="Meow! The raid is over, so I've put everything back the way it was! 🐾💕",
+                color=discord.Color.from_rgb(144, 238, 144),
+                timestamp=datetime.now()
+            )
+            try:
+                await channel.send(embed=embed)
+            except discord.HTTPException:
+                pass
+    
+    async def _end_raid_mode(self, guild, reason):
+        """Undo raid protections and update the incident summary"""
+        raid = self.raid_mode.pop(guild.id, None)
+        if raid is None:
+            return
+        
+        detector = self.join_detectors.get(guild.id)
+        if detector:
+            detector.reset()
+        
+        if raid['previous_verification'] is not None:
+            try:
+                await guild.edit(verification_level=raid['previous_verification'], reason="Raid mode ended via Kitten Mod")
+            except discord.HTTPException:
+                pass
+        
+        failed = 0
+        snapshots = self.bot.lockdowns.for_scope(raid_scope(guild.id))
+        if snapshots:
+            _, failed = await restore_channels(guild, self.bot.lockdowns, snapshots, "Raid mode ended via Kitten Mod")
+        if failed:
+            # Try the channels that didn't unlock again later
+            await self.bot.expiries.add('raid_end', guild.id, guild.id, time.time() + RAID_RESTORE_RETRY, {'verification': None})
+        else:
+            await self.bot.expiries.remove('raid_end', guild.id, guild.id)
+        
+        held = self._release_held_autoroles(guild, raid['started_at'])
+        
+        duration = datetime.now() - raid['started']
+        embed = discord.Embed(
+            title="😸 Raid Mode Ended",
+            description=f"Meow! {reason}, so I've put everything back the way it was! 🐾💕",
+            color=discord.Color.from_rgb(144, 238, 144),
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="🚪 Joins During Raid:", value=str(raid['joins']), inline=True)
+        embed.add_field(name="🐣 New Accounts:", value=str(raid['young']), inline=True)
+        embed.add_field(name="⏰ Duration:", value=f"{int(duration.total_seconds() // 60)} minutes", inline=True)
+        if held:
+            embed.add_field(name="🎀 Autoroles Catching Up:", value=f"{held} members", inline=True)
+        
+        try:
+            if raid['summary_message']:
+                await raid['summary_message'].edit(embed=embed)
+            else:
+                channel = self._incident_channel(guild)
+                if channel:
+                    await channel.send(embed=embed)
+        except discord.HTTPException:
+            pass
+    
+    async def _set_coalesce(self, ctx, config, kind, value):
+        """Configure the coalescing window for welcome or goodbye announcements"""
+        if not getattr(config, f'{kind}_channel_id'):
+            embed = discord.Embed(
+                title=f"🐱 No {kind.title()} Channel",
+                description=f"Meow! You need to set up a {kind} channel first with `!{kind} setup #channel`! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if value is None:
+            seconds = self._coalesce_window(config, kind)
+            embed = discord.Embed(
+                title="🐱 Burst Combining",
+                description=f"Meow! {kind.title()} messages are combined over **{seconds} seconds** during bursts!" if seconds else f"Meow! {kind.title()} messages are always sent one by one! 🐾",
+                color=discord.Color.from_rgb(255, 192, 203)
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if value.lower() == 'off':
+            seconds = 0
+        elif value.isdigit() and 1 <= int(value) <= 300:
+            seconds = int(value)
+        else:
+            embed = discord.Embed(
+                title="🐱 Confused Kitten",
+                description="Meow! Please give me a number of seconds between 1 and 300, or `off`! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        setattr(config, f'{kind}_coalesce', seconds)
+        self.configs.mark_dirty(config.guild_id)
+        
+        embed = discord.Embed(
+            title="🐱 Burst Combining Updated!",
+            description=f"Meow! When lots of members come and go at once, I'll combine {kind} messages over {seconds} seconds! 🐾" if seconds else f"Meow! I'll send every {kind} message one by one! 🐾",
+            color=discord.Color.from_rgb(144, 238, 144)
+        )
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+    
+    def _coalesce_window(self, config, kind):
+        """Get the coalescing window in seconds for welcomes or goodbyes"""
+        window = getattr(config, f'{kind}_coalesce')
+        return BOT_CONFIG['announce_coalesce_seconds'] if window is None else window
+    
+    def _get_template(self, config, kind):
+        """Get a compiled template, compiling stored messages the first time they're used"""
+        template = getattr(config, f'{kind}_template')
+        message = getattr(config, f'{kind}_message')
+        if template is None and message:
+            template = compile_template(message, WELCOME_ALIASES if kind == 'welcome' else GOODBYE_ALIASES)
+            setattr(config, f'{kind}_template', template)
+        return template
+    
+    async def _announce(self, guild, member, kind):
+        """Send a welcome or goodbye, combining bursts into a single message"""
+        config = self.configs.peek(guild.id)
+        if not config:
+            return
+        
+        window = self._coalesce_window(config, kind)
+        send = self._send_welcome_message if kind == 'welcome' else self._send_goodbye_message
+        if not window:
+            await send(guild, member)
+            return
+        
+        key = (guild.id, kind)
+        burst = self.announce_bursts.get(key)
+        if burst is not None:
+            # A window is already open, this member goes into the combined message
+            burst.append(member)
+            return
+        
+        # Quiet guild: announce right away and open a window for anyone who follows
+        self.announce_bursts[key] = []
+        self.announce_tasks[key] = asyncio.create_task(self._flush_announcements(guild, kind, window))
+        await send(guild, member)
+    
+    async def _flush_announcements(self, guild, kind, window):
+        """Flush buffered member events once per window until the burst is over"""
+        key = (guild.id, kind)
+        
+        try:
+            while True:
+                await asyncio.sleep(window)
+                
+                members = self.announce_bursts.get(key)
+                if not members:
+                    # Nothing arrived during the window, the burst is over
+                    return
+                
+                # Keep the window open while events keep coming
+                self.announce_bursts[key] = []
+                
+                try:
+                    if len(members) == 1:
+                        if kind == 'welcome':
+                            await self._send_welcome_message(guild, members[0])
+                        else:
+                            await self._send_goodbye_message(guild, members[0])
+                    else:
+                        await self._send_combined_message(guild, members, kind)
+                except Exception as e:
+                    logger.error(f"Failed to send {kind} announcement in guild {guild.id}: {e}")
+        finally:
+            # However the task ends, later events must not queue into a burst nobody flushes
+            self.announce_bursts.pop(key, None)
+            self.announce_tasks.pop(key, None)
+    
+    async def _send_combined_message(self, guild, members, kind):
+        """Send one message listing every member from a burst"""
+        config = self.configs.peek(guild.id)
+        if not config:
+            return
+        
+        channel = guild.get_channel(getattr(config, f'{kind}_channel_id'))
+        if not channel:
+            return
+        
+        # Stay well inside the embed description limit
+        names = []
+        length = 0
+        for member in members:
+            name = member.mention if kind == 'welcome' else f"**{member.display_name}**"
+            if length + len(name) > 3500:
+                break
+            names.append(name)
+            length += len(name) + 2
+        
+        listed = ", ".join(names)
+        if len(names) < len(members):
+            listed += f" and {len(members) - len(names)} more"
+        
+        if kind == 'welcome':
+            embed = discord.Embed(
+                title=f"🐱 {len(members)} New Friends Arrived!",
+                description=f"🎉 Welcome to **{guild.name}**, {listed}!\n\nMeow! So many new friends at once! Make yourselves comfortable and don't hesitate to ask if you need anything! 🐾💕",
+                color=discord.Color.from_rgb(144, 238, 144),
+                timestamp=datetime.now()
+            )
+            count_text = f"{len(guild.members)} wonderful members! 🎊"
+        else:
+            embed = discord.Embed(
+                title=f"🐱 Goodbye, {len(members)} Friends...",
+                description=f"👋 {listed} have left **{guild.name}**.\n\nMeow... I'll miss them! I hope they come back to visit sometime! 🐾💙",
+                color=discord.Color.from_rgb(200, 200, 255),
+                timestamp=datetime.now()
+            )
+            count_text = f"{len(guild.members)} members remaining"
+        
+        embed.add_field(name="📊 Member Count:", value=count_text, inline=True)
+        # Cute kitten thumbnail would go here
+        
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException:
+            pass  # Bot lacks permissions or Discord refused the message
     
     async def _send_welcome_message(self, guild, member, test=False):
         """Send welcome message to the configured channel"""
-        settings = self.welcome_settings.get(guild.id)
-        if not settings:
+        config = self.configs.peek(guild.id)
+        if not config or not config.welcome_channel_id:
             return
         
-        channel = guild.get_channel(settings['channel_id'])
+        channel = guild.get_channel(config.welcome_channel_id)
         if not channel:
             return
         
         # Use custom message or default
-        if settings['message']:
-            description = settings['message'].replace('{user}', member.mention).replace('{server}', guild.name)
+        template = self._get_template(config, 'welcome')
+        if template:
+            description = template.render(guild, member)
         else:
             description = f"🎉 Welcome to **{guild.name}**, {member.mention}!\n\nMeow! I'm so excited to have a new friend! Make yourself comfortable and don't hesitate to ask if you need anything! 🐾💕"
         
@@ -393,17 +1009,18 @@ class WelcomeCog(commands.Cog):
     
     async def _send_goodbye_message(self, guild, member):
         """Send goodbye message to the configured channel"""
-        settings = self.goodbye_settings.get(guild.id)
-        if not settings:
+        config = self.configs.peek(guild.id)
+        if not config or not config.goodbye_channel_id:
             return
         
-        channel = guild.get_channel(settings['channel_id'])
+        channel = guild.get_channel(config.goodbye_channel_id)
         if not channel:
             return
         
         # Use custom message or default
-        if settings['message']:
-            description = settings['message'].replace('{user}', member.display_name).replace('{server}', guild.name)
+        template = self._get_template(config, 'goodbye')
+        if template:
+            description = template.render(guild, member)
         else:
             description = f"👋 **{member.display_name}** has left **{guild.name}**.\n\nMeow... I'll miss them! I hope they come back to visit sometime! 🐾💙"
         
@@ -2,6 +2,8 @@
 Configuration file for Discord moderation bot
 """
 
+import os
+
 BOT_CONFIG = {
     # Bot command prefix
     'prefix': '!',
@@ -13,12 +15,50 @@ BOT_CONFIG = {
     'max_warnings': 5,  # Maximum warnings before automatic action
     'default_mute_duration': 10,  # Default mute duration in minutes
     'spam_threshold': 5,  # Messages per 10 seconds considered spam
+    'clear_max_messages': 5000,  # Most messages one !clear may delete
+    'clear_scan_limit': 20000,  # Most messages one !clear looks through when filtering
+    'mass_action_max': 1000,  # Most users one !massban/!masskick/!massunban may target
+    'mass_action_concurrency': 5,  # Parallel requests when a bulk endpoint isn't available
+    'lockdown_concurrency': 3,  # Channels edited in parallel during a server or category lockdown
+    'mass_role_workers': 3,  # Parallel role edits for !role all / !role with
+    'mass_role_interval': 0.5,  # Pause after each role edit per worker
+    
+    # Bot mention replies (protects against mass-ping raids)
+    'mention_cooldown': 30,  # Seconds between mention replies in one channel
+    'mention_guild_replies': 3,  # Mention replies allowed per guild per cooldown window
+    
+    # Welcome/goodbye announcements during join bursts
+    'announce_coalesce_seconds': 10,  # Combine member events within this window (0 = off)
+    
+    # Deep scanning of attachments, embeds and long messages
+    'scan_workers': 2,  # Processes for heavy content scans
+    'scan_inline_chars': 2000,  # Longer text is scanned in a worker process
+    'scan_max_attachment_bytes': 262144,  # Larger text attachments aren't downloaded
+    'scan_max_attachments': 3,  # Text attachments scanned per message
+    'scan_timeout': 2.0,  # Seconds before a scan is abandoned
+    
+    # Edited messages
+    'edit_cache_size': 5000,  # Recent messages whose scanned content is remembered to skip no-op edits
+    
+    # Copypasta detection (the same text from many accounts)
+    'copypasta_window': 120,  # Seconds of recent messages remembered per server
+    'copypasta_min_authors': 4,  # Different accounts posting near-identical text before it's removed
+    'copypasta_max_distance': 8,  # SimHash bits two messages may differ by and still count as copies
+    'copypasta_min_length': 30,  # Shorter messages ("lol", "gm") are never compared
+    'copypasta_max_entries': 500,  # Recent messages remembered per server
+    
+    # Mod-log channel posts
+    'modlog_flush_interval': 3,  # Seconds to collect mod-log entries before posting them together
     
     # Logging settings
     'log_level': 'INFO',
     'max_log_entries': 5000,  # Increased for production
     'enable_debug': False,  # Disable debug mode in production
     
+    # Storage settings
+    'database_path': os.getenv('DATABASE_PATH', 'kitten_mod.db'),
+    'config_flush_interval': 5,  # Seconds between batched settings writes
+    
     # Permission roles (these are Discord permission names, not role names)
     'required_permissions': {
         'kick': 'kick_members',
@@ -29,6 +69,17 @@ BOT_CONFIG = {
     }
 }
 
+# Raid detection settings (join-rate based)
+RAID_CONFIG = {
+    'window_seconds': 10,  # Sliding window for counting joins
+    'join_threshold': 10,  # Weighted joins within the window that trigger raid mode
+    'young_account_days': 7,  # Accounts younger than this count as suspicious
+    'young_account_weight': 2,  # How much a suspicious join counts towards the threshold
+    'calm_minutes': 10,  # Raid mode ends after this long without new joins
+    'raise_verification': True,  # Raise the server verification level during a raid
+    'lock_channels': False  # Stop @everyone from talking in text channels during a raid
+}
+
 # Cute kitten message responses
 MESSAGES = {
     'no_permission': "🐱 Meow! You don't have permission to use this command.",
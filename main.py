@@ -4,21 +4,38 @@ import os
 import asyncio
 from config import BOT_CONFIG
 from utils.logging import setup_logging
+from utils.database import Database
+from utils.expiry import ExpiryManager
+from utils.guild_config import GuildConfigStore
+from utils.help import HelpCache
+from utils.lockdown import LockdownStore
+from utils.modlog import ModLogRouter
+from utils.permissions import PermissionLevel, get_permission_level, has_permissions_or_level, permission_cache
+from utils.reactions import ReactionRouter
+from utils.roles import RoleIndex
 from aiohttp import web
 
 # Setup logging
 logger = setup_logging()
 
 # Global variables
-guild_prefixes = {}
 processed_commands = set()
 
+# Persistent storage
+database = Database(BOT_CONFIG['database_path'])
+guild_configs = GuildConfigStore(database, BOT_CONFIG['config_flush_interval'])
+expiries = ExpiryManager(database)
+lockdowns = LockdownStore(database)
+
 # Dynamic prefix function
 def get_prefix(bot, message):
     """Get the prefix for the current guild"""
     if message.guild is None:
         return BOT_CONFIG['prefix']
-    return guild_prefixes.get(message.guild.id, BOT_CONFIG['prefix'])
+    config = guild_configs.peek(message.guild.id)
+    if config is None or config.prefix is None:
+        return BOT_CONFIG['prefix']
+    return config.prefix
 
 # Bot setup with intents
 intents = discord.Intents.default()
@@ -34,6 +51,19 @@ bot = commands.Bot(
     case_insensitive=True
 )
 
+# Shared state for cogs
+bot.database = database
+bot.guild_configs = guild_configs
+bot.expiries = expiries
+bot.lockdowns = lockdowns  # Overwrites saved by lockdowns and raid mode
+bot.reactions = ReactionRouter(bot)  # Routes raw reactions to polls, games, etc. by message ID
+bot.role_index = RoleIndex(bot)  # Role lookups by name without scanning guild.roles
+permission_cache.attach(bot)
+bot.mod_log = ModLogRouter(bot, guild_configs, BOT_CONFIG['modlog_flush_interval'])
+
+# Rendered help embeds, rebuilt only after a prefix change or cog reload
+help_cache = HelpCache(bot)
+
 @bot.before_invoke
 async def before_any_command(ctx):
     """Prevent duplicate command execution"""
@@ -112,96 +142,31 @@ async def on_command_error(ctx, error):
         await ctx.send(embed=embed)
 
 @bot.command(name='help')
-async def help_command(ctx):
-    """Display help information"""
-    embed = discord.Embed(
-        title="🐱 Kitten Mod Help - Purrfect Moderation!",
-        description="Meow! Here are all my cute commands to keep your server safe and cozy! 🐾",
-        color=discord.Color.from_rgb(255, 192, 203)
-    )
-    
-    embed.add_field(
-        name="🐾 Kitten's Moderation Powers",
-        value=f"`{BOT_CONFIG['prefix']}kick <user> [reason]` - Gently escort someone out 🚪\n"
-              f"`{BOT_CONFIG['prefix']}ban <user> [reason]` - Send someone to the timeout corner 🏠\n"
-              f"`{BOT_CONFIG['prefix']}unban <user_id>` - Welcome someone back home 💕\n"
-              f"`{BOT_CONFIG['prefix']}mute <user> [duration] [reason]` - Give someone quiet time 🤫\n"
-              f"`{BOT_CONFIG['prefix']}unmute <user>` - Let someone speak again 🗣️\n"
-              f"`{BOT_CONFIG['prefix']}warn <user> <reason>` - Give a gentle reminder 📝\n"
-              f"`{BOT_CONFIG['prefix']}removewarn <user> <id>` - Remove a reminder ✨\n"
-              f"`{BOT_CONFIG['prefix']}automod <warnings> <action>` - Set auto-actions ⚡",
-        inline=False
-    )
+async def help_command(ctx, *, command_name: str = None):
+    """Display help information, or details about a single command"""
+    prefix = get_prefix(bot, ctx.message)
     
-    embed.add_field(
-        name="⚡ Advanced Moderation",
-        value=f"`{BOT_CONFIG['prefix']}slowmode <seconds>` - Set chat slowmode ⏰\n"
-              f"`{BOT_CONFIG['prefix']}lockdown [minutes]` - Lock channel temporarily 🔒\n"
-              f"`{BOT_CONFIG['prefix']}unlock` - Unlock locked channel 🔓\n"
-              f"`{BOT_CONFIG['prefix']}nickname <user> <name>` - Change nicknames 🏷️\n"
-              f"`{BOT_CONFIG['prefix']}role <user> <role>` - Add/remove roles 👥",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🎮 Fun & Interactive",
-        value=f"`{BOT_CONFIG['prefix']}pet` - Pet the adorable kitten! 🐾\n"
-              f"`{BOT_CONFIG['prefix']}treat` - Give the kitten a yummy treat 🍽️\n"
-              f"`{BOT_CONFIG['prefix']}meow` - Get cat facts and cute sounds 😸\n"
-              f"`{BOT_CONFIG['prefix']}nap` - Put the kitten down for a nap 😴\n"
-              f"`{BOT_CONFIG['prefix']}playtime` - Start fun activities! 🎯",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="📋 Info & Utilities",
-        value=f"`{BOT_CONFIG['prefix']}warnings <user>` - Check reminder history 📚\n"
-              f"`{BOT_CONFIG['prefix']}clear <amount>` - Clean up messages 🧹\n"
-              f"`{BOT_CONFIG['prefix']}userinfo <user>` - Learn about someone 👤\n"
-              f"`{BOT_CONFIG['prefix']}remind <time> <msg>` - Set cute reminders ⏰\n"
-              f"`{BOT_CONFIG['prefix']}poll <question>` - Create polls 📊",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🎊 Welcome System",
-        value=f"`{BOT_CONFIG['prefix']}welcome setup` - Configure welcomes 🎉\n"
-              f"`{BOT_CONFIG['prefix']}goodbye setup` - Configure goodbyes 👋\n"
-              f"`{BOT_CONFIG['prefix']}autorole set <role>` - Auto-assign roles 🏷️",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="⚙️ Bot Settings",
-        value=f"`{BOT_CONFIG['prefix']}prefix` - Show current prefix\n"
-              f"`{BOT_CONFIG['prefix']}prefix <new>` - Change bot prefix 🔧",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="✨ Extra Fun",
-        value=f"`{BOT_CONFIG['prefix']}8ball <question>` - Ask the magic kitten 🔮\n"
-              f"`{BOT_CONFIG['prefix']}compliment [user]` - Send sweet words 💕",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="💝 Kitty Note",
-        value="Meow! Only moderators with the right permissions can use moderation powers. Everyone can enjoy the fun commands! I'm here to help keep everyone safe and happy! 🐱💕",
-        inline=False
-    )
+    if command_name:
+        embed = help_cache.get_command_page(prefix, command_name.lower())
+        if embed is None:
+            embed = discord.Embed(
+                title="🐱 Unknown Command",
+                description=f"Meow! I don't know a command called `{command_name}`. Try `{prefix}help` to see everything I can do! 🐾",
+                color=discord.Color.from_rgb(255, 182, 193)
+            )
+        await ctx.send(embed=embed)
+        return
     
-    await ctx.send(embed=embed)
+    level = get_permission_level(ctx.author) if ctx.guild else PermissionLevel.MEMBER
+    await ctx.send(embed=help_cache.get_overview(prefix, level))
 
-@bot.command(name='prefix')
-@commands.has_permissions(administrator=True)
+@bot.command(name='prefix', extras={'permission_level': PermissionLevel.ADMIN})
+@has_permissions_or_level(PermissionLevel.ADMIN, administrator=True)
 async def change_prefix(ctx, *, new_prefix = None):
     """Change the bot's command prefix for this server"""
-    global guild_prefixes
-    
     if new_prefix is None:
         # Show current prefix
-        current_prefix = guild_prefixes.get(ctx.guild.id, BOT_CONFIG['prefix'])
+        current_prefix = get_prefix(bot, ctx.message)
         embed = discord.Embed(
             title="🐱 Current Prefix",
             description=f"Meow! My current prefix in this server is: **{current_prefix}**\n\nTo change it, use: `{current_prefix}prefix <new_prefix>` 🐾",
@@ -230,8 +195,11 @@ async def change_prefix(ctx, *, new_prefix = None):
         return
     
     # Store the new prefix for this guild
-    old_prefix = guild_prefixes.get(ctx.guild.id, BOT_CONFIG['prefix'])
-    guild_prefixes[ctx.guild.id] = new_prefix
+    old_prefix = get_prefix(bot, ctx.message)
+    config = guild_configs.get(ctx.guild.id)
+    config.prefix = new_prefix
+    guild_configs.mark_dirty(ctx.guild.id)
+    help_cache.invalidate()
     
     embed = discord.Embed(
         title="🐱 Prefix Changed!",
@@ -259,16 +227,37 @@ async def load_cogs():
             logger.info(f"Loaded {cog}")
         except Exception as e:
             logger.error(f"Failed to load {cog}: {e}")
+    
+    # Command set may have changed
+    help_cache.invalidate()
 
 async def health_check(request):
     """Health check endpoint for Render"""
-    return web.json_response({"status": "healthy", "bot": bot.user.name if bot.user else "Starting..."})
+    return web.json_response({
+        "status": "healthy",
+        "bot": bot.user.name if bot.user else "Starting...",
+        "permission_cache": permission_cache.stats()
+    })
 
 async def main():
     """Main function to start the bot"""
     async with bot:
+        # Load stored settings before any cog can read them
+        await database.connect()
+        await guild_configs.load()
+        for config in guild_configs.configs.values():
+            if config.role_levels:
+                permission_cache.set_role_levels(config.guild_id, config.role_levels)
+        guild_configs.start()
+        await expiries.load()
+        await lockdowns.load()
+        
         await load_cogs()
         
+        # Cogs have registered their expiry handlers; reconcile once the cache is ready
+        expiries.start(bot)
+        bot.reactions.start()
+        
         # Get token from environment variable
         token = os.getenv('DISCORD_TOKEN')
         if not token:
@@ -288,7 +277,15 @@ async def main():
         logger.info("Health check server started on port 10000")
         
         # Start the bot
-        await bot.start(token)
+        try:
+            await bot.start(token)
+        finally:
+            # Write pending settings before shutting down
+            expiries.stop()
+            bot.reactions.stop()
+            await bot.mod_log.close()
+            await guild_configs.close()
+            await database.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
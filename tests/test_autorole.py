@@ -0,0 +1,75 @@
+import asyncio
+from functools import total_ordering
+from types import SimpleNamespace
+
+import discord
+
+from utils.autorole import AutoroleQueue
+
+@total_ordering
+class FakeRole:
+    def __init__(self, role_id, position):
+        self.id = role_id
+        self.position = position
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+    def __hash__(self):
+        return self.id
+
+def error(cls, status):
+    return cls(SimpleNamespace(status=status, reason='nope'), 'nope')
+
+class FakeMember:
+    def __init__(self, member_id, guild, roles=(), failures=()):
+        self.id = member_id
+        self.guild = guild
+        self.roles = list(roles)
+        self.failures = list(failures)  # Exceptions for the next add_roles calls
+        self.calls = 0
+
+    async def add_roles(self, *roles, reason):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        self.roles.extend(roles)
+
+ROLES = {1: FakeRole(1, 1), 2: FakeRole(2, 2), 9: FakeRole(9, 9)}
+GUILD = SimpleNamespace(get_role=ROLES.get, me=SimpleNamespace(top_role=FakeRole(5, 5)))
+
+def drain(*members, role_ids=(1, 2)):
+    queue = AutoroleQueue(1, max_retries=2, base_delay=0, min_interval=0)
+
+    async def main():
+        for member in members:
+            queue.enqueue(member, role_ids)
+        await queue.worker
+
+    asyncio.run(main())
+    return queue
+
+def test_members_get_missing_roles_in_one_call():
+    member = FakeMember(1, GUILD, roles=[ROLES[1]])
+    queue = drain(member, role_ids=(1, 2, 9))  # 9 is above the bot's top role
+    assert member.roles == [ROLES[1], ROLES[2]] and member.calls == 1
+    assert queue.succeeded == 1 and queue.depth == 0
+
+def test_members_with_every_role_are_skipped():
+    queue = drain(FakeMember(1, GUILD, roles=[ROLES[1], ROLES[2]]))
+    assert queue.skipped == 1
+
+def test_server_errors_are_retried():
+    member = FakeMember(1, GUILD, failures=[error(discord.HTTPException, 503), error(discord.HTTPException, 429)])
+    queue = drain(member)
+    assert member.calls == 3 and queue.retried == 2 and queue.succeeded == 1
+
+def test_permanent_failures_are_not_retried():
+    forbidden = FakeMember(1, GUILD, failures=[error(discord.Forbidden, 403)])
+    flaky = FakeMember(2, GUILD, failures=[error(discord.HTTPException, 500)] * 3)
+    queue = drain(forbidden, flaky)
+    assert forbidden.calls == 1 and flaky.calls == 3
+    assert queue.failed == 2
@@ -0,0 +1,41 @@
+from utils.copypasta import CopypastaTracker, simhash
+
+PASTE = "FREE NITRO for everyone who clicks this link before midnight, hurry up and claim it"
+
+def distance(a, b):
+    return bin(simhash(a) ^ simhash(b)).count('1')
+
+def test_near_copies_have_close_fingerprints():
+    assert distance(PASTE, PASTE) == 0
+    assert distance(PASTE, PASTE.replace("midnight", "tonight")) <= 16
+    assert distance(PASTE, "does anyone want to play some games later this evening?") > 16
+
+def test_cluster_trips_at_min_authors():
+    tracker = CopypastaTracker(window_seconds=60, min_authors=3, max_distance=16)
+    assert tracker.add(1, 10, 100, author_id=1, text=PASTE, now=0) == []
+    assert tracker.add(1, 10, 101, author_id=2, text=PASTE, now=1) == []
+    cluster = tracker.add(1, 10, 102, author_id=3, text=PASTE, now=2)
+    assert sorted(entry.message_id for entry in cluster) == [100, 101, 102]
+
+def test_same_author_repeating_does_not_trip():
+    tracker = CopypastaTracker(window_seconds=60, min_authors=2, max_distance=16)
+    for message_id in range(5):
+        assert tracker.add(1, 10, message_id, author_id=1, text=PASTE, now=message_id) == []
+
+def test_later_copies_join_a_tripped_cluster():
+    tracker = CopypastaTracker(window_seconds=60, min_authors=2, max_distance=16)
+    tracker.add(1, 10, 100, author_id=1, text=PASTE, now=0)
+    tracker.add(1, 10, 101, author_id=2, text=PASTE, now=1)
+    late = tracker.add(1, 10, 102, author_id=3, text=PASTE, now=2)
+    assert [entry.message_id for entry in late] == [102]
+
+def test_old_messages_leave_the_window():
+    tracker = CopypastaTracker(window_seconds=10, min_authors=2, max_distance=16)
+    tracker.add(1, 10, 100, author_id=1, text=PASTE, now=0)
+    assert tracker.add(1, 10, 101, author_id=2, text=PASTE, now=20) == []
+    assert len(tracker.guilds[1].entries) == 1
+
+def test_guilds_are_tracked_separately():
+    tracker = CopypastaTracker(window_seconds=60, min_authors=2, max_distance=16)
+    tracker.add(1, 10, 100, author_id=1, text=PASTE, now=0)
+    assert tracker.add(2, 20, 101, author_id=2, text=PASTE, now=1) == []
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import discord
+
+from cogs.moderation import EXPIRY_RETRY_SECONDS, ModerationCog
+from utils.database import Database
+from utils.expiry import ExpiryManager
+
+def run_with_db(path, test):
+    async def main():
+        db = Database(str(path))
+        await db.connect()
+        try:
+            await test(db)
+        finally:
+            await db.close()
+    asyncio.run(main())
+
+async def stored(db):
+    return await db.fetchall("SELECT kind, guild_id, target_id FROM mod_expiries")
+
+def test_expiries_survive_a_restart_and_fire_when_overdue(tmp_path):
+    async def test(db):
+        first = ExpiryManager(db)
+        await first.load()
+        await first.add('unban', 1, 42, time.time() - 5)
+        await first.add('unmute', 1, 43, time.time() + 3600, {'role_id': 7})
+
+        fired = []
+
+        async def handler(guild_id, target_id, data):
+            fired.append((guild_id, target_id))
+
+        restarted = ExpiryManager(db)
+        restarted.register('unban', handler)
+        restarted.register('unmute', handler)
+        await restarted.load()
+        assert restarted.get('unmute', 1, 43)['data'] == {'role_id': 7}
+
+        restarted.scheduler.start()
+        await asyncio.sleep(0.05)
+        restarted.stop()
+        assert fired == [(1, 42)]
+        assert await stored(db) == [('unmute', 1, 43)]
+
+    run_with_db(tmp_path / 'bot.db', test)
+
+def test_handler_can_reschedule_itself(tmp_path):
+    async def test(db):
+        expiries = ExpiryManager(db)
+        await expiries.load()
+
+        async def retry(guild_id, target_id, data):
+            await expiries.add('unban', guild_id, target_id, time.time() + 60, {'attempt': 1})
+
+        expiries.register('unban', retry)
+        expiry_id = await expiries.add('unban', 1, 42, time.time())
+        await expiries._fire(expiry_id)
+
+        assert await stored(db) == [('unban', 1, 42)]
+        assert expiries.get('unban', 1, 42)['data'] == {'attempt': 1}
+
+    run_with_db(tmp_path / 'bot.db', test)
+
+def test_manual_remove_cancels(tmp_path):
+    async def test(db):
+        expiries = ExpiryManager(db)
+        await expiries.load()
+        await expiries.add('unmute', 1, 42, time.time() + 60)
+        assert await expiries.remove('unmute', 1, 42)
+        assert not await expiries.remove('unmute', 1, 42)
+        assert await stored(db) == [] and len(expiries.scheduler) == 0
+
+    run_with_db(tmp_path / 'bot.db', test)
+
+def fake_cog(guild, added):
+    async def add(kind, guild_id, target_id, expires_at, data=None):
+        added.append((kind, round(expires_at - time.time()), data))
+
+    cog = SimpleNamespace(
+        bot=SimpleNamespace(get_guild=lambda guild_id: guild, expiries=SimpleNamespace(add=add)),
+        muted_users={}, _log_action=lambda *args: None
+    )
+    cog._retry_expiry = lambda *args: ModerationCog._retry_expiry(cog, *args)
+    return cog
+
+def test_failed_unban_is_retried_with_backoff():
+    async def unban(user, reason):
+        raise discord.HTTPException(SimpleNamespace(status=503, reason='Service Unavailable'), 'down')
+
+    added = []
+    cog = fake_cog(SimpleNamespace(unavailable=False, unban=unban), added)
+    asyncio.run(ModerationCog._expire_tempban(cog, 1, 42, {}))
+    asyncio.run(ModerationCog._expire_tempban(cog, 1, 42, added[-1][2]))
+    assert added == [
+        ('unban', EXPIRY_RETRY_SECONDS, {'attempt': 1}),
+        ('unban', EXPIRY_RETRY_SECONDS * 2, {'attempt': 2}),
+    ]
+
+def test_unmute_waits_for_an_unavailable_guild():
+    added = []
+    asyncio.run(ModerationCog._expire_mute(fake_cog(None, added), 1, 42, {'role_id': 7}))
+    assert added == [('unmute', EXPIRY_RETRY_SECONDS, {'role_id': 7, 'attempt': 1})]
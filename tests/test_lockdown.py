@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from utils.database import Database
+from utils.lockdown import LockdownStore, raid_scope, restore_channels, restored_overwrite
+
+EVERYONE = object()
+
+class FakeChannel:
+    def __init__(self, channel_id, overwrite=None, fail=False):
+        self.id = channel_id
+        self.guild = SimpleNamespace(id=1)
+        self.overwrites = {EVERYONE: overwrite} if overwrite is not None else {}
+        self.fail = fail
+
+    async def set_permissions(self, role, overwrite, reason):
+        if self.fail:
+            raise discord.HTTPException(SimpleNamespace(status=500, reason='oops'), 'oops')
+        if overwrite is None:
+            self.overwrites.pop(role, None)
+        else:
+            self.overwrites[role] = overwrite
+
+def run_with_store(path, test):
+    async def main():
+        db = Database(str(path))
+        await db.connect()
+        try:
+            store = LockdownStore(db)
+            await store.load()
+            await test(db, store)
+        finally:
+            await db.close()
+    asyncio.run(main())
+
+def test_snapshots_survive_a_restart(tmp_path):
+    async def test(db, store):
+        overwrite = discord.PermissionOverwrite(read_messages=True, add_reactions=False)
+        await store.save([FakeChannel(10, overwrite), FakeChannel(11)], EVERYONE, scope_id=5)
+        await store.save([FakeChannel(12)], EVERYONE, scope_id=raid_scope(1))
+
+        restarted = LockdownStore(db)
+        await restarted.load()
+        assert {s['channel_id'] for s in restarted.for_scope(5)} == {10, 11}
+        assert [s['channel_id'] for s in restarted.for_scope(raid_scope(1))] == [12]
+        assert restored_overwrite(restarted.snapshots[10]) == overwrite
+        assert restored_overwrite(restarted.snapshots[11]) is None
+
+    run_with_store(tmp_path / 'bot.db', test)
+
+def test_restore_puts_back_overwrites_and_keeps_failures(tmp_path):
+    async def test(db, store):
+        original = discord.PermissionOverwrite(embed_links=False)
+        channels = {10: FakeChannel(10, original), 11: FakeChannel(11), 12: FakeChannel(12, fail=True)}
+        await store.save(channels.values(), EVERYONE, scope_id=5)
+        await store.save([FakeChannel(13)], EVERYONE, scope_id=5)  # Deleted since
+
+        for channel in channels.values():
+            channel.overwrites[EVERYONE] = discord.PermissionOverwrite(send_messages=False)
+
+        guild = SimpleNamespace(default_role=EVERYONE, get_channel=channels.get)
+        restored, failed = await restore_channels(guild, store, store.for_scope(5), "test")
+
+        assert (restored, failed) == (2, 1)
+        assert channels[10].overwrites[EVERYONE] == original
+        assert EVERYONE not in channels[11].overwrites
+        assert [s['channel_id'] for s in store.for_scope(5)] == [12]
+
+    run_with_store(tmp_path / 'bot.db', test)
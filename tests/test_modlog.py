@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from utils.modlog import CHARS_PER_MESSAGE, EMBEDS_PER_MESSAGE, ModLogRouter, pack_batches
+
+EVERYONE = object()
+BOT = object()
+
+class FakeChannel:
+    def __init__(self, channel_id, name, public=False, fail=(), bad=()):
+        self.id = channel_id
+        self.name = name
+        self.category = None
+        self.guild = None
+        self.public = public
+        self.fail = list(fail)  # HTTP statuses for the next sends
+        self.bad = list(bad)  # Embeds Discord refuses
+        self.sent = []
+
+    def permissions_for(self, target):
+        return SimpleNamespace(view_channel=self.public or target is BOT, send_messages=True)
+
+    async def send(self, embeds):
+        if self.fail:
+            status = self.fail.pop(0)
+            raise discord.HTTPException(SimpleNamespace(status=status, reason='nope'), 'nope')
+        too_big = sum(len(embed) for embed in embeds) > CHARS_PER_MESSAGE or len(embeds) > EMBEDS_PER_MESSAGE
+        if too_big or any(embed is bad for embed in embeds for bad in self.bad):
+            raise discord.HTTPException(SimpleNamespace(status=400, reason='Bad Request'), 'too big')
+        self.sent.append(list(embeds))
+
+def make_guild(*channels):
+    guild = SimpleNamespace(id=1, text_channels=list(channels), me=BOT, default_role=EVERYONE)
+    guild.get_channel = lambda channel_id: next((c for c in channels if c.id == channel_id), None)
+    for channel in channels:
+        channel.guild = guild
+    return guild
+
+def make_router(guild, modlog_channel_id=None):
+    configs = SimpleNamespace(peek=lambda guild_id: SimpleNamespace(modlog_channel_id=modlog_channel_id))
+    return ModLogRouter(SimpleNamespace(get_guild=lambda guild_id: guild), configs)
+
+def embed(chars=10):
+    return discord.Embed(title="x" * chars)
+
+def test_batches_respect_count_and_length():
+    batches = pack_batches([embed(2500) for _ in range(5)] + [embed() for _ in range(12)])
+    assert all(len(batch) <= EMBEDS_PER_MESSAGE for batch in batches)
+    assert all(sum(len(e) for e in batch) <= CHARS_PER_MESSAGE for batch in batches)
+    assert sum(len(batch) for batch in batches) == 17
+
+def test_public_channels_are_never_discovered():
+    public = FakeChannel(1, 'modern-art', public=True)
+    private = FakeChannel(2, 'mod-log')
+    router = make_router(make_guild(public, private))
+    assert router.channel_for(public.guild) is private
+    guild = make_guild(FakeChannel(3, 'minecraft-mods', public=True))
+    assert make_router(guild).channel_for(guild) is None
+
+def test_configured_channel_is_used_even_if_public():
+    channel = FakeChannel(5, 'logs', public=True)
+    router = make_router(make_guild(channel), modlog_channel_id=5)
+    assert router.channel_for(channel.guild) is channel
+
+def test_bad_entry_is_split_out_and_dropped():
+    entries = [embed() for _ in range(4)]
+    channel = FakeChannel(1, 'mod-log', bad=[entries[1]])
+    router = make_router(make_guild(channel))
+    router.buffers[1] = list(entries)
+    assert asyncio.run(router.flush()) == 2
+    assert [id(e) for batch in channel.sent for e in batch] == [id(entries[i]) for i in (0, 2, 3)]
+    assert not router.buffers
+
+def test_temporary_failures_are_requeued_in_order():
+    channel = FakeChannel(1, 'mod-log', fail=[503])
+    router = make_router(make_guild(channel))
+    first = [embed() for _ in range(3)]
+    router.buffers[1] = list(first)
+    assert asyncio.run(router.flush()) == 0
+    assert router.buffers[1] == first
+    assert asyncio.run(router.flush()) == 1
+    assert channel.sent == [first]
+
+def test_forbidden_channel_drops_pending_entries():
+    channel = FakeChannel(1, 'mod-log', fail=[403])
+    router = make_router(make_guild(channel))
+    router.buffers[1] = [embed() for _ in range(3)]
+    assert asyncio.run(router.flush()) == 0
+    assert not router.buffers and not router.discovered
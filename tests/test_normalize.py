@@ -0,0 +1,24 @@
+from utils.normalize import NormalizedText, fold_text, normalize_terms
+
+def test_ascii_is_just_lowercased():
+    assert fold_text("Hello There") == "hello there"
+
+def test_zero_width_and_confusables_are_folded():
+    # Cyrillic с/і and a zero-width space
+    assert fold_text("сlі​ck") == "click"
+
+def test_fullwidth_letters_fold_through_nfkc():
+    assert fold_text("ＦＲＥＥ") == "free"
+
+def test_leet_is_kept_separate_from_folded():
+    text = NormalizedText("fr3e n1tr0")
+    assert text.folded == "fr3e n1tr0"
+    assert text.leet == "free nitro"
+
+def test_find_any_matches_evasive_text():
+    terms = normalize_terms(['Free Nitro', 'scam'])
+    assert NormalizedText("get ｆr3e n​1tro now").find_any(terms) == 'free nitro'
+    assert NormalizedText("nothing to see here").find_any(terms) is None
+
+def test_normalize_terms_drops_duplicates_and_blanks():
+    assert normalize_terms(['Spam', 'sp@m', '', 'SPAM']) == ['spam']
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.permissions import PermissionCache, PermissionLevel
+
+def member(member_id, role_ids=(), position=1, guild_id=1, owner_id=999, **perms):
+    guild = SimpleNamespace(id=guild_id, owner_id=owner_id)
+    permissions = SimpleNamespace(administrator=False, kick_members=False, ban_members=False,
+                                  manage_messages=False, manage_roles=False)
+    permissions.__dict__.update(perms)
+    return SimpleNamespace(
+        id=member_id, guild=guild, guild_permissions=permissions,
+        roles=[SimpleNamespace(id=role_id) for role_id in role_ids],
+        top_role=SimpleNamespace(position=position)
+    )
+
+def test_resolve_is_cached():
+    cache = PermissionCache()
+    moderator = member(1, kick_members=True, position=5)
+    assert cache.resolve(moderator) == (PermissionLevel.MODERATOR, 5, PermissionLevel.MEMBER)
+    cache.resolve(moderator)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_role_mapping_raises_level_and_invalidates():
+    cache = PermissionCache()
+    helper = member(1, role_ids=[50])
+    assert cache.resolve(helper)[0] == PermissionLevel.MEMBER
+    cache.set_role_levels(1, {50: PermissionLevel.ADMIN})
+    assert cache.resolve(helper) == (PermissionLevel.ADMIN, 1, PermissionLevel.ADMIN)
+
+def test_role_change_invalidates_member_only():
+    cache = PermissionCache()
+    before, other = member(1), member(2)
+    cache.resolve(before)
+    cache.resolve(other)
+    after = member(1, role_ids=[7], administrator=True)
+    asyncio.run(cache.on_member_update(before, after))
+    assert 1 not in cache.guilds[1] and 2 in cache.guilds[1]
+    assert cache.resolve(after)[0] == PermissionLevel.ADMIN
+
+def test_owner_change_invalidates_guild():
+    cache = PermissionCache()
+    cache.resolve(member(1))
+    cache.resolve(member(3, guild_id=2))
+    asyncio.run(cache.on_guild_update(SimpleNamespace(id=1, owner_id=999), SimpleNamespace(id=1, owner_id=1)))
+    assert list(cache.guilds) == [2]
+    assert cache.resolve(member(1, owner_id=1))[0] == PermissionLevel.OWNER
+
+def test_each_guild_keeps_its_most_recent_members():
+    cache = PermissionCache(max_members=2)
+    first, second, third = member(1), member(2), member(3)
+    cache.resolve(first)
+    cache.resolve(second)
+    cache.resolve(first)
+    cache.resolve(third)
+    assert list(cache.guilds[1]) == [1, 3]
+    assert cache.stats()['entries'] == 2
+
+def test_leaving_a_guild_drops_its_entries():
+    cache = PermissionCache()
+    cache.set_role_levels(1, {50: PermissionLevel.MODERATOR})
+    cache.resolve(member(1))
+    asyncio.run(cache.on_guild_remove(SimpleNamespace(id=1)))
+    assert not cache.guilds and not cache.role_levels
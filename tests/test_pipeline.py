@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.guild_config import GuildConfig
+from utils.pipeline import ALL_FEATURES, ContentHashCache, FilterFeature, MessagePipeline
+
+def message(content="hello", guild=True):
+    return SimpleNamespace(id=1, content=content, guild=SimpleNamespace(id=1) if guild else None)
+
+def make_pipeline(calls, handled=()):
+    pipeline = MessagePipeline()
+
+    def stage(name):
+        async def handler(context):
+            calls.append(name)
+            return name in handled
+        return handler
+
+    pipeline.register('expensive', stage('expensive'), cost=30, feature=FilterFeature.COPYPASTA)
+    pipeline.register('cheap', stage('cheap'), cost=10, feature=FilterFeature.WORDS)
+    pipeline.register('reply', stage('reply'), cost=20, skip_exempt=False, guild_only=False, edits=False)
+    return pipeline
+
+def run(pipeline, msg, features=ALL_FEATURES, exempt=False, edited=False):
+    lookups = []
+
+    def is_exempt(m):
+        lookups.append(m)
+        return exempt
+
+    result = asyncio.run(pipeline.run(msg, features, is_exempt, edited=edited))
+    return result, len(lookups)
+
+def test_stages_run_cheapest_first_until_one_handles_it():
+    calls = []
+    result, _ = run(make_pipeline(calls, handled={'reply'}), message())
+    assert result == 'reply'
+    assert calls == ['cheap', 'reply']
+
+def test_disabled_features_are_skipped():
+    calls = []
+    run(make_pipeline(calls), message(), features=ALL_FEATURES & ~FilterFeature.WORDS)
+    assert calls == ['reply', 'expensive']
+
+def test_exemption_is_looked_up_once_and_only_for_stages_that_need_it():
+    calls = []
+    result, lookups = run(make_pipeline(calls), message(), exempt=True)
+    assert result is None and calls == ['reply'] and lookups == 1
+
+def test_edits_skip_reply_stages_and_dms_skip_guild_stages():
+    calls = []
+    run(make_pipeline(calls), message(), edited=True)
+    assert calls == ['cheap', 'expensive']
+    calls.clear()
+    run(make_pipeline(calls), message(guild=False))
+    assert calls == ['reply']
+
+def test_a_failing_stage_does_not_stop_the_rest():
+    pipeline = MessagePipeline()
+
+    async def broken(context):
+        raise RuntimeError("boom")
+
+    async def words(context):
+        return 'spam' in context.text.folded
+
+    pipeline.register('broken', broken, cost=1)
+    pipeline.register('words', words, cost=2)
+    assert run(pipeline, message("SPAM"))[0] == 'words'
+    assert pipeline.stats()['broken']['calls'] == 1
+
+def test_new_filters_start_enabled_for_existing_configs():
+    config = GuildConfig.from_dict(1, {'filter_disabled': FilterFeature.SPAM})
+    features = ALL_FEATURES & ~config.filter_disabled
+    assert not features & FilterFeature.SPAM
+    assert features & FilterFeature.COPYPASTA and features & FilterFeature.WORDS
+
+def test_hash_cache_skips_unchanged_edits():
+    cache = ContentHashCache(max_size=10)
+    assert cache.changed(1, "hello")
+    assert not cache.changed(1, "hello")  # Embed unfurl, same text
+    assert cache.changed(1, "hello there")
+
+def test_hash_cache_forgets_least_recent_messages():
+    cache = ContentHashCache(max_size=2)
+    cache.changed(1, "a")
+    cache.changed(2, "b")
+    cache.changed(1, "a")
+    cache.changed(3, "c")
+    assert list(cache.hashes) == [1, 3]
+    assert cache.changed(2, "b")
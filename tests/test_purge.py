@@ -0,0 +1,69 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.purge import MAX_REGEX_INPUT_CHARS, MAX_REGEX_LENGTH, compile_safe_regex, parse_purge_filter
+
+def test_flags_and_users():
+    purge_filter = parse_purge_filter("<@!123456789012345678> bots links attachments")
+    assert purge_filter.user_ids == {123456789012345678}
+    assert purge_filter.bots_only and purge_filter.links_only and purge_filter.attachments_only
+
+def test_contains_takes_rest_of_line():
+    purge_filter = parse_purge_filter("bots contains Free Nitro links")
+    assert purge_filter.bots_only
+    assert purge_filter.contains == "free nitro links"
+    assert not purge_filter.links_only
+
+def test_regex_is_case_insensitive():
+    purge_filter = parse_purge_filter(r"regex discord\.gg/\w+")
+    assert purge_filter.pattern.search("join DISCORD.GG/abc")
+
+@pytest.mark.parametrize('text', ["nonsense", "contains", "regex"])
+def test_invalid_filters_raise(text):
+    with pytest.raises(ValueError):
+        parse_purge_filter(text)
+
+@pytest.mark.parametrize('pattern', [
+    r"\w+@gmail\.com",
+    r".*free nitro",
+    r"(ab|cd) \w+",
+    r"(?:spam){2,5}",
+    r"^\d{3}-\d{4}$",
+])
+def test_safe_patterns_compile(pattern):
+    assert compile_safe_regex(pattern)
+
+@pytest.mark.parametrize('pattern', [
+    r"(a+)+$",  # Nested unbounded repeats
+    r"(a*)*b",
+    r"(.*a){20}",  # Repeat inside a bounded repeat
+    r"(a|aa)+",  # Alternation inside a repeat
+    r"(\w)\1+",  # Backreference
+    r"a+b+c+d+",  # Too many unbounded repeats
+    r".*a.*a.*b",  # Polynomial backtracking
+    r"\w*a\w*a\w*b",
+    r"\w+@\w+\.com",
+    r"\w{0,9}a\w{0,9}a\w{0,9}a\w{0,9}b",  # Wide bounded repeats add up too
+    r"(unclosed",  # Invalid
+    "a" * (MAX_REGEX_LENGTH + 1),  # Too long
+])
+def test_dangerous_patterns_are_rejected(pattern):
+    with pytest.raises(ValueError):
+        compile_safe_regex(pattern)
+
+def message(content):
+    return SimpleNamespace(content=content, pinned=False, author=SimpleNamespace(id=1, bot=False), attachments=[])
+
+def test_regex_only_sees_start_of_long_messages():
+    purge_filter = parse_purge_filter("regex spam$")
+    assert purge_filter.matches(message("a" * 10 + "spam"))
+    assert not purge_filter.matches(message("a" * MAX_REGEX_INPUT_CHARS + "spam"))
+
+@pytest.mark.parametrize('pattern', [r".*x", r"\w{0,9}a\w{0,9}a\w{0,9}b"])
+def test_accepted_patterns_stay_fast_on_hostile_input(pattern):
+    purge_filter = parse_purge_filter(f"regex {pattern}")
+    start = time.perf_counter()
+    purge_filter.matches(message("a" * 20000))
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,46 @@
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from cogs.welcome import WelcomeCog
+from utils.raid import JoinRateDetector
+
+def test_detector_trips_on_weighted_burst():
+    detector = JoinRateDetector(window_seconds=10, join_threshold=5, young_account_days=7, young_account_weight=2)
+    assert not detector.record(0, young=False)
+    assert not detector.record(1, young=True)
+    assert detector.record(2, young=True)
+
+def test_detector_forgets_joins_outside_window():
+    detector = JoinRateDetector(window_seconds=10, join_threshold=3, young_account_days=7, young_account_weight=2)
+    detector.record(0, young=False)
+    detector.record(1, young=False)
+    assert not detector.record(20, young=False)
+    assert len(detector.joins) == 1 and detector.score == 1
+
+def test_young_accounts():
+    detector = JoinRateDetector(10, 3, young_account_days=7, young_account_weight=2)
+    now = datetime.now(timezone.utc)
+    assert detector.is_young(now - timedelta(days=1), now)
+    assert not detector.is_young(now - timedelta(days=30), now)
+
+def test_members_who_joined_during_a_raid_get_autoroles_afterwards():
+    config = SimpleNamespace(autoroles=[5], raid_settings={})
+    bot = SimpleNamespace(
+        guild_configs=SimpleNamespace(peek=lambda guild_id: config),
+        expiries=SimpleNamespace(register=lambda kind, handler: None)
+    )
+    cog = WelcomeCog(bot)
+    queued = []
+    cog._queue_autoroles = lambda guild_id, members, role_ids: queued.extend((m.id, tuple(role_ids)) for m in members)
+
+    started_at = time.time()
+    joined = lambda seconds: datetime.fromtimestamp(started_at + seconds, timezone.utc)
+    guild = SimpleNamespace(id=1, members=[
+        SimpleNamespace(id=10, bot=False, joined_at=joined(-3600)),  # Long-time member
+        SimpleNamespace(id=11, bot=False, joined_at=joined(30)),  # Held back by the raid
+        SimpleNamespace(id=12, bot=True, joined_at=joined(40)),
+    ])
+
+    assert cog._release_held_autoroles(guild, started_at) == 1
+    assert queued == [(11, (5,))]
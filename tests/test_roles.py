@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.roles import RoleIndex
+
+def role(role_id, name, position):
+    return SimpleNamespace(id=role_id, name=name, position=position, is_default=lambda: False)
+
+def make_index(*roles):
+    by_id = {r.id: r for r in roles}
+    guild = SimpleNamespace(id=1, roles=list(roles), get_role=by_id.get)
+    for r in roles:
+        r.guild = guild
+    index = RoleIndex(SimpleNamespace(add_listener=lambda handler, name: None))
+    return index, guild, by_id
+
+def names(roles):
+    return [r.name for r in roles]
+
+def test_exact_match_ignores_case_and_spacing():
+    index, guild, _ = make_index(role(100000000000000001, "Cool  Cats", 2), role(100000000000000002, "Cool Catnip", 3))
+    assert names(index.find(guild, "cool cats")) == ["Cool  Cats"]
+
+def test_prefix_matches_highest_first():
+    index, guild, _ = make_index(role(100000000000000001, "Cool Cats", 2), role(100000000000000002, "Cool Catnip", 3))
+    assert names(index.find(guild, "cool cat")) == ["Cool Catnip", "Cool Cats"]
+
+def test_fuzzy_match_and_mentions():
+    index, guild, _ = make_index(role(100000000000000001, "Moderator", 5), role(100000000000000002, "Member", 1))
+    assert names(index.find(guild, "moderatr")) == ["Moderator"]
+    assert names(index.find(guild, "<@&100000000000000002>")) == ["Member"]
+    assert index.find(guild, "zzzz") == []
+
+def test_index_follows_role_events():
+    index, guild, by_id = make_index(role(100000000000000001, "Kitten", 1))
+    index.find(guild, "kitten")  # Builds the index
+
+    renamed = role(100000000000000001, "Cat", 1)
+    renamed.guild = guild
+    by_id[renamed.id] = renamed
+    asyncio.run(index.on_guild_role_update(SimpleNamespace(name="Kitten"), renamed))
+    assert index.find(guild, "kitten") == []
+    assert names(index.find(guild, "cat")) == ["Cat"]
+
+    asyncio.run(index.on_guild_role_delete(renamed))
+    assert index.find(guild, "cat") == []
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from utils.normalize import normalize_terms
+from utils.scanning import SCAN_TIMED_OUT, DeepScanner
+
+def nap(seconds, terms):
+    """Stand-in for a scan job (runs in a worker process)"""
+    time.sleep(seconds)
+    return None
+
+def run_scanner(test, workers=1, timeout=0.5):
+    scanner = DeepScanner(workers=workers, inline_chars=100, max_attachment_bytes=1000,
+                          max_attachments=2, timeout=timeout)
+
+    async def main():
+        # Start the worker up front so process startup isn't part of the timings
+        await scanner._run(nap, 0, [])
+        return await test(scanner)
+
+    try:
+        return asyncio.run(main())
+    finally:
+        scanner.close()
+
+def test_waiting_for_a_busy_worker_is_not_a_timeout():
+    async def test(scanner):
+        return await asyncio.gather(*(scanner._run(nap, 0.2, []) for _ in range(4)))
+
+    assert run_scanner(test) == [None] * 4
+
+def test_a_job_that_overruns_counts_as_a_hit():
+    async def test(scanner):
+        result = await scanner._run(nap, 1, [])
+        # The overrunning job keeps its worker, so the next job's timer only starts once it's free
+        follow_up = await scanner._run(nap, 0.2, [])
+        return result, follow_up, scanner.timeouts
+
+    assert run_scanner(test, timeout=0.4) == (SCAN_TIMED_OUT, None, 1)
+
+def test_short_content_is_checked_inline():
+    terms = normalize_terms(['free nitro'])
+    message = SimpleNamespace(
+        content="hi", attachments=[],
+        embeds=[SimpleNamespace(title="ｆr3e n1tro", description=None, fields=[],
+                                footer=SimpleNamespace(text=None), author=SimpleNamespace(name=None))]
+    )
+    scanner = DeepScanner(workers=1, inline_chars=100, max_attachment_bytes=1000, max_attachments=2, timeout=1)
+    assert asyncio.run(scanner.scan(message, terms)) == 'free nitro'
+    assert scanner._pool is None
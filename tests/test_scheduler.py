@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from utils.scheduler import HeapScheduler
+
+def run_scheduler(setup, wait=0.2):
+    """Start a scheduler, let setup() schedule items, and collect the keys fired within wait seconds"""
+    fired = []
+
+    async def main():
+        async def callback(key):
+            fired.append(key)
+
+        scheduler = HeapScheduler(callback, 'test')
+        scheduler.start()
+        setup(scheduler, time.time())
+        await asyncio.sleep(wait)
+        scheduler.stop()
+
+    asyncio.run(main())
+    return fired
+
+def test_fires_in_due_order():
+    def setup(scheduler, now):
+        scheduler.schedule('c', now + 0.06)
+        scheduler.schedule('a', now + 0.02)
+        scheduler.schedule('b', now + 0.04)
+
+    assert run_scheduler(setup) == ['a', 'b', 'c']
+
+def test_cancelled_items_never_fire():
+    def setup(scheduler, now):
+        scheduler.schedule('kept', now + 0.02)
+        scheduler.schedule('dropped', now + 0.01)
+        assert scheduler.cancel('dropped')
+        assert not scheduler.cancel('missing')
+
+    assert run_scheduler(setup) == ['kept']
+
+def test_reschedule_moves_an_item():
+    def setup(scheduler, now):
+        scheduler.schedule('a', now + 0.01)
+        scheduler.schedule('b', now + 0.03)
+        scheduler.schedule('a', now + 0.05)
+
+    assert run_scheduler(setup) == ['b', 'a']
+
+def test_slow_callback_does_not_block_later_items():
+    fired = []
+
+    async def main():
+        async def callback(key):
+            if key == 'slow':
+                await asyncio.sleep(1)
+            fired.append(key)
+
+        scheduler = HeapScheduler(callback, 'test')
+        now = time.time()
+        scheduler.schedule('slow', now)
+        scheduler.schedule('fast', now + 0.02)
+        scheduler.start()
+        await asyncio.sleep(0.1)
+        scheduler.stop()
+
+    asyncio.run(main())
+    assert fired == ['fast']
+
+def test_next_due_skips_cancelled():
+    async def main():
+        async def callback(key):
+            pass
+
+        scheduler = HeapScheduler(callback, 'test')
+        scheduler.schedule('a', 100)
+        scheduler.schedule('b', 200)
+        scheduler.cancel('a')
+        assert scheduler.next_due() == 200
+        assert 'a' not in scheduler and len(scheduler) == 1
+
+    asyncio.run(main())
@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+
+from utils.templates import compile_template
+
+GUILD = SimpleNamespace(name="Kitten Cafe", member_count=42, members=[])
+MEMBER = SimpleNamespace(mention="<@1>", display_name="Whiskers")
+
+def test_render_fills_placeholders():
+    template = compile_template("Welcome {mention} to {server}! You're member #{member_count}")
+    assert template.fields == {'mention', 'server', 'member_count'}
+    assert template.render(GUILD, MEMBER) == "Welcome <@1> to Kitten Cafe! You're member #42"
+
+def test_unknown_placeholders_stay_as_text():
+    template = compile_template("Hi {user_name}, {nope} {}")
+    assert template.render(GUILD, MEMBER) == "Hi Whiskers, {nope} {}"
+
+def test_aliases_map_to_placeholders():
+    template = compile_template("{user} joined {guild}", aliases={'user': 'user_name', 'guild': 'server'})
+    assert template.render(GUILD, MEMBER) == "Whiskers joined Kitten Cafe"
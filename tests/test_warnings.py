@@ -0,0 +1,37 @@
+from utils.warnings import AutomodLadder, WarningTimeline
+
+def timeline(*times):
+    warnings = WarningTimeline()
+    for timestamp in times:
+        warnings.add(timestamp)
+    return warnings
+
+def test_count_since_includes_cutoff():
+    warnings = timeline(30, 10, 20)
+    assert warnings.times == [10, 20, 30]
+    assert warnings.count_since(20) == 2
+    assert warnings.count_since(31) == 0
+
+def test_remove_only_drops_exact_time():
+    warnings = timeline(10, 20)
+    warnings.remove(15)
+    assert len(warnings) == 2
+    warnings.remove(10)
+    assert warnings.times == [20]
+
+def test_ladder_picks_strictest_rule_first():
+    ladder = AutomodLadder({3: 'mute', 5: 'ban'}, {})
+    assert ladder.match(timeline(*range(5)), now=100)[2] == 'ban'
+    assert ladder.match(timeline(*range(3)), now=100)[2] == 'mute'
+    assert ladder.match(timeline(1, 2), now=100) is None
+
+def test_ladder_window_only_counts_recent_warnings():
+    ladder = AutomodLadder({3: 'kick'}, {3: 60})
+    assert ladder.match(timeline(10, 20, 90), now=100) is None
+    assert ladder.match(timeline(50, 60, 90), now=100) == (3, 60, 'kick')
+
+def test_ladder_expiry_caps_every_rule():
+    ladder = AutomodLadder({2: 'mute'}, {}, expiry=50)
+    assert ladder.match(timeline(10, 20), now=100) is None
+    assert ladder.match(timeline(10, 60), now=100) is None
+    assert ladder.match(timeline(60, 70), now=100) == (2, None, 'mute')
@@ -0,0 +1,102 @@
+"""
+Autorole assignment queue for the Discord moderation bot
+"""
+
+import asyncio
+import discord
+from typing import Iterable, Optional
+from utils.logging import get_logger
+
+logger = get_logger('autorole')
+
+class AutoroleQueue:
+    """Per-guild queue of pending autorole assignments drained by one background worker"""
+
+    def __init__(self, guild_id: int, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 60.0, min_interval: float = 0.25):
+        self.guild_id = guild_id
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.min_interval = min_interval  # Pause between add_roles calls to stay under the rate limit
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.worker: Optional[asyncio.Task] = None
+
+        # Stats exposed through !autorole status
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.skipped = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of members waiting for their roles"""
+        return self.queue.qsize()
+
+    def enqueue(self, member: discord.Member, role_ids: Iterable[int]):
+        """Queue a member for their autoroles, starting the worker if it's idle"""
+        self.queue.put_nowait((member, tuple(role_ids)))
+
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._drain())
+
+    def stop(self):
+        """Cancel the worker (pending members are dropped)"""
+        if self.worker and not self.worker.done():
+            self.worker.cancel()
+
+    async def _drain(self):
+        """Assign roles until the queue is empty, then let the worker exit"""
+        while not self.queue.empty():
+            member, role_ids = self.queue.get_nowait()
+            try:
+                await self._assign(member, role_ids)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Autorole worker error in guild {self.guild_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+            await asyncio.sleep(self.min_interval)
+
+    async def _assign(self, member: discord.Member, role_ids):
+        """Give a member all their autoroles in one add_roles call, retrying with backoff"""
+        guild = member.guild
+        roles = []
+        for role_id in role_ids:
+            role = guild.get_role(role_id)
+            if role and role < guild.me.top_role and role not in member.roles:
+                roles.append(role)
+
+        if not roles:
+            self.skipped += 1
+            return
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                await member.add_roles(*roles, reason="Autorole via Kitten Mod")
+                self.succeeded += 1
+                return
+            except (discord.Forbidden, discord.NotFound):
+                # Missing permissions or the member already left; retrying won't help
+                self.failed += 1
+                return
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    self.failed += 1
+                    return
+
+                if attempt == self.max_retries:
+                    break
+
+                delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after:
+                    delay = max(delay, retry_after)
+
+                self.retried += 1
+                await asyncio.sleep(delay)
+
+        self.failed += 1
+        logger.warning(f"Gave up assigning autoroles to {member.id} in guild {self.guild_id}")
@@ -0,0 +1,117 @@
+"""
+Near-duplicate message detection across users (copypasta and raid spam)
+"""
+
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+FINGERPRINT_BITS = 64
+BANDS = 8  # Fingerprints within 7 bits always share a band; a little further usually still do
+BAND_BITS = FINGERPRINT_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+HASH_MASK = (1 << FINGERPRINT_BITS) - 1
+WORD_PATTERN = re.compile(r'\w+')
+SHINGLE_SIZE = 3
+MAX_FINGERPRINT_CHARS = 400  # Long pastes are fingerprinted on their start
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of a message's character trigrams; similar texts differ in few bits"""
+    text = ' '.join(WORD_PATTERN.findall(text[:MAX_FINGERPRINT_CHARS]))
+    features = [text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))]
+    # Each bit is set when most features have it set; counting columns of bit
+    # strings keeps the per-bit work in C
+    rows = [format(hash(feature) & HASH_MASK, '064b') for feature in features]
+    half = len(rows) / 2
+    return int(''.join('1' if ''.join(column).count('1') > half else '0' for column in zip(*rows)), 2)
+
+def bands(fingerprint: int) -> List[Tuple[int, int]]:
+    return [(band, fingerprint >> (band * BAND_BITS) & BAND_MASK) for band in range(BANDS)]
+
+class PasteEntry:
+    """One recent message in a guild's window"""
+
+    __slots__ = ('time', 'fingerprint', 'channel_id', 'message_id', 'author_id', 'tripped')
+
+    def __init__(self, timestamp, fingerprint, channel_id, message_id, author_id):
+        self.time = timestamp
+        self.fingerprint = fingerprint
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.author_id = author_id
+        self.tripped = False  # Part of a cluster that was already acted on
+
+class GuildPasteWindow:
+    """A guild's recent fingerprints, indexed by band so lookups don't compare against everything"""
+
+    __slots__ = ('entries', 'index')
+
+    def __init__(self):
+        self.entries: Deque[PasteEntry] = deque()
+        self.index: Dict[Tuple[int, int], Set[PasteEntry]] = {}
+
+    def add(self, entry: PasteEntry):
+        self.entries.append(entry)
+        for key in bands(entry.fingerprint):
+            self.index.setdefault(key, set()).add(entry)
+
+    def evict(self, cutoff: float, max_entries: int):
+        while self.entries and (self.entries[0].time < cutoff or len(self.entries) > max_entries):
+            entry = self.entries.popleft()
+            for key in bands(entry.fingerprint):
+                bucket = self.index.get(key)
+                if bucket is not None:
+                    bucket.discard(entry)
+                    if not bucket:
+                        del self.index[key]
+
+    def near(self, fingerprint: int, max_distance: int) -> List[PasteEntry]:
+        candidates = set()
+        for key in bands(fingerprint):
+            candidates.update(self.index.get(key, ()))
+        return [entry for entry in candidates if bin(entry.fingerprint ^ fingerprint).count('1') <= max_distance]
+
+class CopypastaTracker:
+    """Spot the same text being posted by many different accounts within a short window
+
+    Messages are compared by SimHash distance, looked up through a band index,
+    so a copy with a word or two changed still matches. Memory is bounded by
+    max_entries per guild and by the window length.
+    Once a cluster trips, later near-copies in the window are reported straight
+    away instead of having to reach the threshold again.
+    """
+
+    def __init__(self, window_seconds: float, min_authors: int, max_distance: int = 8, max_entries: int = 500):
+        self.window_seconds = window_seconds
+        self.min_authors = min_authors
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.guilds: Dict[int, GuildPasteWindow] = {}
+
+    def add(self, guild_id: int, channel_id: int, message_id: int, author_id: int, text: str,
+            now: Optional[float] = None) -> List[PasteEntry]:
+        """Record a message; returns the copies to remove if it completes (or joins) a cluster"""
+        now = time.monotonic() if now is None else now
+        window = self.guilds.get(guild_id)
+        if window is None:
+            window = self.guilds[guild_id] = GuildPasteWindow()
+        window.evict(now - self.window_seconds, self.max_entries)
+
+        entry = PasteEntry(now, simhash(text), channel_id, message_id, author_id)
+        matches = window.near(entry.fingerprint, self.max_distance)
+        window.add(entry)
+
+        if any(match.tripped for match in matches):
+            entry.tripped = True
+            return [entry]
+
+        cluster = matches + [entry]
+        if len({match.author_id for match in cluster}) < self.min_authors:
+            return []
+        for match in cluster:
+            match.tripped = True
+        return cluster
+
+    def forget(self, guild_id: int):
+        self.guilds.pop(guild_id, None)
@@ -0,0 +1,66 @@
+"""
+SQLite storage for the Discord moderation bot
+"""
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+from utils.logging import get_logger
+
+logger = get_logger('database')
+
+class Database:
+    """SQLite connection used from one background thread so queries never block the event loop"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kitten-db')
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    async def connect(self):
+        """Open the database file"""
+        if self._conn is None:
+            self._conn = await self._submit(self._open)
+            logger.info(f"Opened database {self.path}")
+
+    async def close(self):
+        """Close the database after all queued work has run"""
+        if self._conn is not None:
+            await self._submit(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    async def _submit(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(connection) on the database thread inside a single transaction"""
+        def transaction():
+            with self._conn:
+                return fn(self._conn)
+        return await self._submit(transaction)
+
+    async def executescript(self, script: str):
+        """Run a schema script (CREATE TABLE IF NOT EXISTS ...)"""
+        await self._submit(lambda: self._conn.executescript(script))
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """Run one statement and return the last inserted row ID"""
+        return await self.run(lambda conn: conn.execute(sql, params).lastrowid)
+
+    async def executemany(self, sql: str, rows: Iterable[Sequence]):
+        """Run one statement for many rows in a single transaction"""
+        rows = list(rows)
+        await self.run(lambda conn: conn.executemany(sql, rows))
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """Run a query and return every row"""
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall())
@@ -0,0 +1,25 @@
+"""
+Duration parsing utilities for the Discord moderation bot
+"""
+
+import re
+from typing import Optional
+
+DURATION_PATTERN = re.compile(r'^(\d+)([smhd])$')
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_duration(text: str) -> Optional[int]:
+    """Parse durations like 10m, 2h or 1d into seconds (None if invalid)"""
+    match = DURATION_PATTERN.match(text.lower())
+    if not match:
+        return None
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+def format_duration(seconds: float) -> str:
+    """Describe a number of seconds in its largest whole unit (e.g. 90m -> 90 minutes)"""
+    seconds = int(seconds)
+    for unit, name in ((86400, 'day'), (3600, 'hour'), (60, 'minute')):
+        if seconds >= unit and seconds % unit == 0:
+            amount = seconds // unit
+            return f"{amount} {name}{'s' if amount != 1 else ''}"
+    return f"{seconds} second{'s' if seconds != 1 else ''}"
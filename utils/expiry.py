@@ -0,0 +1,148 @@
+"""
+Durable expiry index for timed moderation actions
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from utils.database import Database
+from utils.logging import get_logger
+from utils.scheduler import HeapScheduler
+
+logger = get_logger('expiry')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mod_expiries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    guild_id INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    data TEXT,
+    UNIQUE (kind, guild_id, target_id)
+);
+"""
+
+# handler(guild_id, target_id, data) undoes the action when it expires
+ExpiryHandler = Callable[[int, int, dict], Awaitable[None]]
+
+class ExpiryManager:
+    """Stores expiry times for mutes, tempbans and lockdowns and fires them from one timer loop"""
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.handlers: Dict[str, ExpiryHandler] = {}
+        self.entries: Dict[int, Dict[str, Any]] = {}  # expiry ID -> entry
+        self.by_target: Dict[Tuple[str, int, int], int] = {}  # (kind, guild_id, target_id) -> expiry ID
+        self.scheduler = HeapScheduler(self._fire, 'expiries')
+
+    def register(self, kind: str, handler: ExpiryHandler):
+        """Register the coroutine that undoes an action of this kind"""
+        self.handlers[kind] = handler
+
+    async def load(self):
+        """Create the table and schedule every stored expiry"""
+        await self.db.executescript(SCHEMA)
+        rows = await self.db.fetchall(
+            "SELECT id, kind, guild_id, target_id, expires_at, data FROM mod_expiries"
+        )
+
+        for expiry_id, kind, guild_id, target_id, expires_at, data in rows:
+            self._track({
+                'id': expiry_id,
+                'kind': kind,
+                'guild_id': guild_id,
+                'target_id': target_id,
+                'expires_at': expires_at,
+                'data': json.loads(data) if data else {}
+            })
+
+        logger.info(f"Loaded {len(rows)} pending moderation expiries")
+
+    def start(self, bot):
+        """Start firing expiries once the bot's cache is ready"""
+        async def start_when_ready():
+            await bot.wait_until_ready()
+            # Anything that expired while the bot was down fires straight away
+            self.scheduler.start()
+
+        return asyncio.create_task(start_when_ready())
+
+    def stop(self):
+        self.scheduler.stop()
+
+    def get(self, kind: str, guild_id: int, target_id: int) -> Optional[Dict[str, Any]]:
+        """Get the pending expiry for an action target"""
+        expiry_id = self.by_target.get((kind, guild_id, target_id))
+        return self.entries.get(expiry_id) if expiry_id is not None else None
+
+    def pending(self, kind: str, guild_id: Optional[int] = None):
+        """Iterate pending expiries of a kind, optionally for one guild"""
+        for entry in self.entries.values():
+            if entry['kind'] == kind and (guild_id is None or entry['guild_id'] == guild_id):
+                yield entry
+
+    async def add(self, kind: str, guild_id: int, target_id: int, expires_at: float,
+                  data: Optional[dict] = None) -> int:
+        """Store an expiry, replacing any earlier one for the same target"""
+        self._untrack(kind, guild_id, target_id)
+        data = data or {}
+
+        def upsert(conn):
+            conn.execute(
+                "DELETE FROM mod_expiries WHERE kind = ? AND guild_id = ? AND target_id = ?",
+                (kind, guild_id, target_id)
+            )
+            return conn.execute(
+                "INSERT INTO mod_expiries (kind, guild_id, target_id, expires_at, data) VALUES (?, ?, ?, ?, ?)",
+                (kind, guild_id, target_id, expires_at, json.dumps(data))
+            ).lastrowid
+
+        expiry_id = await self.db.run(upsert)
+        self._track({
+            'id': expiry_id,
+            'kind': kind,
+            'guild_id': guild_id,
+            'target_id': target_id,
+            'expires_at': expires_at,
+            'data': data
+        })
+        return expiry_id
+
+    async def remove(self, kind: str, guild_id: int, target_id: int) -> bool:
+        """Drop an expiry because the action was undone by hand"""
+        entry = self._untrack(kind, guild_id, target_id)
+        if entry is None:
+            return False
+
+        await self.db.execute("DELETE FROM mod_expiries WHERE id = ?", (entry['id'],))
+        return True
+
+    def _track(self, entry):
+        self.entries[entry['id']] = entry
+        self.by_target[(entry['kind'], entry['guild_id'], entry['target_id'])] = entry['id']
+        self.scheduler.schedule(entry['id'], entry['expires_at'])
+
+    def _untrack(self, kind, guild_id, target_id):
+        expiry_id = self.by_target.pop((kind, guild_id, target_id), None)
+        if expiry_id is None:
+            return None
+        self.scheduler.cancel(expiry_id)
+        return self.entries.pop(expiry_id, None)
+
+    async def _fire(self, expiry_id):
+        entry = self.entries.get(expiry_id)
+        if entry is None:
+            return
+
+        handler = self.handlers.get(entry['kind'])
+        if handler is None:
+            # The cog that owns this kind isn't loaded; keep the row for next startup
+            logger.warning(f"No handler for {entry['kind']} expiry {expiry_id}")
+            return
+
+        self._untrack(entry['kind'], entry['guild_id'], entry['target_id'])
+        try:
+            await handler(entry['guild_id'], entry['target_id'], entry['data'])
+        finally:
+            await self.db.execute("DELETE FROM mod_expiries WHERE id = ?", (expiry_id,))
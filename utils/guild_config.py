@@ -0,0 +1,154 @@
+"""
+Per-guild settings with write-behind persistence
+"""
+
+import asyncio
+import json
+from typing import Dict, List, Optional, Set
+from utils.database import Database
+from utils.logging import get_logger
+
+logger = get_logger('guild_config')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+class GuildConfig:
+    """All settings for one guild"""
+
+    # Settings written to the database
+    PERSISTED = (
+        'prefix',
+        'welcome_channel_id', 'welcome_message', 'welcome_coalesce',
+        'goodbye_channel_id', 'goodbye_message', 'goodbye_coalesce',
+        'autoroles', 'automod', 'automod_windows', 'warning_expiry',
+        'raid_settings', 'role_levels', 'modlog_channel_id', 'filter_disabled',
+    )
+
+    __slots__ = ('guild_id',) + PERSISTED + ('welcome_template', 'goodbye_template')
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.prefix: Optional[str] = None
+
+        self.welcome_channel_id: Optional[int] = None
+        self.welcome_message: Optional[str] = None
+        self.welcome_coalesce: Optional[int] = None  # None = use the default window
+
+        self.goodbye_channel_id: Optional[int] = None
+        self.goodbye_message: Optional[str] = None
+        self.goodbye_coalesce: Optional[int] = None
+
+        self.autoroles: List[int] = []
+        self.automod: Dict[int, str] = {}  # warning threshold -> action
+        self.automod_windows: Dict[int, int] = {}  # warning threshold -> seconds the warnings must fall within
+        self.warning_expiry: Optional[int] = None  # Seconds before a warning stops counting (None = never)
+        self.raid_settings: Dict[str, bool] = {}  # overrides for RAID_CONFIG
+        self.role_levels: Dict[int, int] = {}  # role ID -> PermissionLevel granted to its members
+        self.modlog_channel_id: Optional[int] = None  # None = look for a channel named like mod/staff
+        self.filter_disabled: int = 0  # FilterFeature bits turned off, so filters added later start on
+
+        # Compiled from the messages above, never persisted
+        self.welcome_template = None
+        self.goodbye_template = None
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.PERSISTED}
+
+    @classmethod
+    def from_dict(cls, guild_id: int, data: dict) -> 'GuildConfig':
+        config = cls(guild_id)
+        for name in cls.PERSISTED:
+            if name in data:
+                setattr(config, name, data[name])
+
+        # JSON object keys are always strings
+        config.automod = {int(threshold): action for threshold, action in config.automod.items()}
+        config.automod_windows = {int(threshold): window for threshold, window in config.automod_windows.items()}
+        config.role_levels = {int(role_id): level for role_id, level in config.role_levels.items()}
+        return config
+
+class GuildConfigStore:
+    """Cache of GuildConfig objects; changes are flushed to SQLite in batches"""
+
+    def __init__(self, db: Database, flush_interval: float = 5.0):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.configs: Dict[int, GuildConfig] = {}
+        self.dirty: Set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def load(self):
+        """Create the table and load every stored guild into the cache"""
+        await self.db.executescript(SCHEMA)
+        rows = await self.db.fetchall("SELECT guild_id, data FROM guild_config")
+
+        for guild_id, data in rows:
+            try:
+                self.configs[guild_id] = GuildConfig.from_dict(guild_id, json.loads(data))
+            except (ValueError, TypeError) as e:
+                logger.error(f"Skipping unreadable config for guild {guild_id}: {e}")
+
+        logger.info(f"Loaded settings for {len(self.configs)} guilds")
+
+    def get(self, guild_id: int) -> GuildConfig:
+        """Get a guild's config, creating default settings if it has none"""
+        config = self.configs.get(guild_id)
+        if config is None:
+            config = GuildConfig(guild_id)
+            self.configs[guild_id] = config
+        return config
+
+    def peek(self, guild_id: int) -> Optional[GuildConfig]:
+        """Get a guild's config without creating one"""
+        return self.configs.get(guild_id)
+
+    def mark_dirty(self, guild_id: int):
+        """Queue a guild's config to be written on the next flush"""
+        self.dirty.add(guild_id)
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush guild settings: {e}")
+
+    async def flush(self):
+        """Write every dirty guild in one transaction"""
+        if not self.dirty:
+            return
+
+        dirty, self.dirty = self.dirty, set()
+        rows = [
+            (guild_id, json.dumps(self.configs[guild_id].to_dict()))
+            for guild_id in dirty if guild_id in self.configs
+        ]
+
+        try:
+            await self.db.executemany(
+                "INSERT INTO guild_config (guild_id, data) VALUES (?, ?) "
+                "ON CONFLICT(guild_id) DO UPDATE SET data = excluded.data",
+                rows
+            )
+        except Exception:
+            # Try again on the next flush
+            self.dirty |= dirty
+            raise
+
+    async def close(self):
+        """Stop the flush loop and write any pending changes"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,165 @@
+"""
+Help rendering utilities for the Discord moderation bot
+"""
+
+import discord
+from discord.ext import commands
+from typing import Dict, List, Optional, Tuple
+from utils.permissions import PermissionLevel, command_permission_level
+
+# Section titles for each cog, in display order (None = commands defined in main.py)
+HELP_SECTIONS = {
+    'ModerationCog': "🐾 Kitten's Moderation Powers",
+    'AdvancedModerationCog': "⚡ Advanced Moderation",
+    'FunCog': "🎮 Fun & Interactive",
+    'UtilityCog': "📋 Info & Utilities",
+    'WelcomeCog': "🎊 Welcome System",
+    None: "⚙️ Bot Settings",
+}
+
+LEVEL_NAMES = {
+    PermissionLevel.MEMBER: "Everyone",
+    PermissionLevel.MODERATOR: "Moderators",
+    PermissionLevel.ADMIN: "Administrators",
+    PermissionLevel.OWNER: "Server Owner",
+}
+
+HELP_COLOR = discord.Color.from_rgb(255, 192, 203)
+
+# Discord rejects embed field values over 1024 characters
+FIELD_LIMIT = 1024
+
+def _chunk_lines(lines: List[str], limit: int = FIELD_LIMIT) -> List[str]:
+    """Pack lines into as few field values as possible without exceeding the limit"""
+    chunks = []
+    current = ""
+
+    for line in lines:
+        if current and len(current) + len(line) + 1 > limit:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+class HelpCache:
+    """Build help embeds from the registered commands and cache them per (prefix, level)"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._overviews: Dict[Tuple[str, int], discord.Embed] = {}
+        self._pages: Dict[Tuple[str, str], discord.Embed] = {}
+
+    def invalidate(self):
+        """Drop every rendered embed (call on prefix change or cog reload)"""
+        self._overviews.clear()
+        self._pages.clear()
+
+    def get_overview(self, prefix: str, level: int) -> discord.Embed:
+        """Get the command overview for a prefix and permission level"""
+        key = (prefix, level)
+        embed = self._overviews.get(key)
+        if embed is None:
+            embed = self._render_overview(prefix, level)
+            self._overviews[key] = embed
+        return embed
+
+    def get_command_page(self, prefix: str, name: str) -> Optional[discord.Embed]:
+        """Get the help page for a single command, or None if it doesn't exist"""
+        command = self.bot.get_command(name)
+        if command is None or command.hidden:
+            return None
+
+        key = (prefix, command.qualified_name)
+        embed = self._pages.get(key)
+        if embed is None:
+            embed = self._render_command_page(prefix, command)
+            self._pages[key] = embed
+        return embed
+
+    def _visible_commands(self, level: int) -> Dict[Optional[str], List[commands.Command]]:
+        """Group the commands a permission level may use by cog"""
+        sections: Dict[Optional[str], List[commands.Command]] = {}
+
+        for command in self.bot.commands:
+            if command.hidden or command.name == 'help':
+                continue
+            if command_permission_level(command) > level:
+                continue
+            sections.setdefault(command.cog_name, []).append(command)
+
+        return sections
+
+    def _render_overview(self, prefix: str, level: int) -> discord.Embed:
+        embed = discord.Embed(
+            title="🐱 Kitten Mod Help - Purrfect Moderation!",
+            description=f"Meow! Here are all my cute commands to keep your server safe and cozy! 🐾\n\nUse `{prefix}help <command>` to learn more about a command!",
+            color=HELP_COLOR
+        )
+
+        sections = self._visible_commands(level)
+        ordered = [name for name in HELP_SECTIONS if name in sections]
+        ordered += sorted(name for name in sections if name not in HELP_SECTIONS)
+
+        for cog_name in ordered:
+            lines = [
+                f"`{prefix}{command.name}` - {command.short_doc or 'No description'}"
+                for command in sorted(sections[cog_name], key=lambda c: c.name)
+            ]
+            title = HELP_SECTIONS.get(cog_name, cog_name or "Other")
+
+            for i, value in enumerate(_chunk_lines(lines)):
+                embed.add_field(
+                    name=title if i == 0 else f"{title} (cont.)",
+                    value=value,
+                    inline=False
+                )
+
+        if level < PermissionLevel.MODERATOR:
+            note = "Meow! Moderators will see extra moderation powers here. Everyone can enjoy the fun commands! I'm here to help keep everyone safe and happy! 🐱💕"
+        else:
+            note = "Meow! You can use every command listed here. Thanks for helping keep everyone safe and happy! 🐱💕"
+
+        embed.add_field(name="💝 Kitty Note", value=note, inline=False)
+        return embed
+
+    def _render_command_page(self, prefix: str, command: commands.Command) -> discord.Embed:
+        embed = discord.Embed(
+            title=f"🐱 Help: {prefix}{command.qualified_name}",
+            description=command.help or "No description yet! 🐾",
+            color=HELP_COLOR
+        )
+
+        usage = f"{prefix}{command.qualified_name} {command.signature}".rstrip()
+        embed.add_field(name="📝 Usage:", value=f"`{usage}`", inline=False)
+
+        if command.aliases:
+            embed.add_field(
+                name="🏷️ Aliases:",
+                value=", ".join(f"`{prefix}{alias}`" for alias in command.aliases),
+                inline=True
+            )
+
+        embed.add_field(
+            name="🔑 Who Can Use It:",
+            value=LEVEL_NAMES.get(command_permission_level(command), "Everyone"),
+            inline=True
+        )
+
+        if isinstance(command, commands.Group):
+            lines = [
+                f"`{prefix}{sub.qualified_name}` - {sub.short_doc or 'No description'}"
+                for sub in sorted(command.commands, key=lambda c: c.name)
+                if not sub.hidden
+            ]
+            for i, value in enumerate(_chunk_lines(lines)):
+                embed.add_field(
+                    name="📚 Subcommands:" if i == 0 else "📚 Subcommands (cont.):",
+                    value=value,
+                    inline=False
+                )
+
+        return embed
@@ -0,0 +1,144 @@
+"""
+Lockdown snapshots so channel permissions can be restored exactly
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+import discord
+
+from config import BOT_CONFIG
+from utils.database import Database
+from utils.logging import get_logger
+
+logger = get_logger('lockdown')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lockdown_snapshots (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    scope_id INTEGER NOT NULL,
+    allow INTEGER,
+    deny INTEGER
+);
+"""
+
+class LockdownStore:
+    """@everyone overwrites saved before a lockdown, keyed by channel ID
+
+    scope_id is the channel, category or guild the lockdown was started for, so
+    a server or category unlock only restores the channels it locked. Raid mode
+    locks use raid_scope(guild_id).
+    allow/deny are None when the channel had no @everyone overwrite at all.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.snapshots: Dict[int, dict] = {}
+
+    def __contains__(self, channel_id):
+        return channel_id in self.snapshots
+
+    async def load(self):
+        """Create the table and load every saved snapshot"""
+        await self.db.executescript(SCHEMA)
+        rows = await self.db.fetchall(
+            "SELECT channel_id, guild_id, scope_id, allow, deny FROM lockdown_snapshots"
+        )
+        for channel_id, guild_id, scope_id, allow, deny in rows:
+            self.snapshots[channel_id] = {
+                'channel_id': channel_id, 'guild_id': guild_id, 'scope_id': scope_id,
+                'allow': allow, 'deny': deny
+            }
+        logger.info(f"Loaded {len(rows)} locked channel snapshots")
+
+    def for_scope(self, scope_id: int) -> List[dict]:
+        """Snapshots taken by one lockdown"""
+        return [snapshot for snapshot in self.snapshots.values() if snapshot['scope_id'] == scope_id]
+
+    async def save(self, channels: Iterable, role: discord.Role, scope_id: int) -> List[dict]:
+        """Snapshot role's overwrite in each channel (in one transaction) before locking them"""
+        snapshots = []
+        for channel in channels:
+            overwrite = channel.overwrites.get(role)
+            allow, deny = overwrite.pair() if overwrite is not None else (None, None)
+            snapshots.append({
+                'channel_id': channel.id, 'guild_id': channel.guild.id, 'scope_id': scope_id,
+                'allow': allow.value if allow is not None else None,
+                'deny': deny.value if deny is not None else None
+            })
+
+        await self.db.executemany(
+            "INSERT OR REPLACE INTO lockdown_snapshots (channel_id, guild_id, scope_id, allow, deny) VALUES (?, ?, ?, ?, ?)",
+            [(s['channel_id'], s['guild_id'], s['scope_id'], s['allow'], s['deny']) for s in snapshots]
+        )
+        for snapshot in snapshots:
+            self.snapshots[snapshot['channel_id']] = snapshot
+        return snapshots
+
+    async def discard(self, channel_ids: Iterable[int]):
+        """Forget snapshots once their channels are restored"""
+        channel_ids = [channel_id for channel_id in channel_ids if self.snapshots.pop(channel_id, None)]
+        if channel_ids:
+            await self.db.executemany(
+                "DELETE FROM lockdown_snapshots WHERE channel_id = ?",
+                [(channel_id,) for channel_id in channel_ids]
+            )
+
+def raid_scope(guild_id: int) -> int:
+    """Scope for channels locked by raid mode, kept apart from a !lockdown server"""
+    return -guild_id
+
+def restored_overwrite(snapshot: dict) -> Optional[discord.PermissionOverwrite]:
+    """The overwrite a channel had before it was locked (None = no overwrite)"""
+    if snapshot['allow'] is None:
+        return None
+    return discord.PermissionOverwrite.from_pair(
+        discord.Permissions(snapshot['allow']), discord.Permissions(snapshot['deny'])
+    )
+
+async def edit_channels(channels: Iterable, edit) -> List:
+    """Run edit(channel) for many channels with limited concurrency; returns the channels that succeeded
+
+    discord.py waits out rate limits itself, so the semaphore only keeps us from
+    queueing a burst of requests against the same bucket.
+    """
+    semaphore = asyncio.Semaphore(BOT_CONFIG['lockdown_concurrency'])
+
+    async def run(channel):
+        async with semaphore:
+            try:
+                await edit(channel)
+                return True
+            except discord.HTTPException as e:
+                logger.warning(f"Couldn't update channel {channel.id}: {e}")
+                return False
+
+    channels = list(channels)
+    results = await asyncio.gather(*(run(channel) for channel in channels))
+    return [channel for channel, ok in zip(channels, results) if ok]
+
+async def restore_channels(guild, store: LockdownStore, snapshots: List[dict], reason: str):
+    """Put back the saved overwrites; returns (restored, failed) counts
+
+    Snapshots of channels that couldn't be restored are kept for another try.
+    """
+    everyone_role = guild.default_role
+    by_channel = {snapshot['channel_id']: snapshot for snapshot in snapshots}
+    channels = [channel for channel in map(guild.get_channel, by_channel) if channel is not None]
+
+    async def restore(channel):
+        await channel.set_permissions(
+            everyone_role,
+            overwrite=restored_overwrite(by_channel[channel.id]),
+            reason=reason
+        )
+
+    restored = await edit_channels(channels, restore)
+    restored_ids = {channel.id for channel in restored}
+
+    # Deleted channels have nothing left to restore
+    missing = set(by_channel) - {channel.id for channel in channels}
+    await store.discard(restored_ids | missing)
+
+    return len(restored), len(channels) - len(restored)
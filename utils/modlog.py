@@ -0,0 +1,218 @@
+"""
+Mod-log channel routing for the Discord moderation bot
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import discord
+
+from utils.logging import get_logger
+from utils.permissions import is_mod_channel
+
+logger = get_logger('modlog')
+
+EMBEDS_PER_MESSAGE = 10  # Discord's limits
+CHARS_PER_MESSAGE = 6000  # Total across every embed in one message
+MAX_BUFFERED_EMBEDS = 200  # Per guild; past this, entries are posted as one-line summaries
+MAX_OVERFLOW_LINES = 5000  # Per guild; only a count is kept beyond this
+MAX_FLUSH_RETRIES = 4  # Failed flushes in a row before waiting for the next entry
+SUMMARY_CHARS = 4000  # Room for summary lines in one embed description
+
+def summary_line(embed: discord.Embed) -> str:
+    """One line standing in for a full entry during a burst"""
+    details = " · ".join(field.value for field in embed.fields[:2])
+    return f"{embed.title} — {details}" if details else str(embed.title)
+
+def pack_batches(embeds: List[discord.Embed]) -> List[List[discord.Embed]]:
+    """Group embeds into messages within Discord's embed count and total length limits"""
+    batches, batch, size = [], [], 0
+    for embed in embeds:
+        length = len(embed)
+        if batch and (len(batch) == EMBEDS_PER_MESSAGE or size + length > CHARS_PER_MESSAGE):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(embed)
+        size += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+def is_private(channel) -> bool:
+    """Whether @everyone is kept out of a channel, so mod-log reasons stay among staff"""
+    return not channel.permissions_for(channel.guild.default_role).view_channel
+
+class ModLogRouter:
+    """Buffer mod-log embeds per guild and post them in as few messages as Discord's limits allow"""
+
+    def __init__(self, bot, configs, flush_interval: float = 3.0):
+        self.bot = bot
+        self.configs = configs
+        self.flush_interval = flush_interval
+        self.buffers: Dict[int, List[discord.Embed]] = {}  # guild_id -> embeds waiting to be sent
+        self.overflow: Dict[int, List[str]] = {}  # guild_id -> summary lines for entries past the buffer limit
+        self.dropped: Dict[int, int] = {}  # guild_id -> entries past the overflow limit, only counted
+        self.discovered: Dict[int, int] = {}  # guild_id -> auto-discovered mod channel ID
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def channel_for(self, guild) -> Optional[discord.TextChannel]:
+        """The configured mod-log channel, or a private channel that looks like a mod channel
+
+        Name matching alone would pick up channels like #modern-art, so a
+        discovered channel is only used while @everyone can't see it.
+        """
+        config = self.configs.peek(guild.id)
+        if config and config.modlog_channel_id:
+            channel = guild.get_channel(config.modlog_channel_id)
+            if channel:
+                return channel
+
+        channel_id = self.discovered.get(guild.id)
+        channel = guild.get_channel(channel_id) if channel_id else None
+        if channel is None or not is_private(channel):
+            channel = next(
+                (c for c in guild.text_channels
+                 if is_mod_channel(c) and is_private(c) and c.permissions_for(guild.me).send_messages),
+                None
+            )
+            if channel:
+                self.discovered[guild.id] = channel.id
+            else:
+                self.discovered.pop(guild.id, None)
+        return channel
+
+    def forget(self, guild_id: int):
+        """Drop the discovered channel, e.g. after the configured one changes"""
+        self.discovered.pop(guild_id, None)
+
+    def log(self, guild, embed: discord.Embed) -> bool:
+        """Queue an embed for the guild's mod log; returns False if the guild has no mod-log channel"""
+        if self.channel_for(guild) is None:
+            return False
+
+        buffer = self.buffers.setdefault(guild.id, [])
+        if len(buffer) < MAX_BUFFERED_EMBEDS:
+            buffer.append(embed)
+        else:
+            overflow = self.overflow.setdefault(guild.id, [])
+            if len(overflow) < MAX_OVERFLOW_LINES:
+                overflow.append(summary_line(embed))
+            else:
+                self.dropped[guild.id] = self.dropped.get(guild.id, 0) + 1
+
+        # The first entry after a quiet period starts the flush loop
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        return True
+
+    def log_action(self, guild, action: str, moderator, target, reason: Optional[str]) -> bool:
+        """Queue a standard moderation action entry"""
+        embed = discord.Embed(
+            title=f"📋 {action.replace('_', ' ').title()}",
+            color=discord.Color.from_rgb(255, 192, 203),
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="👮 Moderator:", value=moderator.mention if moderator else "Kitten Mod (automatic)", inline=True)
+        if target is not None:
+            embed.add_field(name="👤 Target:", value=f"<@{target.id}> ({target.id})", inline=True)
+        if reason:
+            embed.add_field(name="📝 Reason:", value=reason[:1024], inline=False)
+        return self.log(guild, embed)
+
+    async def _flush_loop(self):
+        # Keeps going while entries arrive during a flush, so none are left waiting;
+        # backs off while sends fail and gives up until the next entry after a few tries
+        failures = 0
+        while (self.buffers or self.overflow or self.dropped) and failures <= MAX_FLUSH_RETRIES:
+            await asyncio.sleep(self.flush_interval * 2 ** failures)
+            try:
+                sent = await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush mod logs: {e}")
+                sent = 0
+            failures = 0 if sent else failures + 1
+
+    def _summary_embeds(self, lines: List[str], dropped: int) -> List[discord.Embed]:
+        embeds, chunk, size = [], [], 0
+        for line in lines:
+            if chunk and size + len(line) + 1 > SUMMARY_CHARS:
+                embeds.append(chunk)
+                chunk, size = [], 0
+            chunk.append(line[:SUMMARY_CHARS])
+            size += len(line) + 1
+        if chunk:
+            embeds.append(chunk)
+
+        summaries = [
+            discord.Embed(
+                title=f"📋 {len(chunk)} more entries (busy moment, summarized)",
+                description="\n".join(chunk),
+                color=discord.Color.from_rgb(255, 192, 203)
+            )
+            for chunk in embeds
+        ]
+        if dropped:
+            if not summaries:
+                summaries.append(discord.Embed(title="📋 Busy moment", color=discord.Color.from_rgb(255, 192, 203)))
+            summaries[-1].set_footer(text=f"{dropped} further entries were too many to list")
+        return summaries
+
+    async def flush(self) -> int:
+        """Send every buffered entry, packed into as few messages as fit; returns how many messages were sent
+
+        Entries that fail for a temporary reason (rate limits, Discord errors) go
+        back in the buffer for the next flush. A batch Discord rejects as
+        malformed is split until the bad entry can be dropped on its own, and
+        everything pending is dropped if the channel can't be posted in at all.
+        """
+        buffers, self.buffers = self.buffers, {}
+        overflow, self.overflow = self.overflow, {}
+        dropped, self.dropped = self.dropped, {}
+        sent = 0
+
+        for guild_id in set(buffers) | set(overflow) | set(dropped):
+            embeds = buffers.get(guild_id, []) + self._summary_embeds(
+                overflow.get(guild_id, []), dropped.get(guild_id, 0)
+            )
+            guild = self.bot.get_guild(guild_id)
+            channel = self.channel_for(guild) if guild else None
+            if channel is None:
+                continue
+
+            batches = pack_batches(embeds)
+            while batches:
+                batch = batches.pop(0)
+                try:
+                    await channel.send(embeds=batch)
+                    sent += 1
+                except discord.HTTPException as e:
+                    if e.status == 400:
+                        if len(batch) > 1:
+                            middle = len(batch) // 2
+                            batches[:0] = [batch[:middle], batch[middle:]]
+                        else:
+                            logger.error(f"Mod log in guild {guild_id} rejected an entry, dropping it: {e}")
+                        continue
+                    pending = [batch] + batches
+                    if 400 < e.status < 500 and e.status != 429:
+                        # Missing access or a deleted channel; retrying the same channel won't help
+                        logger.error(
+                            f"Can't post mod log in guild {guild_id}, dropping "
+                            f"{sum(len(b) for b in pending)} entries: {e}"
+                        )
+                        self.forget(guild_id)
+                        break
+                    logger.warning(f"Couldn't post mod log in guild {guild_id}: {e}")
+                    # Entries logged meanwhile go after the ones that failed
+                    self.buffers[guild_id] = [embed for b in pending for embed in b] + self.buffers.get(guild_id, [])
+                    break
+
+        return sent
+
+    async def close(self):
+        """Send anything still buffered"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
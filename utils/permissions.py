@@ -3,8 +3,165 @@ Permission utilities for the Discord moderation bot
 """
 
 import discord
+from collections import OrderedDict
 from discord.ext import commands
 from functools import wraps
+from typing import Dict, FrozenSet, Tuple
+
+class PermissionLevel:
+    """Permission level constants"""
+    MEMBER = 0
+    MODERATOR = 1
+    ADMIN = 2
+    OWNER = 3
+
+# Levels a guild can hand out through its role mapping
+LEVEL_NAMES = {
+    'member': PermissionLevel.MEMBER,
+    'moderator': PermissionLevel.MODERATOR,
+    'mod': PermissionLevel.MODERATOR,
+    'admin': PermissionLevel.ADMIN,
+}
+
+def _resolve_permission_level(member):
+    """Work out a member's permission level from their Discord permissions"""
+    if member.guild.owner_id == member.id:
+        return PermissionLevel.OWNER
+    
+    perms = member.guild_permissions
+    
+    if perms.administrator:
+        return PermissionLevel.ADMIN
+    
+    if (perms.kick_members or perms.ban_members or 
+        perms.manage_messages or perms.manage_roles):
+        return PermissionLevel.MODERATOR
+    
+    return PermissionLevel.MEMBER
+
+class PermissionCache:
+    """Resolved permission level and top role position per (guild, member)
+    
+    Both only depend on the member's roles, the roles' permissions and positions,
+    the guild's role level mapping and the guild owner, so entries are dropped
+    when any of those change. Channel overwrites never affect guild-wide
+    permissions, so they need no invalidation.
+    Entries are kept per guild so a role change drops one guild's entries in a
+    single step, and each guild keeps only its most recently seen members.
+    """
+    
+    def __init__(self, max_members: int = 5000):
+        self.max_members = max_members  # Per guild
+        # guild_id -> member_id -> (level, top role position, level from the role mapping), least recently used first
+        self.guilds: Dict[int, 'OrderedDict[int, Tuple[int, int, int]]'] = {}
+        # guild_id -> ((level, role IDs), ...) highest level first
+        self.role_levels: Dict[int, Tuple[Tuple[int, FrozenSet[int]], ...]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def set_role_levels(self, guild_id: int, role_levels: Dict[int, int]):
+        """Compile a guild's role -> level mapping into one role ID set per level"""
+        by_level: Dict[int, set] = {}
+        for role_id, level in role_levels.items():
+            by_level.setdefault(level, set()).add(role_id)
+        
+        compiled = tuple(sorted(
+            ((level, frozenset(role_ids)) for level, role_ids in by_level.items()),
+            key=lambda item: item[0], reverse=True
+        ))
+        if compiled:
+            self.role_levels[guild_id] = compiled
+        else:
+            self.role_levels.pop(guild_id, None)
+        self.invalidate_guild(guild_id)
+    
+    def _mapped_level(self, member) -> int:
+        levels = self.role_levels.get(member.guild.id)
+        if not levels:
+            return PermissionLevel.MEMBER
+        
+        role_ids = {role.id for role in member.roles}
+        for level, level_role_ids in levels:
+            if not level_role_ids.isdisjoint(role_ids):
+                return level
+        return PermissionLevel.MEMBER
+    
+    def attach(self, bot):
+        """Keep the cache current from gateway events"""
+        bot.add_listener(self.on_member_update, 'on_member_update')
+        bot.add_listener(self.on_member_remove, 'on_member_remove')
+        bot.add_listener(self.on_guild_role_create, 'on_guild_role_create')
+        bot.add_listener(self.on_guild_role_update, 'on_guild_role_update')
+        bot.add_listener(self.on_guild_role_delete, 'on_guild_role_delete')
+        bot.add_listener(self.on_guild_update, 'on_guild_update')
+        bot.add_listener(self.on_guild_remove, 'on_guild_remove')
+    
+    def resolve(self, member) -> Tuple[int, int, int]:
+        """Get (permission level, top role position, mapped level) for a member"""
+        entries = self.guilds.get(member.guild.id)
+        if entries is None:
+            entries = self.guilds[member.guild.id] = OrderedDict()
+        
+        entry = entries.get(member.id)
+        if entry is not None:
+            self.hits += 1
+            entries.move_to_end(member.id)
+            return entry
+        
+        self.misses += 1
+        mapped_level = self._mapped_level(member)
+        entry = (max(_resolve_permission_level(member), mapped_level), member.top_role.position, mapped_level)
+        entries[member.id] = entry
+        if len(entries) > self.max_members:
+            entries.popitem(last=False)
+        return entry
+    
+    def invalidate_member(self, guild_id, member_id):
+        entries = self.guilds.get(guild_id)
+        if entries is not None:
+            entries.pop(member_id, None)
+    
+    def invalidate_guild(self, guild_id):
+        self.guilds.pop(guild_id, None)
+    
+    def stats(self) -> dict:
+        """Cache size and hit rate"""
+        lookups = self.hits + self.misses
+        return {
+            'guilds': len(self.guilds),
+            'entries': sum(len(entries) for entries in self.guilds.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None
+        }
+    
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self.invalidate_member(after.guild.id, after.id)
+    
+    async def on_member_remove(self, member):
+        self.invalidate_member(member.guild.id, member.id)
+    
+    async def on_guild_role_create(self, role):
+        # New roles shift the positions of the roles above them
+        self.invalidate_guild(role.guild.id)
+    
+    async def on_guild_role_update(self, before, after):
+        if before.permissions != after.permissions or before.position != after.position:
+            self.invalidate_guild(after.guild.id)
+    
+    async def on_guild_role_delete(self, role):
+        self.invalidate_guild(role.guild.id)
+    
+    async def on_guild_update(self, before, after):
+        if before.owner_id != after.owner_id:
+            self.invalidate_guild(after.id)
+    
+    async def on_guild_remove(self, guild):
+        self.invalidate_guild(guild.id)
+        self.role_levels.pop(guild.id, None)
+
+permission_cache = PermissionCache()
 
 def has_mod_permissions():
     """Decorator to check if user has moderation permissions"""
@@ -13,25 +170,19 @@ def has_mod_permissions():
         if ctx.author.id == ctx.bot.owner_id:
             return True
         
-        # Check if user has administrator permission
-        if ctx.author.guild_permissions.administrator:
-            return True
-        
-        # Check for specific moderation permissions
-        perms = ctx.author.guild_permissions
-        return (perms.kick_members or perms.ban_members or 
-                perms.manage_messages or perms.manage_roles)
+        # Administrators and members with moderation permissions
+        return get_permission_level(ctx.author) >= PermissionLevel.MODERATOR
     
     return commands.check(predicate)
 
 def can_moderate_member(moderator, target):
     """Check if moderator can moderate the target member"""
-    # Bot owner can moderate anyone
+    # Server owner can moderate anyone
     if moderator.guild.owner_id == moderator.id:
         return True
     
     # Cannot moderate someone with higher or equal role
-    if target.top_role >= moderator.top_role:
+    if top_role_position(target) >= top_role_position(moderator):
         return False
     
     # Cannot moderate bot itself
@@ -42,30 +193,45 @@ def can_moderate_member(moderator, target):
 
 def has_higher_role(member1, member2):
     """Check if member1 has a higher role than member2"""
-    return member1.top_role > member2.top_role
+    return top_role_position(member1) > top_role_position(member2)
 
-class PermissionLevel:
-    """Permission level constants"""
-    MEMBER = 0
-    MODERATOR = 1
-    ADMIN = 2
-    OWNER = 3
-
-def get_permission_level(member):
-    """Get the permission level of a member"""
-    if member.guild.owner_id == member.id:
-        return PermissionLevel.OWNER
+def has_permissions_or_level(level, **perms):
+    """Like commands.has_permissions, but also passes for roles the guild mapped to at least level"""
+    permissions_check = commands.has_permissions(**perms).predicate
     
-    perms = member.guild_permissions
-    
-    if perms.administrator:
-        return PermissionLevel.ADMIN
-    
-    if (perms.kick_members or perms.ban_members or 
-        perms.manage_messages or perms.manage_roles):
-        return PermissionLevel.MODERATOR
+    async def predicate(ctx):
+        if ctx.guild is not None and mapped_permission_level(ctx.author) >= level:
+            return True
+        # Raises MissingPermissions like the plain check
+        return await discord.utils.maybe_coroutine(permissions_check, ctx)
     
-    return PermissionLevel.MEMBER
+    predicate.permission_level = level
+    return commands.check(predicate)
+
+def get_permission_level(member):
+    """Get the permission level of a member (cached)"""
+    return permission_cache.resolve(member)[0]
+
+def mapped_permission_level(member):
+    """Get the level a member's roles have in the guild's role mapping (cached)"""
+    return permission_cache.resolve(member)[2]
+
+def top_role_position(member):
+    """Get the position of a member's highest role (cached)"""
+    return permission_cache.resolve(member)[1]
+
+def command_permission_level(command):
+    """Get the permission level a command requires (used to filter help output)"""
+    level = command.extras.get('permission_level')
+    if level is not None:
+        return level
+
+    levels = [check.permission_level for check in command.checks if hasattr(check, 'permission_level')]
+    if levels:
+        return max(levels)
+
+    # Commands guarded by a permission check are for moderators unless tagged otherwise
+    return PermissionLevel.MODERATOR if command.checks else PermissionLevel.MEMBER
 
 def require_permission_level(required_level):
     """Decorator to require a minimum permission level"""
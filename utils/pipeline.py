@@ -0,0 +1,156 @@
+"""
+Staged message moderation: cheap checks first, each stage timed
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from utils.logging import get_logger
+from utils.normalize import NormalizedText
+
+logger = get_logger('pipeline')
+
+class FilterFeature:
+    """Message filter bits (a guild's filter_disabled mask turns them off)"""
+    WORDS = 1
+    SPAM = 2
+    ATTACHMENTS = 4  # Embeds, attachments and long messages
+    COPYPASTA = 8  # The same text from many accounts
+
+# Names used by !filter
+FEATURE_NAMES = {
+    'words': FilterFeature.WORDS,
+    'spam': FilterFeature.SPAM,
+    'attachments': FilterFeature.ATTACHMENTS,
+    'copypasta': FilterFeature.COPYPASTA,
+}
+ALL_FEATURES = 0
+for _bit in FEATURE_NAMES.values():
+    ALL_FEATURES |= _bit
+
+class MessageContext:
+    """One message on its way through the pipeline; shared work is done at most once"""
+
+    __slots__ = ('message', '_text')
+
+    def __init__(self, message):
+        self.message = message
+        self._text: Optional[NormalizedText] = None
+
+    @property
+    def text(self) -> NormalizedText:
+        if self._text is None:
+            self._text = NormalizedText(self.message.content)
+        return self._text
+
+class Stage:
+    """A pipeline step and its running timings"""
+
+    __slots__ = ('name', 'handler', 'cost', 'feature', 'applies', 'skip_exempt', 'guild_only', 'edits',
+                 'calls', 'total_time', 'max_time')
+
+    def __init__(self, name, handler, cost, feature, applies, skip_exempt, guild_only, edits):
+        self.name = name
+        self.handler = handler
+        self.cost = cost
+        self.feature = feature
+        self.applies = applies
+        self.skip_exempt = skip_exempt
+        self.guild_only = guild_only
+        self.edits = edits
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+class MessagePipeline:
+    """Run registered stages over a message, cheapest first, until one handles it
+
+    A stage is skipped without being called when the guild turned its feature
+    off, the author is exempt (moderators), the message is a DM for a
+    guild-only stage, or its applies() check says no. The author's permission
+    level is only looked up if a stage that skips exempt users gets that far.
+    """
+
+    def __init__(self):
+        self.stages: List[Stage] = []
+
+    def register(self, name: str, handler, cost: int = 0, feature: int = 0,
+                 applies: Optional[Callable] = None, skip_exempt: bool = True, guild_only: bool = True,
+                 edits: bool = True):
+        """Add a stage; handler(context) returns True when the message was dealt with
+
+        Stages with edits=False (replies, rate tracking) only see new messages.
+        """
+        self.stages.append(Stage(name, handler, cost, feature, applies, skip_exempt, guild_only, edits))
+        self.stages.sort(key=lambda stage: stage.cost)
+
+    async def run(self, message, features: int, is_exempt: Callable, edited: bool = False) -> Optional[str]:
+        """Returns the name of the stage that handled the message, if any"""
+        context = MessageContext(message)
+        exempt = None
+        for stage in self.stages:
+            if edited and not stage.edits:
+                continue
+            if stage.feature and not features & stage.feature:
+                continue
+            if stage.guild_only and message.guild is None:
+                continue
+            if stage.skip_exempt:
+                if exempt is None:
+                    exempt = is_exempt(message)
+                if exempt:
+                    continue
+            if stage.applies is not None and not stage.applies(message):
+                continue
+
+            start = time.perf_counter()
+            try:
+                handled = await stage.handler(context)
+            except Exception as e:
+                logger.error(f"Stage {stage.name} failed on message {message.id}: {e}")
+                handled = False
+            finally:
+                elapsed = time.perf_counter() - start
+                stage.calls += 1
+                stage.total_time += elapsed
+                stage.max_time = max(stage.max_time, elapsed)
+
+            if handled:
+                return stage.name
+        return None
+
+    def stats(self) -> Dict[str, dict]:
+        """Calls and timings per stage, in milliseconds (including any API calls a stage made)"""
+        return {
+            stage.name: {
+                'calls': stage.calls,
+                'avg_ms': round(stage.total_time / stage.calls * 1000, 3) if stage.calls else None,
+                'max_ms': round(stage.max_time * 1000, 3)
+            }
+            for stage in self.stages
+        }
+
+class ContentHashCache:
+    """Hashes of the content last scanned per message, so edits that leave the text alone are skipped
+
+    Link unfurls and embed updates arrive as edits with the same content; only
+    real text changes need another pass through the pipeline.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hashes: 'OrderedDict[int, int]' = OrderedDict()
+
+    def changed(self, message_id: int, content: str) -> bool:
+        """Record the content; returns False if it's what was scanned last time"""
+        content_hash = hash(content)
+        if self.hashes.get(message_id) == content_hash:
+            self.hashes.move_to_end(message_id)
+            return False
+
+        self.hashes[message_id] = content_hash
+        self.hashes.move_to_end(message_id)
+        if len(self.hashes) > self.max_size:
+            self.hashes.popitem(last=False)
+        return True
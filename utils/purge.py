@@ -0,0 +1,167 @@
+"""
+Message filtering utilities for bulk message cleanup
+"""
+
+import re
+from datetime import timedelta
+from typing import List, Optional, Set
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+import discord
+
+LINK_PATTERN = re.compile(r'https?://|discord\.gg/', re.IGNORECASE)
+USER_ID_PATTERN = re.compile(r'^(?:<@!?)?(\d{15,20})>?$')
+
+# Discord refuses to bulk delete messages older than this
+BULK_DELETE_MAX_AGE = timedelta(days=14)
+
+# !clear runs patterns on the event loop over thousands of messages
+MAX_REGEX_LENGTH = 100
+MAX_REGEX_INPUT_CHARS = 1000  # Patterns only see the start of long messages
+MAX_REGEX_STEPS = 1000  # Rough backtracking work allowed per starting position
+REPEATS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT}
+if hasattr(sre_parse, 'POSSESSIVE_REPEAT'):
+    REPEATS.add(sre_parse.POSSESSIVE_REPEAT)
+
+def _subpatterns(value):
+    if isinstance(value, sre_parse.SubPattern):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _subpatterns(item)
+
+def _backtrack_steps(pattern) -> int:
+    """Upper bound on the ways a pattern can split one starting position's input
+    between its repeats and alternations; an unbounded repeat can take any length
+    up to MAX_REGEX_INPUT_CHARS, so two of them in a row (`.*a.*b`) blow the budget"""
+    steps = 1
+    for op, value in pattern:
+        if op in REPEATS:
+            low, high, item = value
+            choices = MAX_REGEX_INPUT_CHARS if high == sre_parse.MAXREPEAT else min(high - low + 1, MAX_REGEX_INPUT_CHARS)
+            steps *= choices * _backtrack_steps(item)
+        elif op == sre_parse.BRANCH:
+            steps *= max(_backtrack_steps(branch) for branch in value[1])
+        else:
+            for sub in _subpatterns(value):
+                steps *= _backtrack_steps(sub)
+    return steps
+
+def _backtracks(pattern, repeated: bool = False) -> bool:
+    """Check for constructs that can backtrack exponentially: a repeat or
+    alternation inside another repeat, or a backreference"""
+    for op, value in pattern:
+        if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+            return True
+        if op in REPEATS:
+            if repeated:
+                return True
+            _, high, item = value
+            if _backtracks(item, high > 1):
+                return True
+            continue
+        if op == sre_parse.BRANCH and repeated:
+            return True
+        for sub in _subpatterns(value):
+            if _backtracks(sub, repeated):
+                return True
+    return False
+
+def compile_safe_regex(text: str) -> re.Pattern:
+    """Compile a moderator's pattern, refusing ones that could freeze the bot (raises ValueError)"""
+    if len(text) > MAX_REGEX_LENGTH:
+        raise ValueError(f"that regex is too long (at most {MAX_REGEX_LENGTH} characters)")
+    try:
+        parsed = sre_parse.parse(text, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"that regex doesn't work ({e})")
+    if _backtracks(parsed):
+        raise ValueError("that regex has nested repeats or backreferences, which could make me freeze")
+    if _backtrack_steps(parsed) > MAX_REGEX_STEPS:
+        raise ValueError("that regex has too many `+`, `*` or wide `{n,m}` repeats (one `+` or `*` is fine)")
+    return re.compile(text, re.IGNORECASE)
+
+class PurgeFilter:
+    """Which messages a !clear should remove (all conditions must match)"""
+
+    def __init__(self):
+        self.user_ids: Set[int] = set()
+        self.bots_only = False
+        self.attachments_only = False
+        self.links_only = False
+        self.contains: Optional[str] = None
+        self.pattern: Optional[re.Pattern] = None
+
+    def matches(self, message: discord.Message) -> bool:
+        """Check if a message should be removed"""
+        if message.pinned:
+            return False
+        if self.user_ids and message.author.id not in self.user_ids:
+            return False
+        if self.bots_only and not message.author.bot:
+            return False
+        if self.attachments_only and not message.attachments:
+            return False
+        if self.links_only and not LINK_PATTERN.search(message.content):
+            return False
+        if self.contains is not None and self.contains not in message.content.lower():
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content[:MAX_REGEX_INPUT_CHARS]):
+            return False
+        return True
+
+    def describe(self) -> str:
+        """Summarize the filter for status messages"""
+        parts: List[str] = []
+        if self.user_ids:
+            parts.append("from " + ", ".join(f"<@{user_id}>" for user_id in self.user_ids))
+        if self.bots_only:
+            parts.append("from bots")
+        if self.attachments_only:
+            parts.append("with attachments")
+        if self.links_only:
+            parts.append("with links")
+        if self.contains is not None:
+            parts.append(f"containing `{self.contains}`")
+        if self.pattern is not None:
+            parts.append(f"matching `{self.pattern.pattern}`")
+        return " ".join(parts) if parts else "of any kind"
+
+def parse_purge_filter(text: str) -> PurgeFilter:
+    """Parse filters like `@user bots links contains free nitro` (raises ValueError if invalid)"""
+    purge_filter = PurgeFilter()
+    words = text.split()
+
+    for index, word in enumerate(words):
+        keyword = word.lower()
+        rest = " ".join(words[index + 1:])
+
+        # contains/regex take the rest of the line
+        if keyword == 'contains':
+            if not rest:
+                raise ValueError("`contains` needs some text to look for")
+            purge_filter.contains = rest.lower()
+            break
+        if keyword == 'regex':
+            if not rest:
+                raise ValueError("`regex` needs a pattern")
+            purge_filter.pattern = compile_safe_regex(rest)
+            break
+
+        if keyword in ('bot', 'bots'):
+            purge_filter.bots_only = True
+        elif keyword in ('attachment', 'attachments', 'files', 'images'):
+            purge_filter.attachments_only = True
+        elif keyword in ('link', 'links'):
+            purge_filter.links_only = True
+        else:
+            match = USER_ID_PATTERN.match(word)
+            if not match:
+                raise ValueError(f"I don't know the filter `{word}`")
+            purge_filter.user_ids.add(int(match.group(1)))
+
+    return purge_filter
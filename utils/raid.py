@@ -0,0 +1,42 @@
+"""
+Raid detection utilities for the Discord moderation bot
+"""
+
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Tuple
+
+class JoinRateDetector:
+    """Sliding-window join-rate tracker for a single guild"""
+
+    def __init__(self, window_seconds: float, join_threshold: float,
+                 young_account_days: int, young_account_weight: float):
+        self.window_seconds = window_seconds
+        self.join_threshold = join_threshold
+        self.young_account_age = timedelta(days=young_account_days)
+        self.young_account_weight = young_account_weight
+
+        self.joins: Deque[Tuple[float, float]] = deque()  # (monotonic time, weight)
+        self.score = 0.0
+
+    def is_young(self, created_at: datetime, now: datetime) -> bool:
+        """Check if an account is new enough to look suspicious"""
+        return now - created_at < self.young_account_age
+
+    def record(self, timestamp: float, young: bool) -> bool:
+        """Record a join and return True if the weighted join rate crossed the threshold"""
+        weight = self.young_account_weight if young else 1.0
+        self.joins.append((timestamp, weight))
+        self.score += weight
+
+        # Drop joins that fell out of the window
+        cutoff = timestamp - self.window_seconds
+        while self.joins and self.joins[0][0] < cutoff:
+            self.score -= self.joins.popleft()[1]
+
+        return self.score >= self.join_threshold
+
+    def reset(self):
+        """Forget all recorded joins"""
+        self.joins.clear()
+        self.score = 0.0
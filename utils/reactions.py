@@ -0,0 +1,84 @@
+"""
+Raw reaction routing for the Discord moderation bot
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+from utils.logging import get_logger
+from utils.scheduler import HeapScheduler
+
+logger = get_logger('reactions')
+
+# handler(payload) for a discord.RawReactionActionEvent
+ReactionHandler = Callable[[Any], Awaitable[None]]
+
+class ReactionRoute:
+    """Handlers for reactions on one message"""
+
+    __slots__ = ('on_add', 'on_remove', 'expires_at')
+
+    def __init__(self, on_add: Optional[ReactionHandler], on_remove: Optional[ReactionHandler],
+                 expires_at: Optional[float]):
+        self.on_add = on_add
+        self.on_remove = on_remove
+        self.expires_at = expires_at
+
+class ReactionRouter:
+    """Send raw reaction events to whichever feature owns the message, with one dict lookup per event"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.routes: Dict[int, ReactionRoute] = {}  # message ID -> handlers
+        self.expiry = HeapScheduler(self._expire, 'reaction routes')
+
+        bot.add_listener(self.on_raw_reaction_add, 'on_raw_reaction_add')
+        bot.add_listener(self.on_raw_reaction_remove, 'on_raw_reaction_remove')
+
+    def __len__(self):
+        return len(self.routes)
+
+    def __contains__(self, message_id):
+        return message_id in self.routes
+
+    def register(self, message_id: int, on_add: Optional[ReactionHandler] = None,
+                 on_remove: Optional[ReactionHandler] = None, expires_at: Optional[float] = None):
+        """Route reactions on a message to handlers until unregistered or expires_at (UNIX time) passes"""
+        self.routes[message_id] = ReactionRoute(on_add, on_remove, expires_at)
+        if expires_at is not None:
+            self.expiry.schedule(message_id, expires_at)
+        else:
+            self.expiry.cancel(message_id)
+
+    def unregister(self, message_id: int) -> bool:
+        """Stop routing reactions on a message"""
+        self.expiry.cancel(message_id)
+        return self.routes.pop(message_id, None) is not None
+
+    def start(self):
+        """Start dropping expired routes"""
+        self.expiry.start()
+
+    def stop(self):
+        self.expiry.stop()
+
+    async def _expire(self, message_id):
+        self.routes.pop(message_id, None)
+
+    async def on_raw_reaction_add(self, payload):
+        route = self.routes.get(payload.message_id)
+        if route is not None and route.on_add is not None:
+            await self._dispatch(route.on_add, payload)
+
+    async def on_raw_reaction_remove(self, payload):
+        route = self.routes.get(payload.message_id)
+        if route is not None and route.on_remove is not None:
+            await self._dispatch(route.on_remove, payload)
+
+    async def _dispatch(self, handler: ReactionHandler, payload):
+        # The bot's own reactions (poll options, game prompts) never count
+        if payload.user_id == self.bot.user.id:
+            return
+
+        try:
+            await handler(payload)
+        except Exception as e:
+            logger.error(f"Reaction handler for message {payload.message_id} failed: {e}")
@@ -0,0 +1,153 @@
+"""
+Role lookup utilities for the Discord moderation bot
+"""
+
+import asyncio
+import bisect
+import difflib
+import re
+from typing import Dict, List, Optional, Set
+
+import discord
+
+ROLE_MENTION_PATTERN = re.compile(r'^(?:<@&)?(\d{15,20})>?$')
+MAX_ROLE_CHOICES = 5
+ROLE_CHOICE_TIMEOUT = 30  # Seconds to wait for an answer to "which role did you mean?"
+
+def normalize_role_name(name: str) -> str:
+    """Case- and spacing-insensitive form of a role name"""
+    return ' '.join(name.casefold().split())
+
+class GuildRoleNames:
+    """Normalized role names for one guild, kept sorted for prefix search"""
+
+    __slots__ = ('ids_by_name', 'names', 'name_by_id')
+
+    def __init__(self, roles):
+        self.ids_by_name: Dict[str, Set[int]] = {}
+        self.names: List[str] = []
+        self.name_by_id: Dict[int, str] = {}
+        for role in roles:
+            self.add(role)
+
+    def add(self, role):
+        name = normalize_role_name(role.name)
+        self.name_by_id[role.id] = name
+        ids = self.ids_by_name.get(name)
+        if ids is None:
+            ids = self.ids_by_name[name] = set()
+            bisect.insort(self.names, name)
+        ids.add(role.id)
+
+    def remove(self, role_id: int):
+        name = self.name_by_id.pop(role_id, None)
+        if name is None:
+            return
+        ids = self.ids_by_name[name]
+        ids.discard(role_id)
+        if not ids:
+            del self.ids_by_name[name]
+            del self.names[bisect.bisect_left(self.names, name)]
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_left(self.names, prefix + '\U0010ffff')
+        return self.names[start:end]
+
+class RoleIndex:
+    """Per-guild role name index kept current from role events, so lookups don't scan guild.roles"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.guilds: Dict[int, GuildRoleNames] = {}
+
+        bot.add_listener(self.on_guild_role_create, 'on_guild_role_create')
+        bot.add_listener(self.on_guild_role_update, 'on_guild_role_update')
+        bot.add_listener(self.on_guild_role_delete, 'on_guild_role_delete')
+        bot.add_listener(self.on_guild_remove, 'on_guild_remove')
+
+    def _index(self, guild) -> GuildRoleNames:
+        # Built on first use; kept up to date by the listeners afterwards
+        index = self.guilds.get(guild.id)
+        if index is None:
+            index = self.guilds[guild.id] = GuildRoleNames(
+                role for role in guild.roles if not role.is_default()
+            )
+        return index
+
+    def find(self, guild, query: str) -> List[discord.Role]:
+        """Find roles matching a mention, ID or name: exact, then prefix, then fuzzy (best tier only)"""
+        match = ROLE_MENTION_PATTERN.match(query.strip())
+        if match:
+            role = guild.get_role(int(match.group(1)))
+            if role:
+                return [role]
+
+        index = self._index(guild)
+        name = normalize_role_name(query)
+        if not name:
+            return []
+
+        if name in index.ids_by_name:
+            names = [name]
+        else:
+            names = index.with_prefix(name) or difflib.get_close_matches(
+                name, index.names, n=MAX_ROLE_CHOICES, cutoff=0.6
+            )
+
+        roles = [guild.get_role(role_id) for found in names for role_id in index.ids_by_name[found]]
+        return sorted((role for role in roles if role), key=lambda role: role.position, reverse=True)
+
+    async def choose(self, ctx, roles: List[discord.Role]) -> Optional[discord.Role]:
+        """Return the only match, or ask the author which role they meant"""
+        if len(roles) == 1:
+            return roles[0]
+
+        choices = roles[:MAX_ROLE_CHOICES]
+        embed = discord.Embed(
+            title="🐱 Which Role Did You Mean?",
+            description="Meow! I found a few roles like that! Reply with the number of the one you want: 🐾\n\n" +
+                        "\n".join(f"**{number}.** {role.mention}" for number, role in enumerate(choices, 1)),
+            color=discord.Color.from_rgb(255, 192, 203)
+        )
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+
+        def check(message):
+            return message.author == ctx.author and message.channel == ctx.channel
+
+        try:
+            reply = await self.bot.wait_for('message', check=check, timeout=ROLE_CHOICE_TIMEOUT)
+        except asyncio.TimeoutError:
+            reply = None
+
+        if reply is not None and reply.content.strip().isdigit() and 1 <= int(reply.content) <= len(choices):
+            return choices[int(reply.content) - 1]
+
+        embed = discord.Embed(
+            title="🐱 Never Mind Then",
+            description="Meow! I didn't get a number from the list, so I won't change any roles! 🐾",
+            color=discord.Color.from_rgb(255, 182, 193)
+        )
+        # Cute kitten thumbnail would go here
+        await ctx.send(embed=embed)
+        return None
+
+    async def on_guild_role_create(self, role):
+        index = self.guilds.get(role.guild.id)
+        if index is not None:
+            index.add(role)
+
+    async def on_guild_role_update(self, before, after):
+        index = self.guilds.get(after.guild.id)
+        if index is not None and before.name != after.name:
+            index.remove(after.id)
+            index.add(after)
+
+    async def on_guild_role_delete(self, role):
+        index = self.guilds.get(role.guild.id)
+        if index is not None:
+            index.remove(role.id)
+
+    async def on_guild_remove(self, guild):
+        self.guilds.pop(guild.id, None)
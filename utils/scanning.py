@@ -0,0 +1,126 @@
+"""
+Deep content scanning: embeds, attachments and long messages, off the event loop
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from utils.logging import get_logger
+from utils.normalize import NormalizedText
+
+logger = get_logger('scanning')
+
+# Returned instead of a term when a scan runs out of time; slow content is treated as a hit
+# so making a scan slow isn't a way around the filter
+SCAN_TIMED_OUT = '<scan timed out>'
+
+TEXT_EXTENSIONS = ('.txt', '.md', '.log', '.json', '.csv', '.yml', '.yaml', '.ini', '.py', '.js', '.html')
+
+def find_term(texts: Sequence[str], terms: Sequence[str]) -> Optional[str]:
+    """Normalize each text and return the first filter term found (runs in a worker process)"""
+    for text in texts:
+        term = NormalizedText(text).find_any(terms)
+        if term:
+            return term
+    return None
+
+def find_term_in_files(blobs: Sequence[bytes], terms: Sequence[str]) -> Optional[str]:
+    """Decode text attachments and look for filter terms (runs in a worker process)"""
+    return find_term([blob.decode('utf-8', errors='replace') for blob in blobs], terms)
+
+def is_text_attachment(attachment) -> bool:
+    content_type = attachment.content_type or ''
+    return content_type.startswith('text/') or attachment.filename.lower().endswith(TEXT_EXTENSIONS)
+
+def embed_texts(embed) -> List[str]:
+    """Every piece of user-visible text in an embed"""
+    texts = [embed.title, embed.description, embed.footer.text, embed.author.name]
+    for field in embed.fields:
+        texts.extend((field.name, field.value))
+    return [text for text in texts if text]
+
+class DeepScanner:
+    """Hands heavy inspection to a small process pool, with size limits and a timeout
+
+    Filenames and short embed text are checked inline; long pastes, large
+    embeds and small text attachments go to the pool. Jobs wait for a free
+    worker before their timeout starts, so a burst only slows scanning down;
+    a job that overruns its timeout returns SCAN_TIMED_OUT and keeps its
+    worker until it finishes, so a pathological message can't hold up the
+    filter, slip past it, or make the jobs behind it time out.
+    """
+
+    def __init__(self, workers: int, inline_chars: int, max_attachment_bytes: int,
+                 max_attachments: int, timeout: float):
+        self.workers = workers
+        self.inline_chars = inline_chars
+        self.max_attachment_bytes = max_attachment_bytes
+        self.max_attachments = max_attachments
+        self.timeout = timeout
+        self.timeouts = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(workers)  # Held from submission until the worker is actually done
+
+    def needs_scan(self, message) -> bool:
+        """Cheap check for whether a message has anything beyond short content"""
+        return bool(message.attachments or message.embeds or len(message.content) > self.inline_chars)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Started on first use so bots that never see attachments don't pay for the processes
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def _run(self, func, data, terms) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        try:
+            future = loop.run_in_executor(self._executor(), func, data, terms)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            # Shielded so a timeout leaves the job (and its slot) in place until the worker finishes
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Content scan timed out after {self.timeout}s")
+            return SCAN_TIMED_OUT
+
+    async def scan(self, message, terms: Sequence[str]) -> Optional[str]:
+        """The first filter term found in the message's long content, embeds or attachments"""
+        texts = [attachment.filename for attachment in message.attachments]
+        for embed in message.embeds:
+            texts.extend(embed_texts(embed))
+
+        # Filenames and short embeds are cheap enough to check right here
+        if len(message.content) > self.inline_chars:
+            texts.append(message.content)
+        if sum(len(text) for text in texts) <= self.inline_chars:
+            term = find_term(texts, terms)
+        else:
+            term = await self._run(find_term, texts, terms)
+        if term:
+            return term
+
+        files = [
+            attachment for attachment in message.attachments
+            if is_text_attachment(attachment) and attachment.size <= self.max_attachment_bytes
+        ][:self.max_attachments]
+        if not files:
+            return None
+
+        blobs = []
+        for attachment in files:
+            try:
+                blobs.append(await attachment.read())
+            except Exception as e:
+                logger.warning(f"Couldn't download attachment {attachment.id}: {e}")
+        return await self._run(find_term_in_files, blobs, terms) if blobs else None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
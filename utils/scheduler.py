@@ -0,0 +1,105 @@
+"""
+Timer scheduling utilities for the Discord moderation bot
+"""
+
+import asyncio
+import heapq
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+from utils.logging import get_logger
+
+logger = get_logger('scheduler')
+
+class HeapScheduler:
+    """Fire callbacks at wall-clock due times using one min-heap and a single sleeping task
+
+    Each due callback runs in its own task, so a slow one (an unban waiting on
+    a rate limit) doesn't hold back everything due after it.
+    """
+
+    def __init__(self, callback: Callable[[Any], Awaitable[None]], name: str = 'scheduler'):
+        self.callback = callback  # Awaited with the key of each due item
+        self.name = name
+
+        self._heap: List[Tuple[float, int, Hashable]] = []  # (due_at, sequence, key)
+        self._due: Dict[Hashable, float] = {}  # Live items; heap entries not matching are stale
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()  # Callbacks in flight
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, key):
+        return key in self._due
+
+    def schedule(self, key: Hashable, due_at: float):
+        """Schedule (or reschedule) an item to fire at a UNIX timestamp"""
+        self._due[key] = due_at
+        self._sequence += 1
+        heapq.heappush(self._heap, (due_at, self._sequence, key))
+
+        # Only wake the sleeper if this item is now the next one due
+        if self._heap[0][2] == key:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel an item; its heap entry is discarded lazily"""
+        return self._due.pop(key, None) is not None
+
+    def next_due(self) -> Optional[float]:
+        """Timestamp of the next live item, if any"""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        """Start the sleeper task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """Stop the sleeper task and any callbacks still running (scheduled items are kept)"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        for task in self._running:
+            task.cancel()
+        self._running.clear()
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap and self._due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    async def _run(self):
+        while True:
+            # Clear before looking at the heap so a schedule() during the wait is never missed
+            self._wakeup.clear()
+            self._discard_stale()
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            due_at, _, key = self._heap[0]
+            delay = due_at - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            del self._due[key]
+
+            task = asyncio.create_task(self._fire(key))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fire(self, key: Hashable):
+        try:
+            await self.callback(key)
+        except Exception as e:
+            logger.error(f"{self.name}: callback for {key} failed: {e}")
@@ -0,0 +1,27 @@
+"""
+User ID list parsing for bulk moderation commands
+"""
+
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+USER_ID_TOKEN = re.compile(r'^(?:<@!?)?(\d{15,20})>?,?$')
+
+def parse_user_ids(text: str, stop_at_text: bool = True) -> Tuple[List[int], Optional[str]]:
+    """Read user IDs or mentions from the start of text; the remaining words are returned as the reason"""
+    user_ids = []
+    words = text.split()
+
+    for index, word in enumerate(words):
+        match = USER_ID_TOKEN.match(word)
+        if match:
+            user_ids.append(int(match.group(1)))
+        elif stop_at_text:
+            return user_ids, " ".join(words[index:])
+
+    return user_ids, None
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    """Split a sequence into pieces of at most size items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
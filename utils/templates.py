@@ -0,0 +1,75 @@
+"""
+Message template utilities for welcome and goodbye messages
+"""
+
+import re
+import discord
+from typing import Dict, FrozenSet, Optional, Tuple
+
+PLACEHOLDER_PATTERN = re.compile(r'\{(\w+)\}')
+
+def format_account_age(created_at) -> str:
+    """Describe how old an account is in friendly units"""
+    days = (discord.utils.utcnow() - created_at).days
+
+    if days >= 365:
+        years = days // 365
+        return f"{years} year{'s' if years != 1 else ''}"
+    if days >= 30:
+        months = days // 30
+        return f"{months} month{'s' if months != 1 else ''}"
+    if days >= 1:
+        return f"{days} day{'s' if days != 1 else ''}"
+    return "less than a day"
+
+# Placeholder name -> function(guild, member) producing its text
+PLACEHOLDERS = {
+    'mention': lambda guild, member: member.mention,
+    'user_name': lambda guild, member: member.display_name,
+    'server': lambda guild, member: guild.name,
+    'member_count': lambda guild, member: str(guild.member_count or len(guild.members)),
+    'account_age': lambda guild, member: format_account_age(member.created_at),
+}
+
+class CompiledTemplate:
+    """A custom message parsed once into literal and placeholder segments"""
+
+    __slots__ = ('source', 'segments', 'fields')
+
+    def __init__(self, source: str, segments: Tuple[Tuple[bool, str], ...]):
+        self.source = source
+        self.segments = segments  # (is_placeholder, literal text or placeholder name)
+        self.fields: FrozenSet[str] = frozenset(text for is_field, text in segments if is_field)
+
+    def render(self, guild, member) -> str:
+        """Fill in the placeholders for a member"""
+        values = {name: PLACEHOLDERS[name](guild, member) for name in self.fields}
+        return ''.join([values[text] if is_field else text for is_field, text in self.segments])
+
+def compile_template(source: str, aliases: Optional[Dict[str, str]] = None) -> CompiledTemplate:
+    """Parse a custom message into segments; unknown placeholders are kept as plain text"""
+    aliases = aliases or {}
+    segments = []
+    literal = []
+    position = 0
+
+    for match in PLACEHOLDER_PATTERN.finditer(source):
+        name = aliases.get(match.group(1), match.group(1))
+        literal.append(source[position:match.start()])
+        position = match.end()
+
+        if name in PLACEHOLDERS:
+            text = ''.join(literal)
+            if text:
+                segments.append((False, text))
+            literal = []
+            segments.append((True, name))
+        else:
+            literal.append(match.group(0))
+
+    literal.append(source[position:])
+    text = ''.join(literal)
+    if text:
+        segments.append((False, text))
+
+    return CompiledTemplate(source, tuple(segments))
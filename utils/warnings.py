@@ -0,0 +1,51 @@
+"""
+Warning history utilities for windowed automod rules
+"""
+
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+class WarningTimeline:
+    """One member's warning times, kept sorted so counting a window is a bisect"""
+
+    __slots__ = ('times',)
+
+    def __init__(self):
+        self.times: List[float] = []
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, timestamp: float):
+        bisect.insort(self.times, timestamp)
+
+    def remove(self, timestamp: float):
+        index = bisect.bisect_left(self.times, timestamp)
+        if index < len(self.times) and self.times[index] == timestamp:
+            del self.times[index]
+
+    def count_since(self, cutoff: float) -> int:
+        """Warnings at or after cutoff"""
+        return len(self.times) - bisect.bisect_left(self.times, cutoff)
+
+class AutomodLadder:
+    """A guild's automod rules, sorted once so the strictest matching rule is found first"""
+
+    __slots__ = ('rules', 'expiry')
+
+    def __init__(self, automod: Dict[int, str], windows: Dict[int, int], expiry: Optional[int] = None):
+        # (threshold, window seconds or None for all time, action), highest threshold first
+        self.rules: Tuple[Tuple[int, Optional[int], str], ...] = tuple(sorted(
+            ((threshold, windows.get(threshold), action) for threshold, action in automod.items()),
+            key=lambda rule: rule[0], reverse=True
+        ))
+        self.expiry = expiry  # Warnings older than this never count
+
+    def match(self, timeline: WarningTimeline, now: float) -> Optional[Tuple[int, Optional[int], str]]:
+        """The first rule the member's recent warnings reach, if any"""
+        oldest = now - self.expiry if self.expiry else float('-inf')
+        for threshold, window, action in self.rules:
+            cutoff = max(oldest, now - window) if window else oldest
+            if timeline.count_since(cutoff) >= threshold:
+                return threshold, window, action
+        return None